@@ -0,0 +1,294 @@
+"""
+Benchmarks for the pydraughts engine, run with: python benchmark.py [name ...]
+"""
+
+import argparse
+import os
+import random
+import time
+
+from pydraughts import WHITE_PLAYER, BLACK_PLAYER
+from pydraughts.board import Board
+from pydraughts.cache import get_default_move_cache
+from pydraughts.bitboard import BitBoard
+from pydraughts.bots import AlphaBetaBot
+from pydraughts import batch
+
+
+def random_positions(n_games=20, max_plies=200, seed=0):
+    """Collect the positions, and the player to move, of random games"""
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(n_games):
+        board = Board()
+        player_type = WHITE_PLAYER
+        for _ in range(max_plies):
+            moves = board.all_legal_moves(player_type)
+            if not moves:
+                break
+
+            positions.append((board.copy(), player_type))
+            board.apply_move(rng.choice(moves))
+            player_type = not player_type
+
+    get_default_move_cache().clear()
+    return positions
+
+
+def generate_uncached(board, player_type):
+    """all legal moves, bypassing the move cache"""
+    capture_moves = board.all_legal_capture_moves(player_type)
+    return capture_moves or board.all_legal_non_capture_moves(player_type)
+
+
+def time_move_generation(positions, repeat=3, generate=None):
+    """Returns the number of positions per second for which all legal moves are generated"""
+    if generate is None:
+        generate = lambda board, player_type: board.all_legal_moves(player_type)
+
+    best = None
+    for _ in range(repeat):
+        get_default_move_cache().clear()
+        start = time.perf_counter()
+        for board, player_type in positions:
+            generate(board, player_type)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+
+    return len(positions) / best
+
+
+def benchmark_bitboard():
+    positions = random_positions()
+    bit_positions = [(BitBoard(board.pieces), player) for board, player in positions]
+
+    board_rate = time_move_generation(positions)
+    bitboard_rate = time_move_generation(bit_positions)
+    print("move generation on %d positions of random games" % len(positions))
+    print(" - Board:    %10.0f positions/s" % board_rate)
+    print(" - BitBoard: %10.0f positions/s" % bitboard_rate)
+    print(" - speedup:  %10.1fx" % (bitboard_rate / board_rate))
+
+
+def benchmark_kings():
+    board = Board()
+    board.set_positions(
+        kings_white=[0, 9, 23, 41], kings_black=[4, 27, 35, 49], positions_black=[16]
+    )
+    positions = [(board, WHITE_PLAYER), (board, BLACK_PLAYER)] * 500
+    rate = time_move_generation(positions, generate=generate_uncached)
+    print("uncached move generation in an endgame with 4 kings per side")
+    print(" - Board: %10.0f positions/s" % rate)
+
+
+def blind_filtered_capture_moves(board, player_type):
+    """the capture generator which copies moves, keeping only the longest sequences at the end"""
+    moves = board.all_blind_capture_moves(player_type)
+    if not moves:
+        return []
+
+    maximum_length = max(len(move.captures) for move in moves)
+    return [move for move in moves if len(move.captures) == maximum_length]
+
+
+def benchmark_captures():
+    capture_positions = {
+        "circular capture": dict(positions_white=[7], positions_black=[12, 22, 21, 11]),
+        "circular capture 2": dict(
+            positions_white=[6], positions_black=[10, 20, 11, 21, 12, 22, 13, 23]
+        ),
+        "longest capture": dict(
+            positions_white=[6], positions_black=[10, 11, 21, 22, 33, 43]
+        ),
+        "king circular capture": dict(
+            kings_white=[7], positions_black=[18, 38, 36, 16]
+        ),
+    }
+
+    print("capture generation, positions/s")
+    for name, positions in capture_positions.items():
+        board = Board()
+        board.set_positions(**positions)
+        boards = [(board, WHITE_PLAYER)] * 200
+
+        old_rate = time_move_generation(boards, generate=blind_filtered_capture_moves)
+        new_rate = time_move_generation(
+            boards, generate=lambda board, player: board.all_legal_capture_moves(player)
+        )
+        print(
+            " - %-22s copying: %8.0f  path stack: %8.0f  speedup: %4.1fx"
+            % (name, old_rate, new_rate, new_rate / old_rate)
+        )
+
+
+def benchmark_parallel(depth=7):
+    board = random_positions(n_games=1, max_plies=20, seed=1)[-1][0]
+    print(
+        "alpha-beta search to depth %d with the root moves split over workers" % depth
+    )
+
+    base_duration = None
+    for workers in [1, 2, 4, 8]:
+        bot = AlphaBetaBot(
+            name="workers_%d" % workers,
+            time_limit=3600,
+            max_depth=depth,
+            workers=workers,
+        )
+        bot.player_type = WHITE_PLAYER
+        start = time.perf_counter()
+        bot.take_action(board.copy(), None)
+        duration = time.perf_counter() - start
+        bot.close()
+
+        base_duration = duration if base_duration is None else base_duration
+        print(
+            " - %d workers: %6.2f s, %8d nodes, speedup %4.1fx"
+            % (workers, duration, bot.nodes, base_duration / duration)
+        )
+
+
+def benchmark_batch():
+    positions = random_positions(n_games=40)
+    boards = [board for board, _ in positions]
+    player_types = [player_type for _, player_type in positions]
+    array = batch.to_array(boards)
+
+    board_rate = time_move_generation(positions, generate=generate_uncached)
+
+    best = None
+    best_analysis = None
+    for _ in range(3):
+        start = time.perf_counter()
+        analysis = batch.analyze(array, player_types)
+        analysis_duration = time.perf_counter() - start
+        analysis.legal_moves()
+        duration = time.perf_counter() - start
+        if best is None or duration < best:
+            best = duration
+            best_analysis = analysis_duration
+
+    print("move generation on %d positions of random games" % len(positions))
+    print(" - Board, uncached:    %10.0f positions/s" % board_rate)
+    print(
+        " - batch analysis:     %10.0f positions/s" % (len(positions) / best_analysis)
+    )
+    print(" - batch legal moves:  %10.0f positions/s" % (len(positions) / best))
+    print(" - captures (scalar):  %10.1f %%" % (100 * analysis.has_capture.mean()))
+
+
+def benchmark_graphics(n_frames=200, seed=0):
+    """frame times of Graphics.update_display while random moves are played, on SDL's dummy video driver"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from pydraughts.graphics import Graphics
+
+    graphics = Graphics()
+    graphics.fps = 0
+    rng = random.Random(seed)
+
+    def play(invalidate):
+        board = Board()
+        moves = []
+        player_type = WHITE_PLAYER
+        graphics.move_history = moves
+        graphics.time = {WHITE_PLAYER: 0.0, BLACK_PLAYER: 0.0}
+        graphics.invalidate()
+        start = time.perf_counter()
+        for frame in range(n_frames):
+            legal_moves = board.all_legal_moves(player_type)
+            if not legal_moves:
+                board = Board()
+                moves.clear()
+                player_type = WHITE_PLAYER
+                continue
+
+            # a frame per move, and a frame per second of clock time
+            if frame % 2:
+                move = rng.choice(legal_moves)
+                board.apply_move(move)
+                moves.append(move)
+                player_type = not player_type
+            graphics.time[player_type] += 1
+            if invalidate:
+                graphics.invalidate()
+            graphics.update_display(board)
+        return (time.perf_counter() - start) / n_frames
+
+    full = play(invalidate=True)
+    incremental = play(invalidate=False)
+    print("update_display during random games, %d frames" % n_frames)
+    print(" - full redraw:        %10.3f ms/frame" % (1000 * full))
+    print(" - dirty squares only: %10.3f ms/frame" % (1000 * incremental))
+
+
+def benchmark_pdn(n_games=300, max_plies=200, seed=0):
+    """games per minute of the PDN reader, with and without checking the moves, on random games"""
+    import tempfile
+    from pydraughts import pdn
+
+    rng = random.Random(seed)
+    games = []
+    for _ in range(n_games):
+        board = Board()
+        player_type = WHITE_PLAYER
+        moves = []
+        for _ in range(max_plies):
+            legal_moves = board.all_legal_moves(player_type)
+            if not legal_moves:
+                break
+
+            move = rng.choice(legal_moves)
+            board.apply_move(move)
+            moves.append(move)
+            player_type = not player_type
+        games.append(pdn.PDNGame.from_moves(moves))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.pdn")
+        start = time.perf_counter()
+        pdn.write_games(path, games)
+        write_duration = time.perf_counter() - start
+
+        print("PDN, %d random games" % n_games)
+        print(
+            " - write:              %10.0f games/minute"
+            % (60 * n_games / write_duration)
+        )
+        for validate in [False, True]:
+            start = time.perf_counter()
+            n_read = sum(1 for _ in pdn.read_games(path, validate=validate))
+            duration = time.perf_counter() - start
+            print(
+                " - read, validate=%-5s %10.0f games/minute"
+                % (validate, 60 * n_read / duration)
+            )
+
+
+benchmarks = {
+    "bitboard": benchmark_bitboard,
+    "kings": benchmark_kings,
+    "captures": benchmark_captures,
+    "parallel": benchmark_parallel,
+    "batch": benchmark_batch,
+    "graphics": benchmark_graphics,
+    "pdn": benchmark_pdn,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pydraughts benchmarks")
+    parser.add_argument(
+        "names", nargs="*", help="benchmarks to run: %s" % ", ".join(benchmarks)
+    )
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in benchmarks:
+            parser.error("unknown benchmark %s" % name)
+
+    for name in args.names or benchmarks:
+        print("## %s" % name)
+        benchmarks[name]()
+
+
+if __name__ == "__main__":
+    main()
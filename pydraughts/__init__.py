@@ -1,7 +1,35 @@
+import importlib
+
 from pydraughts.settings import *
-from pydraughts.game import *
-from pydraughts.graphics import *
 from pydraughts.piece import *
 from pydraughts.board import *
-from pydraughts.human_player import *
+from pydraughts.cache import *
+from pydraughts.evaluation import *
+from pydraughts.bitboard import *
 from pydraughts.bots import *
+from pydraughts.transposition import *
+
+# the modules which need pygame, and the names they export, are imported on first use. Headless use, such
+# as pydraughts.match, never loads pygame.
+gui_modules = ["game", "graphics", "human_player"]
+gui_names = {
+    "Game": "game",
+    "Graphics": "graphics",
+    "list_to_matrix_coords": "graphics",
+    "matrix_to_list_coords": "graphics",
+    "time_to_str": "graphics",
+    "board_coords": "graphics",
+    "pixel_coords": "graphics",
+    "HumanPlayer": "human_player",
+}
+
+
+def __getattr__(name):
+    if name in gui_modules:
+        return importlib.import_module("pydraughts.%s" % name)
+
+    if name in gui_names:
+        module = importlib.import_module("pydraughts.%s" % gui_names[name])
+        return getattr(module, name)
+
+    raise AttributeError("module 'pydraughts' has no attribute '%s'" % name)
@@ -0,0 +1,322 @@
+"""
+Move generation for many positions at once with numpy. Positions are rows of an (N, 50) int8 array, with the
+piece values below. The non-capture moves, whether a capture is available and the piece counts are computed
+for all rows together; only rows with a capture use the scalar move generator, for the capture sequences.
+
+For storage, positions are records of a structured array of position_dtype, which convert to and from the
+packed encoding of Board.to_bytes for all records at once.
+"""
+
+import numpy as np
+
+from pydraughts import WHITE_PLAYER, BLACK_PLAYER
+from pydraughts import ROWS, COLS
+from pydraughts.board import Board, all_rays, MASK_BITS, SQUARES_MASK, POSITION_BYTES
+from pydraughts.bitboard import BitBoard, MAN_DIRECTIONS, mask_from_indexes
+from pydraughts.move import Move, MoveList
+
+BOARD_SIZE = 2 * ROWS * COLS
+
+# piece values
+EMPTY = 0
+WHITE_MAN = 1
+WHITE_KING = 2
+BLACK_MAN = -1
+BLACK_KING = -2
+
+# value of the padding square, which rays run into when they leave the board
+OFF_BOARD = 3
+
+N_DIRECTIONS = len(all_rays)
+RAY_LENGTH = max(len(ray) for rays in all_rays.values() for ray in rays)
+
+
+def init_ray_indexes():
+    """
+    The rays of all_rays as an index array: [direction, square, k] is the k-th square from square in
+    direction, padded with the padding square BOARD_SIZE. Two extra padding squares at the end of every ray
+    keep the square behind the first piece on a ray within the array.
+    """
+    indexes = np.full((N_DIRECTIONS, BOARD_SIZE, RAY_LENGTH + 2), BOARD_SIZE, np.intp)
+    for direction, rays in all_rays.items():
+        for i, ray in enumerate(rays):
+            indexes[direction, i, : len(ray)] = ray
+    return indexes
+
+
+def init_man_directions():
+    """[player type, direction]: whether men of the player move in the direction"""
+    directions = np.zeros((2, N_DIRECTIONS), bool)
+    for player_type, player_directions in MAN_DIRECTIONS.items():
+        directions[player_type, player_directions] = True
+    return directions
+
+
+def init_quiet_moves():
+    """
+    [direction][square]: the non-capture moves from square in direction, nearest destination first. Moves
+    are immutable, so every position shares these objects.
+    """
+    return [
+        [
+            [
+                Move((i, next_index), (direction,))
+                for next_index in all_rays[direction][i]
+            ]
+            for i in range(BOARD_SIZE)
+        ]
+        for direction in range(N_DIRECTIONS)
+    ]
+
+
+ray_indexes = init_ray_indexes()
+man_directions = init_man_directions()
+quiet_moves = init_quiet_moves()
+
+
+def to_array(boards):
+    """An (N, 50) int8 array of the positions of a sequence of Board or BitBoard objects"""
+    positions = np.zeros((len(boards), BOARD_SIZE), np.int8)
+    values = {
+        (WHITE_PLAYER, False): WHITE_MAN,
+        (WHITE_PLAYER, True): WHITE_KING,
+        (BLACK_PLAYER, False): BLACK_MAN,
+        (BLACK_PLAYER, True): BLACK_KING,
+    }
+    for n, board in enumerate(boards):
+        for player_type, player_pieces in board.pieces.items():
+            for i, is_king in player_pieces.items():
+                positions[n, i] = values[(player_type, is_king)]
+    return positions
+
+
+def to_pieces(row):
+    """The pieces dict of Board of a row of a positions array"""
+    return {
+        WHITE_PLAYER: {
+            int(i): bool(row[i] == WHITE_KING) for i in np.flatnonzero(row > 0)
+        },
+        BLACK_PLAYER: {
+            int(i): bool(row[i] == BLACK_KING) for i in np.flatnonzero(row < 0)
+        },
+    }
+
+
+def to_bitboard(row):
+    """A BitBoard of a row of a positions array"""
+    return BitBoard.from_masks(
+        [
+            mask_from_indexes(np.flatnonzero(row == piece).tolist())
+            for piece in (WHITE_MAN, WHITE_KING, BLACK_MAN, BLACK_KING)
+        ]
+    )
+
+
+# a position as a record of a structured array: the masks of Board.masks and the player to move
+position_dtype = np.dtype(
+    [
+        ("white_men", "<u8"),
+        ("white_kings", "<u8"),
+        ("black_men", "<u8"),
+        ("black_kings", "<u8"),
+        ("player_type", "u1"),
+    ]
+)
+mask_fields = position_dtype.names[:4]
+
+# the packed encoding of Board.to_bytes, padded to four little endian 64 bit words
+N_WORDS = 4
+
+
+def word_offsets(k):
+    """(word, shift) of the first bit of the k-th 50 bit field of the packed encoding"""
+    return divmod(k * MASK_BITS, 64)
+
+
+def to_records(boards, player_types):
+    """A structured array of position_dtype of a sequence of Board or BitBoard objects and their players"""
+    records = np.zeros(len(boards), position_dtype)
+    for n, board in enumerate(boards):
+        records[n] = board.masks() + (player_types[n],)
+    return records
+
+
+def from_records(records):
+    """The (Board, player type) pairs of a structured array of position_dtype"""
+    return [
+        (
+            Board.from_masks(tuple(int(record[name]) for name in mask_fields)),
+            int(record["player_type"]),
+        )
+        for record in records
+    ]
+
+
+def records_to_bytes(records):
+    """The packed encoding of Board.to_bytes of every record, concatenated"""
+    words = np.zeros((len(records), N_WORDS), "<u8")
+    for k, name in enumerate(mask_fields):
+        field = records[name].astype(np.uint64)
+        word, shift = word_offsets(k)
+        words[:, word] |= field << np.uint64(shift)
+        if shift + MASK_BITS > 64:
+            words[:, word + 1] |= field >> np.uint64(64 - shift)
+
+    word, shift = word_offsets(len(mask_fields))
+    words[:, word] |= records["player_type"].astype(np.uint64) << np.uint64(shift)
+    return words.view(np.uint8)[:, :POSITION_BYTES].tobytes()
+
+
+def records_from_bytes(data):
+    """
+    A structured array of position_dtype of concatenated packed positions, as written by records_to_bytes or
+    Board.to_bytes. Data can be any bytes-like object, such as an mmap of a file with millions of positions.
+    """
+    if len(data) % POSITION_BYTES:
+        raise Exception(
+            "%d bytes are not a whole number of %d byte positions"
+            % (len(data), POSITION_BYTES)
+        )
+
+    packed = np.frombuffer(data, np.uint8).reshape(-1, POSITION_BYTES)
+    words = np.zeros((len(packed), N_WORDS * 8), np.uint8)
+    words[:, :POSITION_BYTES] = packed
+    words = words.view("<u8")
+
+    records = np.zeros(len(packed), position_dtype)
+    for k, name in enumerate(mask_fields):
+        word, shift = word_offsets(k)
+        field = words[:, word] >> np.uint64(shift)
+        if shift + MASK_BITS > 64:
+            field |= words[:, word + 1] << np.uint64(64 - shift)
+        records[name] = field & np.uint64(SQUARES_MASK)
+
+    word, shift = word_offsets(len(mask_fields))
+    records["player_type"] = words[:, word] >> np.uint64(shift) & np.uint64(1)
+    return records
+
+
+def records_to_array(records):
+    """The (N, 50) int8 positions array, see to_array, and the player types of a structured array of records"""
+    square_bits = np.arange(BOARD_SIZE, dtype=np.uint64)
+    positions = np.zeros((len(records), BOARD_SIZE), np.int8)
+    for name, value in zip(mask_fields, [WHITE_MAN, WHITE_KING, BLACK_MAN, BLACK_KING]):
+        is_set = (records[name][:, None] >> square_bits) & np.uint64(1)
+        positions += value * is_set.astype(np.int8)
+    return positions, records["player_type"].astype(np.int8)
+
+
+def array_to_records(positions, player_types):
+    """A structured array of position_dtype of an (N, 50) positions array and the player types"""
+    square_masks = np.uint64(1) << np.arange(BOARD_SIZE, dtype=np.uint64)
+    records = np.zeros(len(positions), position_dtype)
+    for name, value in zip(mask_fields, [WHITE_MAN, WHITE_KING, BLACK_MAN, BLACK_KING]):
+        records[name] = np.where(positions == value, square_masks, np.uint64(0)).sum(
+            axis=1, dtype=np.uint64
+        )
+    records["player_type"] = player_types
+    return records
+
+
+class BatchAnalysis(object):
+    """
+    The results of analyze for N positions:
+    - steps: (N, 4, 50) int8, the number of squares the piece on a square can move in a direction without
+      capturing, 0 for squares without a piece of the player to move
+    - has_capture: (N,) bool, whether the player to move has a capture, and thus only capture moves
+    - piece_counts: (N, 4) int, the number of white men, white kings, black men and black kings
+    """
+
+    def __init__(self, positions, player_types, steps, has_capture, piece_counts):
+        self.positions = positions
+        self.player_types = player_types
+        self.steps = steps
+        self.has_capture = has_capture
+        self.piece_counts = piece_counts
+
+    def non_capture_moves(self):
+        """The non-capture moves of all positions without a capture, from the steps array"""
+        all_moves = [[] for _ in range(len(self.positions))]
+        steps = np.where(self.has_capture[:, None, None], 0, self.steps)
+        indexes = np.nonzero(steps)
+        counts = steps[indexes]
+        for n, direction, i, count in zip(
+            *[index.tolist() for index in indexes], counts.tolist()
+        ):
+            all_moves[n] += quiet_moves[direction][i][:count]
+        return all_moves
+
+    def legal_moves(self):
+        """
+        The legal moves of all positions as MoveList objects. The capture moves of positions with a capture
+        are generated one by one with BitBoard.
+        """
+        all_moves = self.non_capture_moves()
+
+        # the masks of the BitBoards are computed for all rows with a capture at once
+        rows = np.flatnonzero(self.has_capture)
+        records = array_to_records(self.positions[rows], self.player_types[rows])
+        for n, record in zip(rows.tolist(), records.tolist()):
+            board = BitBoard.from_masks(record[:4])
+            all_moves[n] = board.all_legal_capture_moves(record[4])
+        return [MoveList(moves) for moves in all_moves]
+
+
+def analyze(positions, player_types):
+    """
+    Analyze an (N, 50) int8 array of positions, or a sequence of boards, with player_types to move: a
+    single player type, or one per position
+    """
+    if not isinstance(positions, np.ndarray):
+        positions = to_array(positions)
+
+    n_positions = len(positions)
+    player_types = np.broadcast_to(np.asarray(player_types, np.int8), (n_positions,))
+
+    # the pieces from the view of the player to move: own pieces positive, opponent pieces negative
+    sign = np.where(player_types == WHITE_PLAYER, 1, -1).astype(np.int8)
+    relative = np.empty((n_positions, BOARD_SIZE + 1), np.int8)
+    relative[:, :BOARD_SIZE] = positions * sign[:, None]
+    relative[:, BOARD_SIZE] = OFF_BOARD
+
+    # [n, direction, square, k]: the squares along every ray
+    rays = relative[:, ray_indexes]
+    empty = rays == EMPTY
+
+    # the number of empty squares before the first piece, or the edge, on every ray
+    runs = np.cumprod(empty[..., :RAY_LENGTH], axis=-1, dtype=np.int8).sum(
+        axis=-1, dtype=np.int8
+    )
+
+    is_man = relative[:, None, :BOARD_SIZE] == WHITE_MAN
+    is_king = relative[:, None, :BOARD_SIZE] == WHITE_KING
+    moves_forward = man_directions[player_types][:, :, None]
+
+    steps = np.where(is_king, runs, 0)
+    steps += np.where(is_man & moves_forward, np.minimum(runs, 1), 0).astype(np.int8)
+
+    # the first piece on a ray can be captured if it is of the opponent and the square behind it is empty,
+    # men can only capture an adjacent piece, in all directions
+    first = np.take_along_axis(rays, runs[..., None].astype(np.intp), axis=-1)[..., 0]
+    behind = np.take_along_axis(rays, runs[..., None].astype(np.intp) + 1, axis=-1)[
+        ..., 0
+    ]
+    captures = (first < 0) & (behind == EMPTY) & (is_king | (is_man & (runs == 0)))
+    has_capture = captures.any(axis=(1, 2))
+
+    piece_counts = np.stack(
+        [
+            (positions == WHITE_MAN).sum(axis=1),
+            (positions == WHITE_KING).sum(axis=1),
+            (positions == BLACK_MAN).sum(axis=1),
+            (positions == BLACK_KING).sum(axis=1),
+        ],
+        axis=1,
+    )
+
+    return BatchAnalysis(positions, player_types, steps, has_capture, piece_counts)
+
+
+def batch_legal_moves(positions, player_types):
+    """The legal moves of every position, see analyze"""
+    return analyze(positions, player_types).legal_moves()
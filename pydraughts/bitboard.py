@@ -0,0 +1,593 @@
+from pydraughts import BLACK_PLAYER, WHITE_PLAYER
+from pydraughts import NORTHEAST, NORTHWEST, SOUTHEAST, SOUTHWEST
+from pydraughts import ROWS, COLS, START_ROWS
+from pydraughts.board import all_directions, all_rays, pack_masks, unpack_masks
+from pydraughts.board import zobrist
+from pydraughts.utils import opposite_direction
+from pydraughts.move import Move, MoveList
+
+BOARD_SIZE = 2 * COLS * ROWS
+FULL_MASK = (1 << BOARD_SIZE) - 1
+
+# squares on which a man of the given color is crowned, see Board.king
+PROMOTION_MASK = {
+    WHITE_PLAYER: sum(1 << i for i in range(BOARD_SIZE) if i < COLS),
+    BLACK_PLAYER: sum(1 << i for i in range(BOARD_SIZE) if i > BOARD_SIZE - COLS),
+}
+
+MAN_DIRECTIONS = {
+    WHITE_PLAYER: [NORTHEAST, NORTHWEST],
+    BLACK_PLAYER: [SOUTHEAST, SOUTHWEST],
+}
+
+
+def init_shifts(directions):
+    """
+    Group the squares of each direction by the index offset to their neighbour, such that a complete mask
+    can be moved one step in that direction with a shift per group
+    """
+    shifts = {}
+    for direction, move_model in directions.items():
+        masks = {}
+        for i, next_index in enumerate(move_model):
+            if next_index is None:
+                continue
+
+            delta = next_index - i
+            masks[delta] = masks.get(delta, 0) | (1 << i)
+
+        shifts[direction] = tuple(masks.items())
+    return shifts
+
+
+direction_shifts = init_shifts(all_directions)
+
+# for every direction, the opposite direction's groups as (mask, left shift, right shift), such that a step
+# back is ((bits & mask) << left) >> right per group, without a branch on the sign of the offset
+capture_shifts = [
+    tuple(
+        (mask, max(delta, 0), max(-delta, 0))
+        for delta, mask in direction_shifts[opposite_direction[direction]]
+    )
+    for direction in all_directions
+]
+
+
+def step(bits, direction):
+    """move every square in the mask one step in direction, squares leaving the board are dropped"""
+    result = 0
+    for delta, mask in direction_shifts[direction]:
+        if delta > 0:
+            result |= (bits & mask) << delta
+        else:
+            result |= (bits & mask) >> -delta
+    return result
+
+
+def iterate_bits(bits):
+    """generator for the indexes of the set bits, lowest first"""
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+def mask_from_indexes(indexes):
+    mask = 0
+    for i in indexes:
+        mask |= 1 << i
+    return mask
+
+
+class BitBoard:
+    """
+    Board with the same interface as pydraughts.board.Board, the pieces are stored as four bitmasks over the
+    squares: men and kings for both players. The zobrist hash is the one of Board, and is updated
+    incrementally as well.
+    """
+
+    width = COLS
+    height = ROWS
+    start_rows = START_ROWS
+    size = BOARD_SIZE
+
+    def __init__(self, pieces=None):
+        self.men = [0, 0]
+        self.kings = [0, 0]
+
+        if pieces is None:
+            self.men[WHITE_PLAYER] = mask_from_indexes(
+                range(self.size - self.start_rows * self.width, self.size)
+            )
+            self.men[BLACK_PLAYER] = mask_from_indexes(
+                range(0, self.start_rows * self.width)
+            )
+            self.hash = self.compute_hash()
+        else:
+            self.hash = 0
+            for player_type, player_pieces in pieces.items():
+                for i, is_king in player_pieces.items():
+                    self.set_piece(i, player_type, is_king)
+
+    def copy(self):
+        board = BitBoard.__new__(BitBoard)
+        board.men = self.men.copy()
+        board.kings = self.kings.copy()
+        board.hash = self.hash
+        return board
+
+    def compute_hash(self):
+        """compute the zobrist hash from scratch, after that it is updated incrementally"""
+        zobrist_hash = 0
+        for player_type in (WHITE_PLAYER, BLACK_PLAYER):
+            for is_king, mask in (
+                (False, self.men[player_type]),
+                (True, self.kings[player_type]),
+            ):
+                keys = zobrist[player_type][is_king]
+                for i in iterate_bits(mask):
+                    zobrist_hash ^= keys[i]
+        return zobrist_hash
+
+    @property
+    def pieces(self):
+        """The pieces in the dict representation of Board, build on every call"""
+        return {
+            player_type: {
+                i: bool(self.kings[player_type] >> i & 1)
+                for i in iterate_bits(self.men[player_type] | self.kings[player_type])
+            }
+            for player_type in (WHITE_PLAYER, BLACK_PLAYER)
+        }
+
+    def key(self):
+        keys = ""
+        for i in range(self.size):
+            bit = 1 << i
+            if self.men[WHITE_PLAYER] & bit:
+                keys += "P"
+            elif self.kings[WHITE_PLAYER] & bit:
+                keys += "K"
+            elif self.men[BLACK_PLAYER] & bit:
+                keys += "p"
+            elif self.kings[BLACK_PLAYER] & bit:
+                keys += "k"
+            else:
+                keys += "."
+        return keys
+
+    def masks(self):
+        """The (white men, white kings, black men, black kings) bit masks, as Board.masks"""
+        return (
+            self.men[WHITE_PLAYER],
+            self.kings[WHITE_PLAYER],
+            self.men[BLACK_PLAYER],
+            self.kings[BLACK_PLAYER],
+        )
+
+    def to_bytes(self, player_type=WHITE_PLAYER):
+        """The packed encoding of Board.to_bytes"""
+        return pack_masks(self.masks(), player_type)
+
+    @classmethod
+    def from_masks(cls, masks):
+        """Create a board from the masks returned by masks()"""
+        white_men, white_kings, black_men, black_kings = masks
+        board = cls.__new__(cls)
+        board.men = [white_men, black_men]
+        board.kings = [white_kings, black_kings]
+        board.hash = board.compute_hash()
+        return board
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Create a board from the bytes returned by to_bytes, returns a (board, player type) pair"""
+        masks, player_type = unpack_masks(data)
+        return cls.from_masks(masks), player_type
+
+    def occupied(self):
+        return (
+            self.men[WHITE_PLAYER]
+            | self.kings[WHITE_PLAYER]
+            | self.men[BLACK_PLAYER]
+            | self.kings[BLACK_PLAYER]
+        )
+
+    def player_mask(self, player_type):
+        return self.men[player_type] | self.kings[player_type]
+
+    def clear(self):
+        """clear the pieces from the board"""
+        self.men = [0, 0]
+        self.kings = [0, 0]
+        self.hash = 0
+
+    def set_positions(
+        self,
+        positions_white=None,
+        positions_black=None,
+        kings_white=None,
+        kings_black=None,
+    ):
+        """clear the board and initialize the pieces at the desired locations"""
+        self.clear()
+        self.men[WHITE_PLAYER] = mask_from_indexes(positions_white or [])
+        self.kings[WHITE_PLAYER] = mask_from_indexes(kings_white or [])
+        self.men[BLACK_PLAYER] = mask_from_indexes(positions_black or [])
+        self.kings[BLACK_PLAYER] = mask_from_indexes(kings_black or [])
+        self.hash = self.compute_hash()
+
+    def all_legal_non_capture_moves(self, player_type):
+        """All legal non-capture moves for player type"""
+        empty = ~self.occupied() & FULL_MASK
+        moves = []
+
+        men = self.men[player_type]
+        for direction in MAN_DIRECTIONS[player_type]:
+            back = all_directions[opposite_direction[direction]]
+            for next_index in iterate_bits(step(men, direction) & empty):
+                moves.append(Move([back[next_index], next_index], [direction]))
+
+        for index in iterate_bits(self.kings[player_type]):
+            for direction, rays in all_rays.items():
+                for next_index in rays[index]:
+                    if not empty >> next_index & 1:
+                        break
+
+                    moves.append(Move([index, next_index], [direction]))
+
+        return moves
+
+    def capturing_men(self, player_type):
+        """Mask of the men of player type which have at least one capture, computed for all men at once"""
+        men = self.men[player_type]
+        opponent = self.player_mask(not player_type)
+        empty = ~self.occupied() & FULL_MASK
+
+        # a man can capture when, in some direction, the next square holds an opponent and the square after
+        # that is empty: step the empty squares back twice, the first time only through opponent pieces
+        capturing = 0
+        for (mask_a, left_a, right_a), (mask_b, left_b, right_b) in capture_shifts:
+            behind = ((empty & mask_a) << left_a >> right_a) | (
+                (empty & mask_b) << left_b >> right_b
+            )
+            behind &= opponent
+            capturing |= men & (
+                ((behind & mask_a) << left_a >> right_a)
+                | ((behind & mask_b) << left_b >> right_b)
+            )
+        return capturing
+
+    def has_capture_moves(self, player_type):
+        """Determine whether there are capture moves for player"""
+        if self.capturing_men(player_type):
+            return True
+
+        for index in iterate_bits(self.kings[player_type]):
+            if self.all_capture_walks(index, player_type, only_first=True):
+                return True
+
+        return False
+
+    def all_capture_walks(self, origin, player_type, only_first=False):
+        """
+        All longest capture sequences starting at origin, as (locations, directions, captures) tuples. The
+        origin counts as empty, since the piece leaves it.
+        """
+        empty = (~self.occupied() | (1 << origin)) & FULL_MASK
+        opponent = self.player_mask(not player_type)
+        is_king = bool(self.kings[player_type] >> origin & 1)
+
+        walks = []
+        self._capture_walk(
+            walks, [origin], [], [], 0, empty, opponent, is_king, only_first
+        )
+        return walks
+
+    def _capture_walk(
+        self,
+        walks,
+        locations,
+        directions,
+        captures,
+        captured,
+        empty,
+        opponent,
+        is_king,
+        only_first,
+    ):
+        index = locations[-1]
+        backward = opposite_direction[directions[-1]] if directions else None
+        is_leaf = True
+
+        for direction, move_model in all_directions.items():
+            if direction == backward:
+                continue
+
+            if is_king:
+                capture = None
+                landings = []
+                for next_index in all_rays[direction][index]:
+                    if capture is None:
+                        if empty >> next_index & 1:
+                            continue
+                        if (
+                            opponent >> next_index & 1
+                            and not captured >> next_index & 1
+                        ):
+                            capture = next_index
+                            continue
+                        break
+
+                    if not empty >> next_index & 1:
+                        break
+                    landings.append(next_index)
+            else:
+                capture = move_model[index]
+                if capture is None or captured >> capture & 1:
+                    continue
+                if not opponent >> capture & 1:
+                    continue
+
+                next_index = move_model[capture]
+                if next_index is None or not empty >> next_index & 1:
+                    continue
+                landings = [next_index]
+
+            for next_index in landings:
+                is_leaf = False
+                locations.append(next_index)
+                directions.append(direction)
+                captures.append(capture)
+                self._capture_walk(
+                    walks,
+                    locations,
+                    directions,
+                    captures,
+                    captured | (1 << capture),
+                    empty,
+                    opponent,
+                    is_king,
+                    only_first,
+                )
+                locations.pop()
+                directions.pop()
+                captures.pop()
+
+                if only_first and walks:
+                    return
+
+        if not is_leaf or not captures:
+            return
+
+        # only keep the longest walks
+        if walks and len(captures) < len(walks[0][2]):
+            return
+        if walks and len(captures) > len(walks[0][2]):
+            del walks[:]
+        walks.append((tuple(locations), tuple(directions), tuple(captures)))
+
+    def all_legal_capture_moves(self, player_type):
+        """selects capture moves which are equal to, the longest capture move"""
+        origins = self.capturing_men(player_type) | self.kings[player_type]
+
+        all_walks = []
+        for origin in iterate_bits(origins):
+            walks = self.all_capture_walks(origin, player_type)
+            if not walks:
+                continue
+
+            if all_walks and len(walks[0][2]) < len(all_walks[0][2]):
+                continue
+            if all_walks and len(walks[0][2]) > len(all_walks[0][2]):
+                all_walks = []
+            all_walks.extend(walks)
+
+        return [Move(*walk) for walk in all_walks]
+
+    def all_legal_moves(self, player_type):
+        """All legal moves for player type"""
+        all_legal_capture_moves = self.all_legal_capture_moves(player_type)
+        if all_legal_capture_moves:
+            return MoveList(all_legal_capture_moves)
+
+        return MoveList(self.all_legal_non_capture_moves(player_type))
+
+    def legal_moves(self, i, player_type, capturing=False):
+        """get all legal moves for a piece"""
+        return [
+            move for move in self.all_legal_moves(player_type) if move.locations[0] == i
+        ]
+
+    def is_legal_move(self, move, player):
+        return move in self.all_legal_moves(player)
+
+    def apply_move(self, move):
+        """
+        Apply a move, returns the masks and hash before the move which undo_move uses to take the move back
+        """
+        undo = tuple(self.men), tuple(self.kings), self.hash
+        origin_index = move.locations[0]
+        destination_index = move.locations[-1]
+        origin = 1 << origin_index
+        destination = 1 << destination_index
+
+        player_type = (
+            WHITE_PLAYER if self.player_mask(WHITE_PLAYER) & origin else BLACK_PLAYER
+        )
+        opponent_type = not player_type
+        if move.captures:
+            opponent_keys = zobrist[opponent_type]
+            opponent_kings = self.kings[opponent_type]
+            for i in move.captures:
+                self.hash ^= opponent_keys[bool(opponent_kings >> i & 1)][i]
+
+            captured = mask_from_indexes(move.captures)
+            self.men[opponent_type] &= ~captured
+            self.kings[opponent_type] &= ~captured
+
+        keys = zobrist[player_type]
+        if self.kings[player_type] & origin:
+            self.kings[player_type] ^= origin ^ destination
+            self.hash ^= keys[True][origin_index] ^ keys[True][destination_index]
+        elif destination & PROMOTION_MASK[player_type]:
+            self.men[player_type] ^= origin
+            self.kings[player_type] |= destination
+            self.hash ^= keys[False][origin_index] ^ keys[True][destination_index]
+        else:
+            self.men[player_type] ^= origin ^ destination
+            self.hash ^= keys[False][origin_index] ^ keys[False][destination_index]
+
+        return undo
+
+    def play_random_move(self, player_type, rng, prefer_promotion=False):
+        """
+        Play a random legal move in place, for fast playouts: non-capture moves are picked from the target
+        masks of the men and the rays of the kings, without creating Move objects. With prefer_promotion a
+        man is crowned whenever one can be. Returns False if player type has no legal moves.
+        """
+        capture_moves = self.all_legal_capture_moves(player_type)
+        if capture_moves:
+            self.apply_move(rng.choice(capture_moves))
+            return True
+
+        empty = ~self.occupied() & FULL_MASK
+        targets = [
+            (direction, step(self.men[player_type], direction) & empty)
+            for direction in MAN_DIRECTIONS[player_type]
+        ]
+
+        king_moves = []
+        promotions = []
+        if prefer_promotion:
+            promotions = [
+                (direction, bits & PROMOTION_MASK[player_type])
+                for direction, bits in targets
+                if bits & PROMOTION_MASK[player_type]
+            ]
+
+        if promotions:
+            targets = promotions
+        else:
+            for index in iterate_bits(self.kings[player_type]):
+                for rays in all_rays.values():
+                    for next_index in rays[index]:
+                        if not empty >> next_index & 1:
+                            break
+                        king_moves.append((index, next_index))
+
+        counts = [popcount(bits) for _, bits in targets]
+        total = sum(counts) + len(king_moves)
+        if total == 0:
+            return False
+
+        choice = rng.randrange(total)
+        for (direction, bits), count in zip(targets, counts):
+            if choice >= count:
+                choice -= count
+                continue
+
+            for next_index in iterate_bits(bits):
+                if choice == 0:
+                    break
+                choice -= 1
+
+            index = all_directions[opposite_direction[direction]][next_index]
+            destination = 1 << next_index
+            origin = 1 << index
+            keys = zobrist[player_type]
+            if destination & PROMOTION_MASK[player_type]:
+                self.men[player_type] ^= origin
+                self.kings[player_type] |= destination
+                self.hash ^= keys[False][index] ^ keys[True][next_index]
+            else:
+                self.men[player_type] ^= origin | destination
+                self.hash ^= keys[False][index] ^ keys[False][next_index]
+            return True
+
+        index, next_index = king_moves[choice]
+        self.kings[player_type] ^= (1 << index) | (1 << next_index)
+        self.hash ^= (
+            zobrist[player_type][True][index] ^ zobrist[player_type][True][next_index]
+        )
+        return True
+
+    def undo_move(self, undo):
+        """Restore the position from before the move which returned undo"""
+        self.men = list(undo[0])
+        self.kings = list(undo[1])
+        self.hash = undo[2]
+
+    def remove_piece(self, i):
+        """Remove a piece at a certain location"""
+        keep = ~(1 << i)
+        for player_type in (WHITE_PLAYER, BLACK_PLAYER):
+            if self.men[player_type] >> i & 1:
+                self.hash ^= zobrist[player_type][False][i]
+            elif self.kings[player_type] >> i & 1:
+                self.hash ^= zobrist[player_type][True][i]
+            self.men[player_type] &= keep
+            self.kings[player_type] &= keep
+
+    def set_piece(self, i, piece_color, piece_is_king):
+        """create a piece at a certain location"""
+        self.remove_piece(i)
+        if piece_is_king:
+            self.kings[piece_color] |= 1 << i
+        else:
+            self.men[piece_color] |= 1 << i
+        self.hash ^= zobrist[piece_color][piece_is_king][i]
+
+    def get_piece(self, i):
+        """Get the piece at the location"""
+        return self.get_piece_color(i), self.get_piece_is_king(i)
+
+    def get_piece_color(self, i):
+        if self.player_mask(WHITE_PLAYER) >> i & 1:
+            return WHITE_PLAYER
+        else:
+            return BLACK_PLAYER
+
+    def get_piece_is_king(self, i):
+        return bool((self.kings[WHITE_PLAYER] | self.kings[BLACK_PLAYER]) >> i & 1)
+
+    def location_is_empty(self, index):
+        return not self.occupied() >> index & 1
+
+    def is_occupied_by_me(self, index, my_color):
+        """Returns true if the location is occupied by my color"""
+        return bool(self.player_mask(my_color) >> index & 1)
+
+    def is_occupied_by_opponent(self, index, my_color):
+        """Returns true if the location is occupied by the opponent color"""
+        return bool(self.player_mask(not my_color) >> index & 1)
+
+    def is_occupied(self, index):
+        return bool(self.occupied() >> index & 1)
+
+    def is_on_board(self, i):
+        if i is None:
+            return False
+        return (i >= 0) and (i < self.size)
+
+    def get_score(self, player_type, king_multiply=2):
+        """calculate the score for player"""
+        return popcount(self.men[player_type]) + king_multiply * popcount(
+            self.kings[player_type]
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, self.__class__):
+            return self.men == other.men and self.kings == other.kings
+        else:
+            return False
+
+    def __hash__(self):
+        return self.hash
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
@@ -1,21 +1,170 @@
-from collections import OrderedDict
-
 from pydraughts import BLACK_PLAYER, WHITE_PLAYER
 from pydraughts import NORTHEAST, NORTHWEST, SOUTHEAST, SOUTHWEST
 from pydraughts import ROWS, COLS, START_ROWS
 from pydraughts.piece import Piece
-from pydraughts.utils import init_directions, opposite_direction, diagonal
-from pydraughts.move import Move
+from pydraughts.utils import init_directions, init_rays, init_zobrist
+from pydraughts.utils import opposite_direction
+from pydraughts.move import Move, MoveList
+from pydraughts.cache import get_default_move_cache
+from pydraughts.evaluation import default_evaluator
 from copy import deepcopy
 
 all_directions = init_directions(COLS, ROWS)
 white_directions = {x: all_directions[x] for x in [NORTHEAST, NORTHWEST]}
 black_directions = {x: all_directions[x] for x in [SOUTHEAST, SOUTHWEST]}
+all_rays = init_rays(all_directions)
+
+zobrist = init_zobrist(2 * COLS * ROWS)
+
+# the packed encoding of a position, see Board.to_bytes: the masks of the white men, white kings, black men and
+# black kings, 50 bits each, followed by a bit for the player to move, as a little endian integer
+MASK_BITS = 2 * COLS * ROWS
+POSITION_BYTES = (4 * MASK_BITS + 1 + 7) // 8
+SQUARES_MASK = (1 << MASK_BITS) - 1
+
+
+def pack_masks(masks, player_type):
+    """The packed encoding of (white men, white kings, black men, black kings) masks and the player to move"""
+    packed = int(player_type) << (4 * MASK_BITS)
+    for k, mask in enumerate(masks):
+        packed |= mask << (k * MASK_BITS)
+    return packed.to_bytes(POSITION_BYTES, "little")
+
 
-# dict to remember legal moves of a position for better performance
-move_tables = {WHITE_PLAYER: OrderedDict(), BLACK_PLAYER: OrderedDict()}
+def unpack_masks(data):
+    """The (white men, white kings, black men, black kings) masks and the player to move of packed bytes"""
+    if len(data) != POSITION_BYTES:
+        raise Exception(
+            "A packed position has %d bytes, got %d" % (POSITION_BYTES, len(data))
+        )
 
-MOVETABLE_SIZE = 200000
+    packed = int.from_bytes(data, "little")
+    masks = tuple(packed >> (k * MASK_BITS) & SQUARES_MASK for k in range(4))
+    return masks, packed >> (4 * MASK_BITS) & 1
+
+
+def parse_fen(fen):
+    """
+    The pieces and the player to move of a FEN string as in PDN, with squares numbered from 1, for example
+    W:W31-50:B1-20 or B:WK3,28:B19,K45. Returns a (pieces, player type) pair, pieces as in Board.
+    """
+    pieces = {WHITE_PLAYER: {}, BLACK_PLAYER: {}}
+    fields = fen.strip().strip('"').split(":")
+    player_type = BLACK_PLAYER if fields[0].strip().upper() == "B" else WHITE_PLAYER
+    for field in fields[1:]:
+        field = field.strip()
+        if not field:
+            continue
+
+        color = WHITE_PLAYER if field[0].upper() == "W" else BLACK_PLAYER
+        for square in field[1:].split(","):
+            square = square.strip().split(".")[0]
+            if not square:
+                continue
+
+            is_king = square[0].upper() == "K"
+            if is_king:
+                square = square[1:]
+            if "-" in square:
+                first, last = square.split("-")
+                squares = range(int(first), int(last) + 1)
+            else:
+                squares = [int(square)]
+
+            for number in squares:
+                if not 1 <= number <= MASK_BITS:
+                    raise Exception(
+                        "Square %d of FEN %s is not on the board" % (number, fen)
+                    )
+                pieces[color][number - 1] = is_king
+    return pieces, player_type
+
+
+def format_fen(pieces, player_type):
+    """The FEN string of pieces and the player to move, the inverse of parse_fen"""
+    fields = ["W" if player_type == WHITE_PLAYER else "B"]
+    for color, letter in ((WHITE_PLAYER, "W"), (BLACK_PLAYER, "B")):
+        fields.append(
+            letter
+            + ",".join(
+                ("K%d" if pieces[color][i] else "%d") % (i + 1)
+                for i in sorted(pieces[color])
+            )
+        )
+    return ":".join(fields)
+
+
+class Undo:
+    """
+    The information Board.undo_move needs to restore the position before a move: the captured pieces as
+    (location, is_king) pairs, the origin and destination of the moved piece, whether it was promoted and
+    the hash before the move
+    """
+
+    __slots__ = ("captures", "origin", "destination", "promoted", "hash")
+
+    def __init__(self, captures, origin, destination, promoted, zobrist_hash):
+        self.captures = captures
+        self.origin = origin
+        self.destination = destination
+        self.promoted = promoted
+        self.hash = zobrist_hash
+
+
+class Status:
+    """
+    The legal moves of a player in a position, computed once per ply: the moves, the moves grouped by their
+    origin square, whether they are captures, and whether the player has no moves left, which ends the game.
+    The first steps of the moves, indexed by (origin, next square), and the squares the moves of a piece
+    visit are built when they are first asked for. The returned lists should not be modified.
+    """
+
+    __slots__ = (
+        "hash",
+        "player_type",
+        "moves",
+        "by_origin",
+        "has_capture",
+        "terminal",
+        "sub_moves",
+        "locations",
+    )
+
+    def __init__(self, zobrist_hash, player_type, moves):
+        self.hash = zobrist_hash
+        self.player_type = player_type
+        self.moves = moves
+        self.by_origin = {}
+        for move in moves:
+            self.by_origin.setdefault(move.locations[0], []).append(move)
+
+        self.has_capture = bool(moves) and moves[0].is_capture_move()
+        self.terminal = not moves
+        self.sub_moves = None
+        self.locations = {}
+
+    def moves_from(self, i):
+        """The legal moves of the piece on square i"""
+        return self.by_origin.get(i, [])
+
+    def sub_move(self, origin, next_index):
+        """The first step of a legal move from origin to next index, or None"""
+        if self.sub_moves is None:
+            self.sub_moves = {}
+            for move in self.moves:
+                sub_move = move.split()[0]
+                self.sub_moves.setdefault(sub_move.locations[:2], sub_move)
+        return self.sub_moves.get((origin, next_index))
+
+    def locations_from(self, i):
+        """The squares the legal moves of the piece on square i visit, including i"""
+        locations = self.locations.get(i)
+        if locations is None:
+            locations = [
+                location for move in self.moves_from(i) for location in move.locations
+            ]
+            self.locations[i] = locations
+        return locations
 
 
 class Board:
@@ -24,15 +173,66 @@ class Board:
     start_rows = START_ROWS
     size = 2 * width * height
 
-    def __init__(self, pieces=None):
+    def __init__(self, pieces=None, zobrist_hash=None, move_cache=None, evaluator=None):
         self.pieces = self.new_pieces() if (pieces is None) else pieces
+        self.hash = self.compute_hash() if (zobrist_hash is None) else zobrist_hash
+
+        # cache for the legal moves, when None the default cache of the process is used
+        self.move_cache = move_cache
+
+        # running counts of [player type][is king], and the scores of the evaluator per player type
+        self.evaluator = default_evaluator if (evaluator is None) else evaluator
+        self.material, self.scores = self.compute_scores()
+
+        # the Status of the last call to status, valid as long as the hash is the same
+        self.last_status = None
 
     def copy(self):
-        new_pieces = {
+        board = Board.__new__(Board)
+        board.pieces = {
             player_type: player_pieces.copy()
             for player_type, player_pieces in self.pieces.items()
         }
-        return Board(new_pieces)
+        board.hash = self.hash
+        board.move_cache = self.move_cache
+        board.evaluator = self.evaluator
+        board.material = [self.material[0].copy(), self.material[1].copy()]
+        board.scores = self.scores.copy()
+        board.last_status = self.last_status
+        return board
+
+    def compute_hash(self):
+        """compute the zobrist hash from scratch, after that it is updated incrementally"""
+        zobrist_hash = 0
+        for player_type, player_pieces in self.pieces.items():
+            for i, is_king in player_pieces.items():
+                zobrist_hash ^= zobrist[player_type][is_king][i]
+        return zobrist_hash
+
+    def compute_scores(self):
+        """
+        compute the material counts and evaluator scores from scratch, after that they are updated
+        incrementally
+        """
+        material = [[0, 0], [0, 0]]
+        scores = [0, 0]
+        for player_type, player_pieces in self.pieces.items():
+            table = self.evaluator.table[player_type]
+            for i, is_king in player_pieces.items():
+                material[player_type][is_king] += 1
+                scores[player_type] += table[is_king][i]
+        return material, scores
+
+    def set_evaluator(self, evaluator):
+        self.evaluator = evaluator
+        self.material, self.scores = self.compute_scores()
+
+    def count_piece(self, i, piece_color, piece_is_king, sign):
+        """update the running counts and scores for a piece which is added (sign 1) or removed (sign -1)"""
+        self.material[piece_color][piece_is_king] += sign
+        self.scores[piece_color] += (
+            sign * self.evaluator.table[piece_color][piece_is_king][i]
+        )
 
     def key(self):
         keys = ""
@@ -51,6 +251,61 @@ class Board:
                 keys += "."
         return keys
 
+    @classmethod
+    def from_key(cls, key):
+        """Create a board from the string returned by key()"""
+        pieces = {WHITE_PLAYER: {}, BLACK_PLAYER: {}}
+        for i, symbol in enumerate(key):
+            if symbol == "P" or symbol == "K":
+                pieces[WHITE_PLAYER][i] = symbol == "K"
+            elif symbol == "p" or symbol == "k":
+                pieces[BLACK_PLAYER][i] = symbol == "k"
+        return cls(pieces)
+
+    def masks(self):
+        """The (white men, white kings, black men, black kings) bit masks, bit i is square i"""
+        masks = [0, 0, 0, 0]
+        for player_type, player_pieces in self.pieces.items():
+            for i, is_king in player_pieces.items():
+                masks[2 * player_type + is_king] |= 1 << i
+        return tuple(masks)
+
+    @classmethod
+    def from_masks(cls, masks):
+        """Create a board from the masks returned by masks()"""
+        pieces = {WHITE_PLAYER: {}, BLACK_PLAYER: {}}
+        for k, mask in enumerate(masks):
+            player_type, is_king = divmod(k, 2)
+            while mask:
+                lowest = mask & -mask
+                pieces[player_type][lowest.bit_length() - 1] = bool(is_king)
+                mask ^= lowest
+        return cls(pieces)
+
+    def to_bytes(self, player_type=WHITE_PLAYER):
+        """
+        The position and the player to move packed in POSITION_BYTES (26) bytes: four 50 bit masks and a bit
+        for the player, see pack_masks. Smaller and faster to build than key(), for storage and for sending
+        positions to other processes.
+        """
+        return pack_masks(self.masks(), player_type)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Create a board from the bytes returned by to_bytes, returns a (board, player type) pair"""
+        masks, player_type = unpack_masks(data)
+        return cls.from_masks(masks), player_type
+
+    def to_fen(self, player_type=WHITE_PLAYER):
+        """The position and the player to move as a FEN string, such as B:W28,K47:B5,12"""
+        return format_fen(self.pieces, player_type)
+
+    @classmethod
+    def from_fen(cls, fen):
+        """Create a board from a FEN string, returns a (board, player type) pair"""
+        pieces, player_type = parse_fen(fen)
+        return cls(pieces), player_type
+
     def new_pieces(self):
         pieces = {
             WHITE_PLAYER: {
@@ -105,11 +360,8 @@ class Board:
         moves = []
 
         if piece_is_king:
-            for direction, move_model in all_directions.items():
-                for next_index in diagonal(index, move_model):
-                    if not self.is_on_board(next_index):
-                        break
-
+            for direction, rays in all_rays.items():
+                for next_index in rays[index]:
                     if not self.location_is_empty(next_index):
                         break
 
@@ -152,15 +404,12 @@ class Board:
 
         piece_color, piece_is_king = self.get_piece(move.locations[0])
         if piece_is_king:
-            for direction, move_model in all_directions.items():
+            for direction, rays in all_rays.items():
                 if direction == opposite_of_previous_direction:
                     continue
 
                 capture = None
-                for index_new in diagonal(index, move_model):
-                    if not self.is_on_board(index_new):
-                        break
-
+                for index_new in rays[index]:
                     # if the location is occupied by me, but is not the piece itself
                     if self.is_occupied_by_me(index_new, piece_color):
                         if not index_new == move.locations[0]:
@@ -243,8 +492,7 @@ class Board:
                 return
 
         for capture_move in capture_moves:
-            new_move = move.copy()  # if len(capture_moves) > 1 else move
-            new_move.append(capture_move)
+            new_move = move.append(capture_move)
             self.blind_capture_moves(moves, new_move, depth=depth + 1)
 
     def all_blind_capture_moves(self, player_type):
@@ -258,58 +506,155 @@ class Board:
         return all_blind_capture_moves
 
     def all_legal_capture_moves(self, player_type):
-        """selects capture moves which are equal to, the longest capture move"""
-        all_blind_capture_moves = self.all_blind_capture_moves(player_type)
-
-        if not all_blind_capture_moves:
-            return []
+        """
+        selects capture moves which are equal to, the longest capture move. The sequences are searched depth
+        first on a single path, and a Move is only created for the sequences with the most captures.
+        """
+        mine = self.pieces[player_type]
+        opponent = self.pieces[not player_type]
+        captured = [False] * self.size
+        path = ([], [], [])
+        longest = []
+
+        for origin, is_king in mine.items():
+            path[0].append(origin)
+            self.longest_capture_walks(
+                longest, path, captured, origin, is_king, mine, opponent
+            )
+            path[0].pop()
 
-        # the move needs to be equal to the longest move
-        maximum_length = len(
-            max(all_blind_capture_moves, key=lambda move: len(move.captures)).captures
-        )
         return [
-            move
-            for move in all_blind_capture_moves
-            if len(move.captures) == maximum_length
+            Move(locations, directions, captures)
+            for locations, directions, captures in longest
         ]
 
+    def longest_capture_walks(
+        self, longest, path, captured, origin, is_king, mine, opponent
+    ):
+        """
+        Extends the capture walk on path, a (locations, directions, captures) tuple of lists, with every
+        possible single capture. The walks which can not be extended are kept in longest, if they have at
+        least as many captures as the walks found before. The captured pieces stay on the board until the
+        end of the move, but are marked in captured such that they can not be captured twice.
+        """
+        locations, directions, captures = path
+        index = locations[-1]
+        if directions:
+            opposite_of_previous_direction = opposite_direction[directions[-1]]
+        else:
+            opposite_of_previous_direction = None
+
+        is_extended = False
+        for direction, rays in all_rays.items():
+            if direction == opposite_of_previous_direction:
+                continue
+
+            ray = rays[index]
+            if not is_king:
+                ray = ray[:2]
+
+            capture = None
+            for index_new in ray:
+                if capture is None:
+                    if index_new in opponent:
+                        if captured[index_new]:
+                            break
+
+                        capture = index_new
+                        continue
+
+                    # men can only capture a piece right next to them
+                    if not is_king or (index_new in mine and index_new != origin):
+                        break
+
+                    continue
+
+                # the landing location should be empty, or been occupied by the selected piece
+                if index_new in opponent or (index_new in mine and index_new != origin):
+                    break
+
+                is_extended = True
+                captured[capture] = True
+                locations.append(index_new)
+                directions.append(direction)
+                captures.append(capture)
+
+                self.longest_capture_walks(
+                    longest, path, captured, origin, is_king, mine, opponent
+                )
+
+                captured[capture] = False
+                locations.pop()
+                directions.pop()
+                captures.pop()
+
+                if not is_king:
+                    break
+
+        if is_extended or not captures:
+            return
+
+        if longest and len(captures) < len(longest[0][2]):
+            return
+
+        if longest and len(captures) > len(longest[0][2]):
+            del longest[:]
+
+        longest.append((tuple(locations), tuple(directions), tuple(captures)))
+
     def legal_capture_moves(self, i, player_type):
-        all_legal_capture_moves = self.all_legal_capture_moves(player_type)
-        if not all_legal_capture_moves:
+        status = self.status(player_type)
+        if not status.has_capture:
             return []
 
-        return [move for move in all_legal_capture_moves if move.locations[0] == i]
+        # a copy, the list of the status is shared by every later call in this position
+        return list(status.moves_from(i))
 
     def legal_moves(self, piece_xy, player_type, capturing=False):
-        """get all legal moves for a piece"""
-        if self.has_capture_moves(player_type) or capturing:
-            legal_moves = self.legal_capture_moves(piece_xy, player_type)
-        else:
-            legal_moves = self.legal_non_capture_moves(piece_xy)
+        """get all legal moves for a piece, from the status of the position"""
+        status = self.status(player_type)
+        if status.has_capture or capturing:
+            return self.legal_capture_moves(piece_xy, player_type)
+
+        if piece_xy in self.pieces[player_type]:
+            return list(status.moves_from(piece_xy))
 
-        return legal_moves
+        return self.legal_non_capture_moves(piece_xy)
 
     def all_legal_moves(self, player_type):
         """All legal moves for player type"""
-        entry = move_tables[player_type].get(self.key())
+        move_cache = self.move_cache
+        if move_cache is None:
+            move_cache = get_default_move_cache()
+
+        entry = move_cache.get(self.hash, player_type)
         if entry is not None:
             return entry
 
         all_legal_capture_moves = self.all_legal_capture_moves(player_type)
 
         if all_legal_capture_moves:
-            all_legal_moves = all_legal_capture_moves
+            all_legal_moves = MoveList(all_legal_capture_moves)
         else:
-            all_legal_moves = self.all_legal_non_capture_moves(player_type)
-
-        move_tables[player_type][self.key()] = all_legal_moves
-        if len(move_tables[player_type]) > MOVETABLE_SIZE:
-            move_tables[player_type].popitem(last=False)
+            all_legal_moves = MoveList(self.all_legal_non_capture_moves(player_type))
 
+        move_cache.put(self.hash, player_type, all_legal_moves)
         return all_legal_moves
 
+    def status(self, player_type):
+        """The Status of player type in this position, the same object until the position changes"""
+        status = self.last_status
+        if (
+            status is None
+            or status.hash != self.hash
+            or status.player_type != player_type
+        ):
+            status = Status(self.hash, player_type, self.all_legal_moves(player_type))
+            self.last_status = status
+        return status
+
     def is_legal_move(self, move, player):
+        # a set lookup, since all_legal_moves returns a MoveList
         return move in self.all_legal_moves(player)
 
     def legal_move(self, i_start, i_end, player, capturing=False):
@@ -327,6 +672,12 @@ class Board:
         return legal_move is not None
 
     def legal_single_move(self, i_start, i_end, player, capturing=False):
+        if i_start in self.pieces[player]:
+            status = self.status(player)
+            if capturing and not status.has_capture:
+                return None
+            return status.sub_move(i_start, i_end)
+
         legal_moves = self.legal_moves(i_start, player, capturing=capturing)
         for legal_move in legal_moves:
             sub_move = legal_move.split()[0]
@@ -336,33 +687,71 @@ class Board:
         return None
 
     def apply_move(self, move):
-        """Apply a move"""
+        """Apply a move, returns an Undo record which undo_move uses to take the move back"""
+        zobrist_hash = self.hash
+        piece_color, was_king = self.get_piece(move.locations[0])
+        captures = tuple(
+            (capture, self.pieces[not piece_color][capture])
+            for capture in move.captures
+        )
+
         for capture in move.captures:
             self.remove_piece(capture)
 
         # in case the piece ends up at the location is started we do not have to move it
         if move.locations[-1] != move.locations[0]:
-            piece_color = self.get_piece_color(move.locations[0])
-            self.pieces[piece_color][move.locations[-1]] = self.pieces[piece_color].pop(
-                move.locations[0]
+            piece_is_king = self.pieces[piece_color].pop(move.locations[0])
+            self.pieces[piece_color][move.locations[-1]] = piece_is_king
+            self.hash ^= (
+                zobrist[piece_color][piece_is_king][move.locations[0]]
+                ^ zobrist[piece_color][piece_is_king][move.locations[-1]]
             )
+            self.count_piece(move.locations[0], piece_color, piece_is_king, -1)
+            self.count_piece(move.locations[-1], piece_color, piece_is_king, 1)
 
         [self.king(location) for location in move.locations]
 
+        promoted = self.pieces[piece_color][move.locations[-1]] and not was_king
+        return Undo(
+            captures, move.locations[0], move.locations[-1], promoted, zobrist_hash
+        )
+
+    def undo_move(self, undo):
+        """Restore the position from before the move which returned undo"""
+        piece_color = self.get_piece_color(undo.destination)
+        piece_is_king = self.pieces[piece_color].pop(undo.destination)
+        self.count_piece(undo.destination, piece_color, piece_is_king, -1)
+
+        piece_was_king = piece_is_king and not undo.promoted
+        self.pieces[piece_color][undo.origin] = piece_was_king
+        self.count_piece(undo.origin, piece_color, piece_was_king, 1)
+
+        for capture, capture_is_king in undo.captures:
+            self.pieces[not piece_color][capture] = capture_is_king
+            self.count_piece(capture, not piece_color, capture_is_king, 1)
+
+        self.hash = undo.hash
+
     def remove_piece(self, i):
         """
         Remove a piece at a certain location
         """
-        if i in self.pieces[WHITE_PLAYER]:
-            del self.pieces[WHITE_PLAYER][i]
-        else:
-            del self.pieces[BLACK_PLAYER][i]
+        piece_color = self.get_piece_color(i)
+        piece_is_king = self.pieces[piece_color].pop(i)
+        self.hash ^= zobrist[piece_color][piece_is_king][i]
+        self.count_piece(i, piece_color, piece_is_king, -1)
 
     def set_piece(self, i, piece_color, piece_is_king):
         """
         create a piece at a certain location and make king in at king positions
         """
+        if i in self.pieces[piece_color]:
+            self.hash ^= zobrist[piece_color][self.pieces[piece_color][i]][i]
+            self.count_piece(i, piece_color, self.pieces[piece_color][i], -1)
+
         self.pieces[piece_color][i] = piece_is_king
+        self.hash ^= zobrist[piece_color][piece_is_king][i]
+        self.count_piece(i, piece_color, piece_is_king, 1)
 
     def get_piece(self, i):
         """Get the piece at the location"""
@@ -422,29 +811,42 @@ class Board:
 
         if i < self.width:
             if self.get_piece_color(i) == WHITE_PLAYER:
-                self.pieces[WHITE_PLAYER][i] = True
+                self.crown(i, WHITE_PLAYER)
             return
 
         elif i > (self.size - self.width):
             if self.get_piece_color(i) == BLACK_PLAYER:
-                self.pieces[BLACK_PLAYER][i] = True
+                self.crown(i, BLACK_PLAYER)
+            return
+
+    def crown(self, i, piece_color):
+        """turn the piece at i into a king"""
+        if self.pieces[piece_color][i]:
             return
 
+        self.pieces[piece_color][i] = True
+        self.hash ^= zobrist[piece_color][False][i] ^ zobrist[piece_color][True][i]
+        self.count_piece(i, piece_color, False, -1)
+        self.count_piece(i, piece_color, True, 1)
+
     def get_score(self, player_type, king_multiply=2):
-        """calculate the score for player"""
-        return sum(
-            [
-                1 + (king_multiply - 1) * is_king
-                for i, is_king in self.pieces[player_type].items()
-            ]
-        )
+        """calculate the score for player, from the running material counts"""
+        men, kings = self.material[player_type]
+        return men + king_multiply * kings
 
-    # testing for equivalence
+    def evaluate(self, player_type):
+        """The evaluator score of player type minus that of the opponent"""
+        return self.scores[player_type] - self.scores[not player_type]
+
+    # testing for equivalence, the hashes are compared first since that is cheap
     def __eq__(self, other):
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return self.hash == other.hash and self.pieces == other.pieces
         else:
             return False
 
+    def __hash__(self):
+        return self.hash
+
     def __ne__(self, other):
         return not self.__eq__(other)
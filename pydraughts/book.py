@@ -0,0 +1,250 @@
+"""
+Opening book: statistics of the moves played from positions near the start, built from self-play games and
+stored as a sorted binary file which is searched in place. Build one with, for example:
+python -m pydraughts.book book.bin --games 200 --plies 12 --workers 4
+"""
+
+import argparse
+import mmap
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pydraughts import WHITE_PLAYER, BLACK_PLAYER
+from pydraughts.board import Board
+from pydraughts.bots import AlphaBetaBot
+from pydraughts.transposition import position_key, encode_move, decode_move
+
+MAGIC = b"PDBK"
+VERSION = 1
+
+# file header: magic, version and number of entries
+header_format = struct.Struct("<4sII")
+
+# an entry: position key, encoded move, number of games and the score of the player to move in half points,
+# the entries are sorted on key
+entry_format = struct.Struct("<QHII")
+
+
+def play_book_game(player, seed, book_plies=12, exploration=0.2, max_plies=200):
+    """
+    Play a game of player against itself. In the first book_plies plies a random move is played instead
+    with probability exploration, such that the book covers more than one line. Returns the (key, move)
+    pairs of the book plies and the winning color, None for a draw.
+    """
+    # the player draws from the generator of the game too, if it has an rng
+    rng = random.Random(seed)
+    if hasattr(player, "rng"):
+        player.rng = rng
+    board = Board()
+    played = []
+
+    player_type = WHITE_PLAYER
+    for ply in range(max_plies):
+        moves = board.all_legal_moves(player_type)
+        if not moves:
+            return played, not player_type
+
+        if ply < book_plies and rng.random() < exploration:
+            move = rng.choice(moves)
+        else:
+            player.player_type = player_type
+            player.take_action(board.copy(), None)
+            move = player.move
+            player.reset()
+
+        if ply < book_plies:
+            played.append((position_key(board, player_type), encode_move(move)))
+
+        board.apply_move(move)
+        player_type = not player_type
+
+    return played, None
+
+
+class BookBuilder(object):
+    """Collects the number of games and the score of every (position, move) pair of the book games"""
+
+    def __init__(self, player=None, book_plies=12, exploration=0.2, max_plies=200):
+        if player is None:
+            player = AlphaBetaBot(name="book", time_limit=0.05, verbose=False)
+
+        self.player = player
+        self.book_plies = book_plies
+        self.exploration = exploration
+        self.max_plies = max_plies
+        self.stats = {}  # (key, move): [games, score]
+
+    def add_game(self, played, winner):
+        """Add the (key, move) pairs of a game, the first of which is played by white"""
+        for ply, key_move in enumerate(played):
+            player_type = WHITE_PLAYER if ply % 2 == 0 else BLACK_PLAYER
+            if winner is None:
+                score = 1
+            else:
+                score = 2 if winner == player_type else 0
+
+            stats = self.stats.setdefault(key_move, [0, 0])
+            stats[0] += 1
+            stats[1] += score
+
+    def play_games(self, games, seed=0, workers=1):
+        arguments = [
+            (
+                self.player,
+                seed + game,
+                self.book_plies,
+                self.exploration,
+                self.max_plies,
+            )
+            for game in range(games)
+        ]
+        if workers <= 1:
+            results = [play_book_game(*game_arguments) for game_arguments in arguments]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(play_book_game, *zip(*arguments)))
+
+        for played, winner in results:
+            self.add_game(played, winner)
+
+    def write(self, path, min_games=1):
+        """Write the pairs played in at least min_games games, returns the number of entries"""
+        entries = sorted(
+            (key, move, games, score)
+            for (key, move), (games, score) in self.stats.items()
+            if games >= min_games
+        )
+        with open(path, "wb") as file:
+            file.write(header_format.pack(MAGIC, VERSION, len(entries)))
+            for entry in entries:
+                file.write(entry_format.pack(*entry))
+
+        return len(entries)
+
+
+class OpeningBook(object):
+    """
+    Looks up positions in a book file, which is memory mapped. The entries of a position are found with a
+    binary search on the sorted keys, without reading the file into memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.size = header_format.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception("%s is not a version %d opening book" % (path, VERSION))
+
+        self.hits = 0
+        self.misses = 0
+
+    def entry(self, index):
+        return entry_format.unpack_from(
+            self.data, header_format.size + index * entry_format.size
+        )
+
+    def key_at(self, index):
+        return struct.unpack_from(
+            "<Q", self.data, header_format.size + index * entry_format.size
+        )[0]
+
+    def entries(self, board, player_type):
+        """The (move, games, score) entries of the position, the score is in half points per game"""
+        key = position_key(board, player_type)
+
+        # the first entry with a key which is not smaller
+        low = 0
+        high = self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        moves = board.all_legal_moves(player_type)
+        result = []
+        for index in range(low, self.size):
+            entry_key, code, games, score = self.entry(index)
+            if entry_key != key:
+                break
+
+            # the key of another position may collide, so only legal moves are returned
+            move = decode_move(code, moves)
+            if move is not None:
+                result.append((move, games, score))
+
+        return result
+
+    def lookup(self, board, player_type, rng=None):
+        """
+        The book move of the position, None if it is not in the book. The most played move is returned, or
+        with a random generator a move chosen with probability proportional to its games.
+        """
+        entries = self.entries(board, player_type)
+        if not entries:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if rng is not None:
+            return rng.choices(
+                [move for move, _, _ in entries],
+                weights=[games for _, games, _ in entries],
+            )[0]
+
+        return max(entries, key=lambda entry: (entry[1], entry[2]))[0]
+
+    def __len__(self):
+        return self.size
+
+    def __getstate__(self):
+        # memory maps cannot be pickled, worker processes open the file again
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def close(self):
+        self.data.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pydraughts opening book builder")
+    parser.add_argument("path", help="book file to write")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--plies", type=int, default=12, help="book depth in plies")
+    parser.add_argument(
+        "--exploration",
+        type=float,
+        default=0.2,
+        help="probability of a random move in the book plies",
+    )
+    parser.add_argument("--min-games", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--time-limit", type=float, default=0.05, help="seconds per move of the bot"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    builder = BookBuilder(
+        AlphaBetaBot(name="book", time_limit=args.time_limit, verbose=False),
+        book_plies=args.plies,
+        exploration=args.exploration,
+    )
+    builder.play_games(args.games, seed=args.seed, workers=args.workers)
+    entries = builder.write(args.path, min_games=args.min_games)
+    print(
+        "%d entries from %d games in %.1f s"
+        % (entries, args.games, time.perf_counter() - start)
+    )
+
+
+if __name__ == "__main__":
+    main()
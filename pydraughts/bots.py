@@ -1,20 +1,842 @@
+import math
 import random
 import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from threading import Thread
+
+from pydraughts import WHITE_PLAYER, BLACK_PLAYER
+from pydraughts.board import Board
+from pydraughts.bitboard import BitBoard
+
+from pydraughts.transposition import TranspositionTable, position_key
+from pydraughts.transposition import encode_move, decode_move, NO_MOVE
+from pydraughts.transposition import EXACT, LOWER_BOUND, UPPER_BOUND, DEPTH_PREFERRED
+from pydraughts.tablebase import WIN, LOSS
+from pydraughts.evaluation import Evaluator
 
 
 class RandomWalker(object):
-    def __init__(self, name=None):
+    def __init__(self, name=None, seed=None):
         if name is None:
             name = "random_name"
 
         self.name = name
         self.player_type = None
         self.move = None
+        self.rng = random.Random(seed)
 
     def take_action(self, board, graphics, capturing=False):
         all_legal_moves = board.all_legal_moves(self.player_type)
-        i_move = random.randrange(len(all_legal_moves))
+        i_move = self.rng.randrange(len(all_legal_moves))
         self.move = all_legal_moves[i_move]
 
     def reset(self):
         self.move = None
+
+
+# the bot which searches the root moves in a worker process of a parallel search
+search_worker = None
+
+
+def init_search_worker(evaluate, tt_size_mb, tt_replacement, tablebase):
+    global search_worker
+    search_worker = AlphaBetaBot(
+        name="search_worker",
+        evaluate=evaluate,
+        tt_size_mb=tt_size_mb,
+        tt_replacement=tt_replacement,
+        tablebase=tablebase,
+    )
+
+
+def root_moves(board, player_type):
+    """
+    The legal moves in an order which does not depend on how the board was built, such that the game and
+    the worker processes can refer to a root move by its index
+    """
+    return sorted(
+        board.all_legal_moves(player_type),
+        key=lambda move: (move.locations, move.captures),
+    )
+
+
+def search_root_moves(position, move_indexes, best_index, depth, deadline):
+    """
+    Search the root moves with move_indexes, see root_moves, in the position packed by Board.to_bytes to
+    depth, in a worker process. Returns the best score, the index in move_indexes of the best move and the
+    number of nodes searched, the score is None if the deadline passed first.
+    """
+    board, player_type = Board.from_bytes(position)
+    board = search_worker.prepare_board(board)
+    all_moves = root_moves(board, player_type)
+    moves = [all_moves[index] for index in move_indexes]
+    search_worker.player_type = player_type
+    search_worker.deadline = time.perf_counter() + (deadline - time.time())
+    search_worker.nodes = 0
+
+    try:
+        score, move = search_worker.search_root(board, moves, moves[best_index], depth)
+    except SearchTimeout:
+        return None, best_index, search_worker.nodes
+
+    return score, moves.index(move), search_worker.nodes
+
+
+WIN_SCORE = 10000
+
+# scores beyond this are wins or losses, which are stored relative to the position in the table
+DECIDED_SCORE = WIN_SCORE - 1000
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget of a move is used up"""
+
+
+def score_to_table(score, ply):
+    """wins and losses are stored as distance from the stored position instead of from the root"""
+    if score > DECIDED_SCORE:
+        return score + ply
+    if score < -DECIDED_SCORE:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    if score > DECIDED_SCORE:
+        return score - ply
+    if score < -DECIDED_SCORE:
+        return score + ply
+    return score
+
+
+def heuristic_score(score):
+    """
+    An evaluation rounded to an integer and clamped to the undecided scores, such that it fits in the
+    transposition table and is not mistaken for a win or a loss
+    """
+    return max(-DECIDED_SCORE, min(DECIDED_SCORE, int(round(score))))
+
+
+def material_score(board, player_type):
+    """
+    Evaluation from the view of player type: the material difference, kings count double. Board keeps
+    running material counts, so this is O(1).
+    """
+    return board.get_score(player_type) - board.get_score(not player_type)
+
+
+class AlphaBetaBot(object):
+    """
+    Negamax alpha-beta search with iterative deepening. The search deepens until the time budget for the
+    move runs out, the move of the deepest completed iteration is played. Results are kept in a
+    transposition table of tt_size_mb megabytes, which persists between moves, set it to None to search
+    without one.
+
+    The evaluate function scores positions from the view of the player to move, by default material_score.
+    An Evaluator can be given as well, its terms are kept up to date by the board during the search. Scores
+    are rounded to integers and clamped to +-DECIDED_SCORE, so an evaluation should use a scale where a
+    point is a meaningful difference.
+
+    Given an OpeningBook, book moves are played without searching. Given a Tablebase, positions with few
+    enough pieces are not searched but looked up in the tables.
+
+    With workers > 1 the root moves are split over a pool of worker processes, every worker searches its
+    share of the moves to the same depth, and the best of their results is played.
+
+    start_ponder lets the bot search in a background thread during the turn of the opponent. It searches
+    the position after the reply predicted by the transposition table, or all replies when there is no
+    prediction, which fills the transposition table. When the predicted reply is played, the search of the
+    next move continues from the deepest completed ponder iteration. stop_ponder ends the background search.
+    """
+
+    def __init__(
+        self,
+        name=None,
+        time_limit=1.0,
+        max_depth=64,
+        evaluate=None,
+        tt_size_mb=16,
+        tt_replacement=DEPTH_PREFERRED,
+        workers=1,
+        book=None,
+        tablebase=None,
+        verbose=True,
+    ):
+        if name is None:
+            name = "alpha_beta"
+
+        self.name = name
+        self.player_type = None
+        self.move = None
+
+        self.time_limit = time_limit  # [s]
+        self.max_depth = max_depth
+        self.evaluate = material_score if (evaluate is None) else evaluate
+        if tt_size_mb is None:
+            self.table = None
+        else:
+            self.table = TranspositionTable(tt_size_mb, tt_replacement)
+
+        self.tt_size_mb = tt_size_mb
+        self.tt_replacement = tt_replacement
+        self.book = book
+        self.tablebase = tablebase
+        self.workers = workers
+        self.pool = None
+        self.verbose = verbose
+
+        self.deadline = None
+        self.nodes = 0
+        self.depth = 0
+
+        # (position key, best move, depth, whether it is final) of the predicted reply
+        self.ponder_thread = None
+        self.ponder_result = None
+        self.ponder_hits = 0
+
+    def take_action(self, board, graphics, capturing=False):
+        self.stop_ponder()
+        start_time = time.perf_counter()
+        self.deadline = start_time + self.time_limit
+        self.nodes = 0
+        self.depth = 0
+
+        board = self.prepare_board(board)
+        moves = board.all_legal_moves(self.player_type)
+        if not moves:
+            return
+
+        if self.book is not None:
+            self.move = self.book.lookup(board, self.player_type)
+            if self.move is not None:
+                return
+
+        if self.workers > 1 and len(moves) > 1:
+            best_move = self.parallel_search(board, moves)
+        else:
+            best_move = self.search(board, moves)
+
+        self.move = best_move
+        if not self.verbose:
+            return
+
+        duration = time.perf_counter() - start_time
+        print(
+            "%s: depth %d, %d nodes, %.0f nodes/s"
+            % (self.name, self.depth, self.nodes, self.nodes / max(duration, 1e-9))
+        )
+        if self.table is not None and self.pool is None:
+            print("%s: %s" % (self.name, self.table))
+
+    def prepare_board(self, board):
+        """
+        Let a Board keep the scores of the evaluator, if it is an Evaluator, such that leaf evaluations are
+        O(1)
+        """
+        if isinstance(self.evaluate, Evaluator) and isinstance(board, Board):
+            if board.evaluator is not self.evaluate:
+                board.set_evaluator(self.evaluate)
+        return board
+
+    def search(self, board, moves):
+        """Iterative deepening until the deadline, returns the best move of the deepest iteration"""
+        best_move = moves[0]
+        first_depth = 1
+
+        # continue the search of the ponder thread if it predicted the position
+        ponder_result = self.ponder_result
+        self.ponder_result = None
+        if ponder_result is not None:
+            key, move, depth, is_final = ponder_result
+            if key == position_key(board, self.player_type) and move in moves:
+                self.ponder_hits += 1
+                self.depth = depth
+                best_move = moves[moves.index(move)]
+                if is_final:
+                    return best_move
+                first_depth = depth + 1
+
+        for depth in range(first_depth, self.max_depth + 1):
+            try:
+                score, move = self.search_root(board, moves, best_move, depth)
+            except SearchTimeout:
+                break
+
+            best_move = move
+            self.depth = depth
+
+            # there is only one option, or the game is decided
+            if len(moves) == 1 or self.is_decided(score):
+                break
+
+        return best_move
+
+    def parallel_search(self, board, moves):
+        """
+        Iterative deepening with the root moves split over the worker processes. The workers receive the
+        position packed by Board.to_bytes and the indexes of their root moves, instead of Move objects. Each
+        iteration is only used if all workers completed it.
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=init_search_worker,
+                initargs=(
+                    self.evaluate,
+                    self.tt_size_mb,
+                    self.tt_replacement,
+                    self.tablebase,
+                ),
+            )
+
+        position = board.to_bytes(self.player_type)
+        deadline = time.time() + (self.deadline - time.perf_counter())
+        move_indexes = {
+            move: index
+            for index, move in enumerate(root_moves(board, self.player_type))
+        }
+        chunks = [
+            moves[i :: self.workers] for i in range(min(self.workers, len(moves)))
+        ]
+        chunk_indexes = [[move_indexes[move] for move in chunk] for chunk in chunks]
+        best_indexes = [0] * len(chunks)
+
+        best_move = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            futures = [
+                self.pool.submit(
+                    search_root_moves,
+                    position,
+                    indexes,
+                    best_index,
+                    depth,
+                    deadline,
+                )
+                for indexes, best_index in zip(chunk_indexes, best_indexes)
+            ]
+            results = [future.result() for future in futures]
+            self.nodes += sum(nodes for _, _, nodes in results)
+            if any(score is None for score, _, _ in results):
+                break
+
+            best_indexes = [index for _, index, _ in results]
+            score = None
+            for chunk, (chunk_score, index, _) in zip(chunks, results):
+                if score is None or chunk_score > score:
+                    score = chunk_score
+                    best_move = chunk[index]
+
+            self.depth = depth
+
+            if self.is_decided(score):
+                break
+
+        return best_move
+
+    def is_decided(self, score):
+        return abs(score) > DECIDED_SCORE
+
+    def start_ponder(self, board):
+        """Search in a background thread during the turn of the opponent, board is the position it moves in"""
+        self.stop_ponder()
+        self.ponder_result = None
+        self.deadline = math.inf
+        self.ponder_thread = Thread(
+            target=self.ponder, args=(self.prepare_board(board.copy()),), daemon=True
+        )
+        self.ponder_thread.start()
+
+    def stop_ponder(self):
+        if self.ponder_thread is None:
+            return
+
+        # the search raises SearchTimeout at its next check of the deadline
+        self.deadline = -math.inf
+        self.ponder_thread.join()
+        self.ponder_thread = None
+
+    def predict_reply(self, board, replies):
+        """The move of the opponent in the transposition table, if any"""
+        if self.table is None:
+            return None
+
+        entry = self.table.probe(position_key(board, not self.player_type))
+        if entry is None:
+            return None
+        return decode_move(entry[3], replies)
+
+    def ponder(self, board):
+        replies = board.all_legal_moves(not self.player_type)
+        if not replies:
+            return
+
+        reply = self.predict_reply(board, replies)
+        try:
+            if reply is not None:
+                board.apply_move(reply)
+                self.ponder_position(board)
+            else:
+                self.ponder_replies(board, replies)
+        except SearchTimeout:
+            pass
+
+    def ponder_position(self, board):
+        """Iterative deepening on the position after the predicted reply, keeping the result of every iteration"""
+        moves = board.all_legal_moves(self.player_type)
+        if not moves:
+            return
+
+        key = position_key(board, self.player_type)
+        best_move = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            score, best_move = self.search_root(board, moves, best_move, depth)
+            is_final = (
+                len(moves) == 1 or self.is_decided(score) or depth == self.max_depth
+            )
+            self.ponder_result = (key, best_move, depth, is_final)
+            if is_final:
+                return
+
+    def ponder_replies(self, board, replies):
+        """Iterative deepening on the positions after all replies, which fills the transposition table"""
+        best_indexes = [0] * len(replies)
+        for depth in range(1, self.max_depth + 1):
+            for i, reply in enumerate(replies):
+                undo = board.apply_move(reply)
+                try:
+                    moves = board.all_legal_moves(self.player_type)
+                    if moves:
+                        _, move = self.search_root(
+                            board, moves, moves[best_indexes[i]], depth
+                        )
+                        best_indexes[i] = moves.index(move)
+                finally:
+                    board.undo_move(undo)
+
+    def close(self):
+        """Stop the worker processes and the ponder thread"""
+        self.stop_ponder()
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __getstate__(self):
+        # the process pool can not be send to another process
+        state = self.__dict__.copy()
+        state["pool"] = None
+        state["ponder_thread"] = None
+        return state
+
+    def search_root(self, board, moves, best_move, depth):
+        """Search all root moves, starting with the best move of the previous iteration"""
+        ordered_moves = [best_move] + [move for move in moves if move is not best_move]
+
+        alpha = -WIN_SCORE - 1
+        beta = WIN_SCORE + 1
+        for move in ordered_moves:
+            undo = board.apply_move(move)
+            try:
+                score = -self.negamax(
+                    board, not self.player_type, depth - 1, -beta, -alpha, 1
+                )
+            finally:
+                board.undo_move(undo)
+
+            if score > alpha:
+                alpha = score
+                best_move = move
+
+        return alpha, best_move
+
+    def negamax(self, board, player_type, depth, alpha, beta, ply):
+        """The score of the position for player type, searched depth plies deep"""
+        self.nodes += 1
+        if (self.nodes & 1023) == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        moves = board.all_legal_moves(player_type)
+        if not moves:
+            return -WIN_SCORE + ply
+
+        if self.tablebase is not None and (
+            len(board.pieces[WHITE_PLAYER]) + len(board.pieces[BLACK_PLAYER])
+            <= self.tablebase.max_pieces
+        ):
+            entry = self.tablebase.probe(board, player_type)
+            if entry is not None:
+                result, plies = entry
+                if result == WIN:
+                    return WIN_SCORE - ply - plies
+                if result == LOSS:
+                    return -WIN_SCORE + ply + plies
+                return 0
+
+        # captures are forced, so the search continues until the position is quiet
+        if depth <= 0 and not moves[0].is_capture_move():
+            return heuristic_score(self.evaluate(board, player_type))
+
+        key = None
+        table_move = None
+        if self.table is not None:
+            key = position_key(board, player_type)
+            entry = self.table.probe(key)
+            if entry is not None:
+                entry_depth, score, bound, code = entry
+                score = score_from_table(score, ply)
+                if entry_depth >= depth:
+                    if bound == EXACT:
+                        return score
+                    if bound == LOWER_BOUND and score >= beta:
+                        return score
+                    if bound == UPPER_BOUND and score <= alpha:
+                        return score
+
+                table_move = decode_move(code, moves)
+
+        if table_move is not None:
+            moves = [table_move] + [move for move in moves if move is not table_move]
+
+        alpha_start = alpha
+        best_score = -WIN_SCORE - 1
+        best_move = None
+        for move in moves:
+            undo = board.apply_move(move)
+            try:
+                score = -self.negamax(
+                    board, not player_type, depth - 1, -beta, -alpha, ply + 1
+                )
+            finally:
+                board.undo_move(undo)
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+
+            if score > alpha:
+                alpha = score
+
+            if alpha >= beta:
+                break
+
+        if key is not None:
+            if best_score <= alpha_start:
+                bound = UPPER_BOUND
+            elif best_score >= beta:
+                bound = LOWER_BOUND
+            else:
+                bound = EXACT
+
+            code = NO_MOVE if bound == UPPER_BOUND else encode_move(best_move)
+            self.table.store(
+                key, max(depth, 0), score_to_table(best_score, ply), bound, code
+            )
+
+        return best_score
+
+    def reset(self):
+        self.move = None
+
+
+# playout policies of MCTSBot
+RANDOM_POLICY = "random"
+PROMOTION_POLICY = "promotion"
+
+# the bot which runs the playouts in a worker process of a parallel tree search
+mcts_worker = None
+
+
+def init_mcts_worker(bot):
+    global mcts_worker
+    mcts_worker = bot
+    mcts_worker.workers = 1
+
+
+def mcts_root_playouts(position, move_indexes, seed, deadline):
+    """
+    Build a tree in a worker process until the deadline, from the position packed by Board.to_bytes with
+    the root moves with move_indexes, see root_moves. Returns the visits and wins of the root moves and the
+    number of playouts.
+    """
+    board, player_type = BitBoard.from_bytes(position)
+    all_moves = root_moves(board, player_type)
+    moves = [all_moves[index] for index in move_indexes]
+    mcts_worker.rng = random.Random(seed)
+    mcts_worker.deadline = time.perf_counter() + (deadline - time.time())
+    mcts_worker.search(board, player_type, moves)
+    return mcts_worker.root_statistics(), mcts_worker.playouts
+
+
+class MCTSBot(object):
+    """
+    Monte Carlo tree search with UCT selection. The tree is stored in flat arrays indexed by node number,
+    the children of a node are consecutive nodes in the order of its legal moves. Every iteration descends
+    the tree on a BitBoard, expands the leaf and plays out random moves on a copy of the board, until the
+    game ends or for playout_depth plies after which the material decides. The search stops at the time
+    limit, or after max_iterations playouts if given. The most visited root move is played.
+
+    With workers > 1 every worker process builds its own tree from the root position for the same time
+    budget, and the visits and wins of their root moves are summed.
+    """
+
+    def __init__(
+        self,
+        name=None,
+        time_limit=1.0,
+        max_iterations=None,
+        exploration=1.4,
+        playout_depth=60,
+        playout_policy=RANDOM_POLICY,
+        max_nodes=1000000,
+        workers=1,
+        seed=None,
+        verbose=True,
+    ):
+        if playout_policy not in (RANDOM_POLICY, PROMOTION_POLICY):
+            raise Exception("Unknown playout policy %s" % playout_policy)
+
+        if name is None:
+            name = "mcts"
+
+        self.name = name
+        self.player_type = None
+        self.move = None
+
+        self.time_limit = time_limit  # [s]
+        self.max_iterations = max_iterations
+        self.exploration = exploration
+        self.playout_depth = playout_depth
+        self.playout_policy = playout_policy
+        self.max_nodes = max_nodes
+        self.workers = workers
+        self.pool = None
+        self.rng = random.Random(seed)
+        self.verbose = verbose
+
+        self.deadline = None
+        self.playouts = 0
+        self.clear_tree()
+
+    def clear_tree(self):
+        self.parents = array("i")
+        self.first_children = array("i")  # -1 for nodes which are not expanded
+        self.child_counts = array("i")
+        self.visits = array("i")
+        self.wins = array(
+            "d"
+        )  # for the player who made the move to the node, draws count half
+        self.node_moves = {}  # node: the legal moves of an expanded node
+
+    def add_nodes(self, parent, count):
+        self.parents.extend(array("i", [parent]) * count)
+        self.first_children.extend(array("i", [-1]) * count)
+        self.child_counts.extend(array("i", [0]) * count)
+        self.visits.extend(array("i", [0]) * count)
+        self.wins.extend(array("d", [0.0]) * count)
+
+    def take_action(self, board, graphics, capturing=False):
+        start_time = time.perf_counter()
+        self.deadline = start_time + self.time_limit
+        self.playouts = 0
+
+        moves = board.all_legal_moves(self.player_type)
+        if not moves:
+            return
+
+        if len(moves) == 1:
+            self.move = moves[0]
+            return
+
+        if self.workers > 1:
+            statistics = self.parallel_search(board, moves)
+        else:
+            self.search(BitBoard(board.pieces), self.player_type, moves)
+            statistics = self.root_statistics()
+
+        best_index = max(range(len(moves)), key=lambda k: statistics[k][0])
+        self.move = moves[best_index]
+        if not self.verbose:
+            return
+
+        duration = time.perf_counter() - start_time
+        visits, wins = statistics[best_index]
+        print(
+            "%s: %d playouts, %.0f playouts/s, %d visits of the move, win rate %.2f"
+            % (
+                self.name,
+                self.playouts,
+                self.playouts / max(duration, 1e-9),
+                visits,
+                wins / max(visits, 1),
+            )
+        )
+        if self.pool is None:
+            print("%s: %d nodes" % (self.name, len(self.visits)))
+
+    def search(self, board, player_type, moves):
+        """Build a new tree for the position, with the given root moves"""
+        self.clear_tree()
+        self.add_nodes(-1, 1)
+        self.expand(0, moves)
+
+        while self.max_iterations is None or self.playouts < self.max_iterations:
+            if (self.playouts & 15) == 0 and time.perf_counter() > self.deadline:
+                break
+
+            self.iterate(board, player_type)
+            self.playouts += 1
+
+    def root_statistics(self):
+        """The (visits, wins) of every root move"""
+        first = self.first_children[0]
+        return [
+            (self.visits[child], self.wins[child])
+            for child in range(first, first + self.child_counts[0])
+        ]
+
+    def parallel_search(self, board, moves):
+        """
+        Sum the root statistics of a tree search per worker process. The workers receive the position packed
+        by Board.to_bytes and the indexes of the root moves, as in AlphaBetaBot.parallel_search.
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=init_mcts_worker,
+                initargs=(self,),
+            )
+
+        position = board.to_bytes(self.player_type)
+        deadline = time.time() + (self.deadline - time.perf_counter())
+        indexes = {
+            move: index
+            for index, move in enumerate(root_moves(board, self.player_type))
+        }
+        move_indexes = [indexes[move] for move in moves]
+        futures = [
+            self.pool.submit(
+                mcts_root_playouts,
+                position,
+                move_indexes,
+                self.rng.getrandbits(32),
+                deadline,
+            )
+            for _ in range(self.workers)
+        ]
+
+        statistics = [(0, 0.0)] * len(moves)
+        for future in futures:
+            worker_statistics, playouts = future.result()
+            self.playouts += playouts
+            statistics = [
+                (visits + worker_visits, wins + worker_wins)
+                for (visits, wins), (worker_visits, worker_wins) in zip(
+                    statistics, worker_statistics
+                )
+            ]
+        return statistics
+
+    def expand(self, node, moves):
+        self.first_children[node] = len(self.visits)
+        self.child_counts[node] = len(moves)
+        self.node_moves[node] = moves
+        self.add_nodes(node, len(moves))
+
+    def select(self, node):
+        """The child of node with the highest upper confidence bound, unvisited children first"""
+        first = self.first_children[node]
+        visits = self.visits
+        wins = self.wins
+        scale = self.exploration * math.sqrt(math.log(max(visits[node], 1)))
+
+        best_child = first
+        best_value = -1.0
+        for child in range(first, first + self.child_counts[node]):
+            child_visits = visits[child]
+            if child_visits == 0:
+                return child
+
+            value = wins[child] / child_visits + scale / math.sqrt(child_visits)
+            if value > best_value:
+                best_value = value
+                best_child = child
+        return best_child
+
+    def iterate(self, board, player_type):
+        """One selection, expansion, playout and backpropagation, the board is restored afterwards"""
+        node = 0
+        path = [0]
+        movers = [None]
+        undos = []
+        winner = None
+        is_terminal = False
+
+        while True:
+            if self.first_children[node] < 0:
+                if len(self.visits) >= self.max_nodes:
+                    break
+
+                self.expand(node, board.all_legal_moves(player_type))
+
+            if self.child_counts[node] == 0:
+                is_terminal = True
+                winner = not player_type
+                break
+
+            child = self.select(node)
+            move = self.node_moves[node][child - self.first_children[node]]
+            undos.append(board.apply_move(move))
+            path.append(child)
+            movers.append(player_type)
+            player_type = not player_type
+
+            is_new = self.visits[child] == 0
+            node = child
+            if is_new:
+                break
+
+        if not is_terminal:
+            winner = self.playout(board, player_type)
+
+        for undo in reversed(undos):
+            board.undo_move(undo)
+
+        for node, mover in zip(path, movers):
+            self.visits[node] += 1
+            if winner is None:
+                self.wins[node] += 0.5
+            elif winner == mover:
+                self.wins[node] += 1.0
+
+    def playout(self, board, player_type):
+        """Play random moves on a copy of the board, returns the winner, None for a draw"""
+        board = board.copy()
+        rng = self.rng
+        prefer_promotion = self.playout_policy == PROMOTION_POLICY
+        for _ in range(self.playout_depth):
+            if not board.play_random_move(player_type, rng, prefer_promotion):
+                return not player_type
+            player_type = not player_type
+
+        score = board.get_score(WHITE_PLAYER) - board.get_score(BLACK_PLAYER)
+        if score > 0:
+            return WHITE_PLAYER
+        if score < 0:
+            return BLACK_PLAYER
+        return None
+
+    def close(self):
+        """Stop the worker processes"""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __getstate__(self):
+        # the process pool can not be send to another process, and the tree is rebuilt for every move
+        state = self.__dict__.copy()
+        state["pool"] = None
+        state["node_moves"] = {}
+        return state
+
+    def reset(self):
+        self.move = None
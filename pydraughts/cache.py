@@ -0,0 +1,306 @@
+import struct
+import sys
+from collections import OrderedDict
+from threading import Lock
+
+from pydraughts.move import Move
+
+# eviction policies
+LRU = "lru"
+CLOCK = "clock"
+TWO_Q = "2q"
+
+# approximate memory of a dict entry with its integer key [bytes]
+ENTRY_OVERHEAD = 100
+POINTER_SIZE = struct.calcsize("P")
+MOVE_SIZE = sys.getsizeof(Move()) + 3 * sys.getsizeof(())
+
+
+def estimate_size(moves):
+    """Approximate memory held by a list of moves [bytes]"""
+    size = sys.getsizeof(moves) + ENTRY_OVERHEAD + len(moves) * MOVE_SIZE
+    for move in moves:
+        size += POINTER_SIZE * (
+            len(move.locations) + len(move.directions) + len(move.captures)
+        )
+    return size
+
+
+class LRUPolicy(object):
+    """Evicts the least recently used entry"""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, size):
+        self.entries[key] = (value, size)
+
+    def evict(self):
+        """Remove an entry, returns its size"""
+        _, (_, size) = self.entries.popitem(last=False)
+        return size
+
+    def __contains__(self, key):
+        """Whether key is cached, unlike get this does not count as a use of the entry"""
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class ClockPolicy(object):
+    """
+    Approximates LRU with a reference bit per entry: the clock hand evicts the first entry without the bit set,
+    clearing the bits it passes. A hit only sets a bit, instead of reordering a list.
+    """
+
+    def __init__(self):
+        self.entries = {}  # key: [value, size, referenced, slot]
+        self.slots = []
+        self.free_slots = []
+        self.hand = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        entry[2] = True
+        return entry[0]
+
+    def put(self, key, value, size):
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slots[slot] = key
+        else:
+            slot = len(self.slots)
+            self.slots.append(key)
+        self.entries[key] = [value, size, False, slot]
+
+    def evict(self):
+        while True:
+            if self.hand >= len(self.slots):
+                self.hand = 0
+
+            key = self.slots[self.hand]
+            self.hand += 1
+            if key is None:
+                continue
+
+            entry = self.entries[key]
+            if entry[2]:
+                entry[2] = False
+                continue
+
+            del self.entries[key]
+            self.slots[entry[3]] = None
+            self.free_slots.append(entry[3])
+            return entry[1]
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class TwoQPolicy(object):
+    """
+    2Q: new entries enter a FIFO queue, and only entries which are requested again after they left it are
+    kept in the main LRU queue, such that a scan of positions seen once does not flush the cache. The keys
+    which left the FIFO queue are remembered in a ghost queue of bounded length.
+    """
+
+    def __init__(self, fifo_fraction=0.25, ghost_entries=100000):
+        self.fifo = OrderedDict()
+        self.main = OrderedDict()
+        self.ghosts = OrderedDict()
+        self.fifo_fraction = fifo_fraction
+        self.ghost_entries = ghost_entries
+        self.fifo_bytes = 0
+        self.total_bytes = 0
+
+    def get(self, key):
+        entry = self.main.get(key)
+        if entry is not None:
+            self.main.move_to_end(key)
+            return entry[0]
+
+        entry = self.fifo.get(key)
+        if entry is not None:
+            return entry[0]
+
+        return None
+
+    def put(self, key, value, size):
+        self.total_bytes += size
+        if key in self.ghosts:
+            del self.ghosts[key]
+            self.main[key] = (value, size)
+        else:
+            self.fifo[key] = (value, size)
+            self.fifo_bytes += size
+
+    def evict(self):
+        if self.fifo and (
+            self.fifo_bytes > self.fifo_fraction * self.total_bytes or not self.main
+        ):
+            key, (_, size) = self.fifo.popitem(last=False)
+            self.fifo_bytes -= size
+            self.ghosts[key] = None
+            if len(self.ghosts) > self.ghost_entries:
+                self.ghosts.popitem(last=False)
+        else:
+            _, (_, size) = self.main.popitem(last=False)
+
+        self.total_bytes -= size
+        return size
+
+    def __contains__(self, key):
+        return key in self.main or key in self.fifo
+
+    def __len__(self):
+        return len(self.fifo) + len(self.main)
+
+
+policies = {LRU: LRUPolicy, CLOCK: ClockPolicy, TWO_Q: TwoQPolicy}
+
+
+class MoveCache(object):
+    """
+    Cache of the legal moves of positions, keyed on the board hash and the player to move. The cache is
+    bounded by an estimate of the memory of the cached moves, is safe to use from several threads, and
+    counts its hits, misses and evictions. It can be disabled, resized or switched to another eviction
+    policy at runtime.
+    """
+
+    def __init__(self, max_bytes=128 * 2**20, policy=LRU, enabled=True):
+        if policy not in policies:
+            raise Exception("Unknown eviction policy %s" % policy)
+
+        self.lock = Lock()
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.enabled = enabled
+        self.entries = policies[policy]()
+
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, player_type):
+        """The cached moves, or None"""
+        if not self.enabled:
+            return None
+
+        with self.lock:
+            moves = self.entries.get((key << 1) | player_type)
+            if moves is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return moves
+
+    def put(self, key, player_type, moves):
+        if not self.enabled:
+            return
+
+        size = estimate_size(moves)
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            # another thread may have stored the moves in the meantime
+            if (key << 1) | player_type in self.entries:
+                return
+
+            self.entries.put((key << 1) | player_type, moves, size)
+            self.resident_bytes += size
+            self.evict_to(self.max_bytes)
+
+    def evict_to(self, max_bytes):
+        """evict entries until the resident bytes are within max_bytes, call with the lock held"""
+        while self.resident_bytes > max_bytes and len(self.entries):
+            self.resident_bytes -= self.entries.evict()
+            self.evictions += 1
+
+    def resize(self, max_bytes):
+        with self.lock:
+            self.max_bytes = max_bytes
+            self.evict_to(max_bytes)
+
+    def set_policy(self, policy):
+        """Switch the eviction policy, this empties the cache"""
+        if policy not in policies:
+            raise Exception("Unknown eviction policy %s" % policy)
+
+        with self.lock:
+            self.policy = policy
+            self.entries = policies[policy]()
+            self.resident_bytes = 0
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        """Stop using the cache, and free its memory"""
+        self.enabled = False
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.entries = policies[self.policy]()
+            self.resident_bytes = 0
+
+    def reset_counters(self):
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "policy": self.policy,
+                "entries": len(self.entries),
+                "resident_bytes": self.resident_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __str__(self):
+        stats = self.stats()
+        return (
+            "move cache (%(policy)s): %(entries)d entries, %(resident_bytes)d of %(max_bytes)d bytes, "
+            "%(hits)d hits, %(misses)d misses, %(evictions)d evictions" % stats
+        )
+
+
+# the cache used by boards which are not given one, there is one per process
+default_move_cache = MoveCache()
+
+
+def get_default_move_cache():
+    return default_move_cache
+
+
+def set_default_move_cache(move_cache):
+    """Replace the cache of this process, None disables caching for boards without their own cache"""
+    global default_move_cache
+    if move_cache is None:
+        move_cache = MoveCache(enabled=False)
+    default_move_cache = move_cache
@@ -0,0 +1,112 @@
+"""
+Evaluation terms which a Board keeps up to date while pieces are set, moved, crowned and removed. Every term
+is a table with a value per player, piece type and square: when a piece appears on a square its value is
+added to the running score of its player, and when it leaves the value is subtracted again. Evaluating a
+position is then a subtraction of the two running scores.
+"""
+
+from pydraughts import WHITE_PLAYER, BLACK_PLAYER
+from pydraughts import ROWS, COLS
+
+BOARD_SIZE = 2 * ROWS * COLS
+
+MAN_VALUE = 100
+KING_VALUE = 300
+
+
+def square_coords(i):
+    """The (x, y) coordinates of a square, as in graphics.list_to_matrix_coords"""
+    y = i // COLS
+    x = 2 * (i % COLS) + ((y % 2) == 0)
+    return x, y
+
+
+def new_table():
+    """A table of zeros, indexed as [player type][is king][square]"""
+    return [[[0] * BOARD_SIZE for _ in range(2)] for _ in range(2)]
+
+
+def material_table(man_value=MAN_VALUE, king_value=KING_VALUE):
+    table = new_table()
+    for player_type in (WHITE_PLAYER, BLACK_PLAYER):
+        table[player_type][False] = [man_value] * BOARD_SIZE
+        table[player_type][True] = [king_value] * BOARD_SIZE
+    return table
+
+
+def advancement_table(value_per_row=2):
+    """men are worth more the closer they get to the row where they are crowned"""
+    table = new_table()
+    for i in range(BOARD_SIZE):
+        _, y = square_coords(i)
+        table[WHITE_PLAYER][False][i] = value_per_row * (2 * ROWS - 1 - y)
+        table[BLACK_PLAYER][False][i] = value_per_row * y
+    return table
+
+
+def centre_table(value_per_square=1):
+    """pieces are worth more the closer they are to the centre of the board"""
+    table = new_table()
+    for i in range(BOARD_SIZE):
+        x, y = square_coords(i)
+        value = value_per_square * (
+            (COLS - 1 - int(abs(x - COLS + 0.5)))
+            + (ROWS - 1 - int(abs(y - ROWS + 0.5)))
+        )
+        for player_type in (WHITE_PLAYER, BLACK_PLAYER):
+            table[player_type][False][i] = value
+            table[player_type][True][i] = value
+    return table
+
+
+class Evaluator(object):
+    """
+    A weighted sum of per square terms. A Board with this evaluator keeps the sum for both players up to
+    date, such that evaluating a position is O(1). Bots can add their own terms with add_term, boards which
+    use the evaluator pick up the change when their scores are computed again with Board.set_evaluator.
+
+    An evaluator can be used as the evaluate function of AlphaBetaBot: evaluator(board, player_type).
+    """
+
+    def __init__(self, material=True, advancement=True, centre=True):
+        self.terms = []
+        self.table = new_table()
+        if material:
+            self.add_term("material", material_table())
+        if advancement:
+            self.add_term("advancement", advancement_table())
+        if centre:
+            self.add_term("centre", centre_table())
+
+    def add_term(self, name, table, weight=1):
+        """Add a [player type][is king][square] table, multiplied by weight"""
+        self.terms.append((name, table, weight))
+        for player_type in (WHITE_PLAYER, BLACK_PLAYER):
+            for is_king in (False, True):
+                for i in range(BOARD_SIZE):
+                    self.table[player_type][is_king][i] += (
+                        weight * table[player_type][is_king][i]
+                    )
+
+    def compute_score(self, board, player_type):
+        """The sum of the terms for the pieces of player type, from scratch"""
+        table = self.table[player_type]
+        return sum(
+            table[is_king][i] for i, is_king in board.pieces[player_type].items()
+        )
+
+    def evaluate(self, board, player_type):
+        """The score of player type minus the score of the opponent"""
+        if getattr(board, "evaluator", None) is self:
+            return board.scores[player_type] - board.scores[not player_type]
+
+        # the board keeps the scores of another evaluator
+        return self.compute_score(board, player_type) - self.compute_score(
+            board, not player_type
+        )
+
+    def __call__(self, board, player_type):
+        return self.evaluate(board, player_type)
+
+
+default_evaluator = Evaluator()
@@ -12,6 +12,12 @@ from pydraughts.board import Board
 class Game:
     """
     The main game control.
+
+    execution sets how the players compute their moves, see turn.executions. It is one execution for both
+    players, or a dict with an execution per player type. By default the players think in a new thread for
+    every move, or inline when do_multi_thread is False. Players in a worker thread or worker process are
+    cancelled when their clock runs out, or after move_time_limit seconds, and a fallback move is played.
+    With ponder, bots which support it keep thinking during the turn of their opponent.
     """
 
     def __init__(
@@ -21,6 +27,9 @@ class Game:
         board=None,
         time_limit=20.0,
         do_multi_thread=True,
+        execution=None,
+        move_time_limit=None,
+        ponder=False,
     ):
         self.graphics = Graphics()
         self.board = Board() if (board is None) else board
@@ -41,9 +50,18 @@ class Game:
 
         self.next_turn = {WHITE_PLAYER: BLACK_PLAYER, BLACK_PLAYER: WHITE_PLAYER}
 
+        if not isinstance(execution, dict):
+            execution = {WHITE_PLAYER: execution, BLACK_PLAYER: execution}
+
         self.action = {
-            WHITE_PLAYER: Turn(player1, self.do_multi_thread),
-            BLACK_PLAYER: Turn(player2, self.do_multi_thread),
+            player_type: Turn(
+                player,
+                self.do_multi_thread,
+                execution=execution.get(player_type),
+                move_time_limit=move_time_limit,
+                ponder=ponder,
+            )
+            for player_type, player in self.player.items()
         }
 
         self.time = {
@@ -64,10 +82,12 @@ class Game:
     def setup(self):
         """Draws the window and board at the beginning of the game"""
         self.graphics.setup_window()
+        for action in self.action.values():
+            action.open()
 
     def take_turn(self):
         action = self.action[self.turn]
-        action.take(self.board, self.graphics, self.turn)
+        action.take(self.board, self.graphics, self.turn, self.time[self.turn])
         self.time_current[self.turn] = self.time[self.turn] - action.duration
 
         if action.move is not None:
@@ -76,6 +96,7 @@ class Game:
             self.time[self.turn] -= action.duration
             self.board.apply_move(move)
             self.moves.append(move)
+            action.start_ponder(self.board, self.turn)
             self.end_turn()
 
             action.clean()
@@ -108,6 +129,8 @@ class Game:
 
     def terminate_game(self):
         """Quits the program and ends the game."""
+        for action in self.action.values():
+            action.close()
         pygame.quit()
         sys.exit()
 
@@ -115,8 +138,4 @@ class Game:
         """
         Checks to see if a player has run out of moves or pieces. If so, then return True. Else return False.
         """
-        for i in self.board.pieces[self.turn]:
-            if self.board.legal_moves(i, self.turn):
-                return False
-
-        return True
+        return self.board.status(self.turn).terminal
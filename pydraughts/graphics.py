@@ -26,6 +26,7 @@ from pydraughts import (
 from pydraughts import BOARD_IMAGE
 import os
 import pygame
+from collections import OrderedDict
 
 
 def list_to_matrix_coords(i):
@@ -80,6 +81,13 @@ def pixel_coords(board_coords, do_center=True):
 
 
 class Graphics:
+    """
+    Draws the game. The board background, with the square numbers and the header labels, and the piece
+    sprites are rendered once, text surfaces are cached by string. Every frame the state of each dark
+    square (highlight, move circle and piece) and each header text is compared with the previous frame, and
+    only the squares and texts which changed are redrawn and sent to the display.
+    """
+
     caption = "pypydraughts"
     icon_file = os.path.join("resources", "checkers.png")
 
@@ -93,7 +101,6 @@ class Graphics:
         # we need to load icon before set_mode
         # self.setup_window()
         self.screen = pygame.display.set_mode((self.window_width, self.window_height))
-        self.screen.fill(COLOR_BLACK_PLAYER)
 
         # this should not be here!
         self.move_history = None
@@ -114,21 +121,24 @@ class Graphics:
         pygame.init()
         self.font = pygame.font.Font("freesansbold.ttf", 18)
 
-        text_surface_obj = self.font.render(
-            "white", True, COLOR_LIGHT_SQUARE, COLOR_BLACK_PLAYER
-        )
-        text_rect_obj = text_surface_obj.get_rect()
-        text_rect_obj.top = HEADER_TOP + MARGIN
-        text_rect_obj.left = MARGIN
-        self.screen.blit(text_surface_obj, text_rect_obj)
-
-        text_surface_obj = self.font.render(
-            "black", True, COLOR_LIGHT_SQUARE, COLOR_BLACK_PLAYER
-        )
-        text_rect_obj = text_surface_obj.get_rect()
-        text_rect_obj.top = HEADER_TOP + MARGIN
-        text_rect_obj.left = HEADER_LEFT + BOARD_WIDTH + MARGIN
-        self.screen.blit(text_surface_obj, text_rect_obj)
+        # the rendered texts, least recently used first. The clocks render a new text every second, so only
+        # the last text_cache_size texts are kept
+        self.text_cache = OrderedDict()
+        self.text_cache_size = 64
+        self.background = self.render_background()
+        self.piece_sprites = {
+            (player_type, is_king): self.render_piece_sprite(player_type, is_king)
+            for player_type in (WHITE_PLAYER, BLACK_PLAYER)
+            for is_king in (False, True)
+        }
+        self.circle_sprites = {}
+
+        # what was drawn in the previous frame: the state of every dark square, the texts by position, and
+        # the rectangles which were drawn outside update_display
+        self.square_states = {}
+        self.texts = {}
+        self.dirty_rects = []
+        self.invalidate()
 
     def setup_window(self):
         """
@@ -141,97 +151,203 @@ class Graphics:
         icon = pygame.image.load(self.icon_file)
         pygame.display.set_icon(icon)
 
-    def update_display(self, board):
-        """
-        This updates the current display.
-        """
-        # We can either draw the background from and image, of render it on each update
+    def invalidate(self):
+        """Redraw and update the complete window on the next frame"""
+        self.screen.blit(self.background, (0, 0))
+        self.square_states = {}
+        self.texts = {}
+        self.dirty_rects = [self.screen.get_rect()]
+
+    def render_text(
+        self,
+        message,
+        text_color=COLOR_LIGHT_SQUARE,
+        background_color=COLOR_BLACK_PLAYER,
+    ):
+        """The surface of a text, cached per string and colors"""
+        key = (message, text_color, background_color)
+        surface = self.text_cache.get(key)
+        if surface is not None:
+            self.text_cache.move_to_end(key)
+            return surface
+
+        surface = self.font.render(message, True, text_color, background_color)
+        self.text_cache[key] = surface
+        if len(self.text_cache) > self.text_cache_size:
+            self.text_cache.popitem(last=False)
+        return surface
+
+    def render_background(self):
+        """The window without pieces, highlights or changing texts"""
+        background = pygame.Surface((self.window_width, self.window_height))
+        background.fill(COLOR_BLACK_PLAYER)
+
         if self.board_image is not None:
-            self.screen.blit(self.board_image, (HEADER_LEFT, HEADER_TOP))
+            background.blit(self.board_image, (HEADER_LEFT, HEADER_TOP))
         else:
-            self.draw_board_squares(board)
+            for x in range(2 * COLS):
+                for y in range(2 * ROWS):
+                    color = COLOR_DARK_SQUARE if (x + y) % 2 else COLOR_LIGHT_SQUARE
+                    self.draw_board_square(x, y, color, surface=background)
+
+        background.blit(self.render_text("white"), (MARGIN, HEADER_TOP + MARGIN))
+        background.blit(
+            self.render_text("black"),
+            (HEADER_LEFT + BOARD_WIDTH + MARGIN, HEADER_TOP + MARGIN),
+        )
+        return background
 
-        # highlight move history
-        if self.move_history:
-            self.highlight_squares(
-                self.move_history[-1].locations,
-                self.move_history[-1].locations[0],
-                color=HIGH2,
+    def render_piece_sprite(self, color, is_king):
+        """A piece on a transparent square"""
+        sprite = pygame.Surface(
+            (self.square_width, self.square_height), pygame.SRCALPHA
+        )
+        center = (self.square_width // 2, self.square_height // 2)
+        if color == WHITE_PLAYER:
+            edge_color = COLOR_BLACK_PLAYER
+            fill_color = COLOR_WHITE_PLAYER
+        else:
+            edge_color = COLOR_BLACK_PLAYER
+            fill_color = COLOR_BLACK_PLAYER
+
+        pygame.draw.circle(sprite, fill_color, center, int(self.piece_size))
+        pygame.draw.circle(sprite, edge_color, center, int(self.piece_size), 3)
+        if is_king:
+            pygame.draw.circle(
+                sprite,
+                GOLD,
+                center,
+                int(self.piece_size // 1.7),
+                int(self.piece_size // 4),
+            )
+        return sprite
+
+    def circle_sprite(self, color):
+        sprite = self.circle_sprites.get(color)
+        if sprite is None:
+            sprite = pygame.Surface(
+                (self.square_width, self.square_height), pygame.SRCALPHA
+            )
+            pygame.draw.circle(
+                sprite,
+                color,
+                (self.square_width // 2, self.square_height // 2),
+                int(self.piece_size // 2),
             )
+            self.circle_sprites[color] = sprite
+        return sprite
 
+    def frame_square_states(self, board):
+        """The (highlight color, circle color, piece) of every dark square which is not plain"""
+        states = {}
+        if self.move_history:
+            for i in self.move_history[-1].locations:
+                states[i] = (HIGH2, None, None)
+
+        if (self.legal_moves is not None) and (self.selected_piece is not None):
+            for i in list(self.legal_moves) + [self.selected_piece]:
+                states[i] = (states.get(i, (None,))[0], HIGH, None)
+
+        for player_type, player_pieces in board.pieces.items():
+            for i, is_king in player_pieces.items():
+                highlight, circle, _ = states.get(i, (None, None, None))
+                states[i] = (highlight, circle, (player_type, is_king))
+        return states
+
+    def frame_texts(self, board):
+        """The texts of the headers, by their (left, top) position"""
+        texts = {}
         if self.time:
             for player_type, player_time in self.time.items():
-                message = time_to_str(player_time)
                 left = (player_type == BLACK_PLAYER) * (
                     HEADER_LEFT + BOARD_WIDTH
                 ) + MARGIN
-                self.draw_message(
-                    message, left=left, top=HEADER_TOP + MARGIN + LINE_HEIGHT
+                texts[(left, HEADER_TOP + MARGIN + LINE_HEIGHT)] = time_to_str(
+                    player_time
                 )
 
-        white_score = board.get_score(WHITE_PLAYER)
-        black_score = board.get_score(BLACK_PLAYER)
-        white_lead = white_score - black_score
-        black_lead = black_score - white_score
-
-        self.draw_message(
-            str(white_lead), left=MARGIN, top=HEADER_TOP + MARGIN + 2 * LINE_HEIGHT
-        )
-        self.draw_message(
-            str(black_lead),
-            left=HEADER_LEFT + BOARD_WIDTH + MARGIN,
-            top=HEADER_TOP + MARGIN + 2 * LINE_HEIGHT,
-        )
+        white_lead = board.get_score(WHITE_PLAYER) - board.get_score(BLACK_PLAYER)
+        top = HEADER_TOP + MARGIN + 2 * LINE_HEIGHT
+        texts[(MARGIN, top)] = str(white_lead)
+        texts[(HEADER_LEFT + BOARD_WIDTH + MARGIN, top)] = str(-white_lead)
+        return texts
 
-        if (self.legal_moves is not None) and (self.selected_piece is not None):
-            self.highlight_squares(
-                self.legal_moves, self.selected_piece, shape="circle"
-            )
+    def update_display(self, board):
+        """
+        This updates the current display, only the squares and texts which changed are redrawn.
+        """
+        states = self.frame_square_states(board)
+        for i in set(states) | set(self.square_states):
+            state = states.get(i)
+            if state != self.square_states.get(i):
+                self.dirty_rects.append(self.draw_square_state(i, state))
+        self.square_states = states
+
+        texts = self.frame_texts(board)
+        for position in set(texts) | set(self.texts):
+            message = texts.get(position)
+            previous = self.texts.get(position)
+            if message == previous:
+                continue
 
-        self.draw_board_pieces(board)
+            if previous is not None:
+                rect = self.render_text(previous).get_rect(topleft=position)
+                self.screen.blit(self.background, rect, rect)
+                self.dirty_rects.append(rect)
+            if message is not None:
+                self.dirty_rects.append(
+                    self.draw_message(message, left=position[0], top=position[1])
+                )
+        self.texts = texts
 
-        pygame.display.update()
+        if self.dirty_rects:
+            pygame.display.update(self.dirty_rects)
+            self.dirty_rects = []
         self.clock.tick(self.fps)
 
+    def draw_square_state(self, i, state):
+        """Draw a dark square from the background up, returns its rectangle"""
+        x, y = list_to_matrix_coords(i)
+        position = tuple(map(int, pixel_coords((x, y), do_center=False)))
+        rect = pygame.Rect(position, (self.square_width, self.square_height))
+        self.screen.blit(self.background, rect, rect)
+        if state is None:
+            return rect
+
+        highlight, circle, piece = state
+        if highlight is not None:
+            self.draw_board_square(x, y, highlight)
+        if circle is not None:
+            self.screen.blit(self.circle_sprite(circle), position)
+        if piece is not None:
+            self.screen.blit(self.piece_sprites[piece], position)
+        return rect
+
     def draw_board_squares(self, board):
         """
         Takes a board object and draws all of its squares to the display
         """
-        for x in range(2 * board.width):
-            for y in range(2 * board.height):
-                if (x + y) % 2:
-                    self.draw_board_square(x, y, COLOR_DARK_SQUARE)
-                else:
-                    self.draw_board_square(x, y, COLOR_LIGHT_SQUARE)
-
-    def draw_board_square(self, x, y, color):
-        """draw a square on the board"""
-        text_surface_obj = None
-        if (x + y) % 2:
-            i = matrix_to_list_coords((x, y))
-            text_surface_obj = self.font.render(
-                "%d" % i, True, COLOR_LIGHT_SQUARE, color
-            )
+        self.invalidate()
 
+    def draw_board_square(self, x, y, color, surface=None):
+        """draw a square on the board"""
+        surface = self.screen if (surface is None) else surface
+        position = tuple(map(int, pixel_coords((x, y), do_center=False)))
         pygame.draw.rect(
-            self.screen,
-            color,
-            tuple(map(int, pixel_coords((x, y), do_center=False)))
-            + (self.square_width, self.square_height),
+            surface, color, position + (self.square_width, self.square_height)
         )
 
-        if text_surface_obj is not None:
-            self.screen.blit(
-                text_surface_obj, tuple(map(int, pixel_coords((x, y), do_center=False)))
+        if (x + y) % 2:
+            i = matrix_to_list_coords((x, y))
+            surface.blit(
+                self.render_text("%d" % i, COLOR_LIGHT_SQUARE, color), position
             )
 
     def draw_board_circle(self, x, y, color):
         """Draw a circle on the board"""
-        pygame.draw.circle(
-            self.screen,
-            color,
-            tuple(map(int, pixel_coords((x, y)))),
-            int(self.piece_size // 2),
+        self.screen.blit(
+            self.circle_sprite(color),
+            tuple(map(int, pixel_coords((x, y), do_center=False))),
         )
 
     def draw_board_pieces(self, board):
@@ -242,40 +358,13 @@ class Graphics:
             for i in player_pieces:
                 xy = list_to_matrix_coords(i)
                 self.draw_board_piece(xy[0], xy[1], player, player_pieces[i])
-                continue
 
     def draw_board_piece(self, x, y, color, is_king):
-        if color == WHITE_PLAYER:
-            edge_color = COLOR_BLACK_PLAYER
-            fill_color = COLOR_WHITE_PLAYER
-        else:
-            edge_color = COLOR_BLACK_PLAYER
-            fill_color = COLOR_BLACK_PLAYER
-
-        pygame.draw.circle(
-            self.screen,
-            fill_color,
-            tuple(map(int, pixel_coords((x, y)))),
-            int(self.piece_size),
+        self.screen.blit(
+            self.piece_sprites[(color, is_king)],
+            tuple(map(int, pixel_coords((x, y), do_center=False))),
         )
 
-        pygame.draw.circle(
-            self.screen,
-            edge_color,
-            tuple(map(int, pixel_coords((x, y)))),
-            int(self.piece_size),
-            3,
-        )
-
-        if is_king:
-            pygame.draw.circle(
-                self.screen,
-                GOLD,
-                tuple(map(int, pixel_coords((x, y)))),
-                int(self.piece_size // 1.7),
-                int(self.piece_size // 4),
-            )
-
     def highlight_squares(self, indexes, origin=None, color=None, shape="square"):
         """
                 Squares is a list of board coordinates.
@@ -307,9 +396,9 @@ class Graphics:
         center=None,
     ):
         """
-        Draws message to the screen.
+        Draws message to the screen, the next update_display sends it to the display. Returns its rectangle.
         """
-        text_surface_obj = self.font.render(message, True, text_color, background_color)
+        text_surface_obj = self.render_text(message, text_color, background_color)
         text_rect_obj = text_surface_obj.get_rect()
 
         if top is not None:
@@ -322,9 +411,5 @@ class Graphics:
             text_rect_obj.center = center
 
         self.screen.blit(text_surface_obj, text_rect_obj)
-
-        # self.message = True
-        # self.font_obj = pygame.font.Font('freesansbold.ttf', 44)
-        # self.text_surface_obj = self.font_obj.render(message, True, HIGH, COLOR_DARK_SQUARE)
-        # self.text_rect_obj = self.text_surface_obj.get_rect()
-        # self.text_rect_obj.center = (self.window_width // 2, self.window_height // 2)
+        self.dirty_rects.append(text_rect_obj)
+        return text_rect_obj
@@ -2,7 +2,7 @@ import os
 
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
 import pygame
-from pygame.locals import QUIT, MOUSEBUTTONDOWN
+from pygame.locals import QUIT, MOUSEBUTTONDOWN, MOUSEMOTION
 
 # from pygame.piece import Piece
 from pydraughts.move import Move
@@ -10,7 +10,7 @@ from pydraughts.graphics import board_coords
 
 
 class HumanPlayer(object):
-    def __init__(self, name=None):
+    def __init__(self, name=None, event_timeout=100):
         if name is None:
             name = "random_name"
 
@@ -20,92 +20,119 @@ class HumanPlayer(object):
         self.move = None
         self.capturing = False
         self.graphics = None
+        self.event_timeout = event_timeout  # [ms]
+        self.hovered_square = None
 
     def take_action(self, board, graphics, capturing=False):
         """
         The event loop. This is where events are triggered
         (like a mouse click) and then effect the game state.
+
+        The loop blocks until an event arrives, or event_timeout milliseconds have passed, instead of polling
+        the mouse. The highlights are only recomputed when the hovered square or the selection changes.
         """
         self.graphics = graphics
-        # self.selected_piece = None
+        self.hovered_square = board_coords(tuple(map(int, pygame.mouse.get_pos())))
+        self.update_highlights(board, graphics)
         while True:
-            mouse_pos = tuple(map(int, pygame.mouse.get_pos()))
-            mouse_pos = board_coords(mouse_pos)
-
-            if (self.selected_piece is None) and (mouse_pos is not None):
-                if board.is_occupied(mouse_pos):
-                    # self.selected_piece = mouse_pos
-                    if board.is_occupied_by_me(mouse_pos, self.player_type):
-                        self.highlight_moves(board, graphics, mouse_pos)
-
-            elif self.selected_piece is not None:
-                self.highlight_moves(board, graphics, self.selected_piece)
-
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    print("Human player received quit event")
+            event = pygame.event.wait(self.event_timeout)
+            if event.type == QUIT:
+                print("Human player received quit event")
+                return
+
+            if event.type == MOUSEMOTION:
+                mouse_pos = board_coords(tuple(map(int, event.pos)))
+                if mouse_pos != self.hovered_square:
+                    self.hovered_square = mouse_pos
+                    self.update_highlights(board, graphics)
+
+            elif event.type == MOUSEBUTTONDOWN:
+                mouse_pos = board_coords(tuple(map(int, event.pos)))
+                self.hovered_square = mouse_pos
+                if self.click(board, graphics, mouse_pos):
                     return
 
-                if event.type == MOUSEBUTTONDOWN:
-                    # click outside of the squares
-                    if mouse_pos is None:
-                        continue
-
-                    # upon selecting the same piece, deselect
-                    if self.selected_piece == mouse_pos and not self.capturing:
-                        self.selected_piece = None
-                        continue
-
-                    # upon selecting another piece, update
-                    if (
-                        board.is_occupied_by_me(mouse_pos, self.player_type)
-                        and not self.capturing
-                    ):
-                        self.selected_piece = mouse_pos
-                        continue
-
-                    # upon selecting an empty square, determine move
-                    if self.selected_piece is not None:
-                        if board.is_legal_single_move(
-                            self.selected_piece, mouse_pos, self.player_type
-                        ):
-                            sub_move = board.legal_single_move(
-                                self.selected_piece, mouse_pos, self.player_type
-                            )
-
-                            # if not a capture move we are done
-                            if not sub_move.is_capture_move():
-                                self.move = sub_move
-                                return
-
-                            # otherwise check if there is a next move available
-                            board.apply_move(sub_move)
-                            self.selected_piece = mouse_pos
-
-                            capture_moves = board.legal_capture_moves(
-                                self.selected_piece, self.player_type
-                            )
-
-                            if self.move is None:
-                                self.move = sub_move
-                            else:
-                                self.move.append(sub_move)
-
-                            if len(capture_moves) == 0:
-                                return
-
-                            graphics.update_display(
-                                board
-                            )  # TODO: what to do with this?
-                            self.capturing = True
+                self.update_highlights(board, graphics)
+
+    def click(self, board, graphics, mouse_pos):
+        """Handle a click on a square, returns True when the move is complete"""
+        # click outside of the squares
+        if mouse_pos is None:
+            return False
+
+        # upon selecting the same piece, deselect
+        if self.selected_piece == mouse_pos and not self.capturing:
+            self.selected_piece = None
+            return False
+
+        # upon selecting another piece, update
+        if board.is_occupied_by_me(mouse_pos, self.player_type) and not self.capturing:
+            self.selected_piece = mouse_pos
+            return False
+
+        # upon selecting an empty square, determine move
+        if self.selected_piece is None:
+            return False
+
+        sub_move = self.legal_single_move(board, self.selected_piece, mouse_pos)
+        if sub_move is None:
+            return False
+
+        # if not a capture move we are done
+        if not sub_move.is_capture_move():
+            self.move = sub_move
+            return True
+
+        # otherwise check if there is a next move available
+        board.apply_move(sub_move)
+        self.selected_piece = mouse_pos
+        self.capturing = True
+
+        capture_moves = self.legal_moves(board, self.selected_piece)
+
+        if self.move is None:
+            self.move = sub_move
+        else:
+            self.move = self.move.append(sub_move)
+
+        if len(capture_moves) == 0:
+            return True
+
+        graphics.update_display(board)  # TODO: what to do with this?
+        return False
+
+    def update_highlights(self, board, graphics):
+        """Highlight the moves of the selected piece, or otherwise of the hovered piece of the player"""
+        if self.selected_piece is not None:
+            self.highlight_moves(board, graphics, self.selected_piece)
+        elif (self.hovered_square is not None) and board.is_occupied_by_me(
+            self.hovered_square, self.player_type
+        ):
+            self.highlight_moves(board, graphics, self.hovered_square)
+
+    def legal_moves(self, board, location):
+        """
+        The legal moves of the piece on location, from the status of the board. The status is computed once
+        per position, not for every frame. While capturing only further captures are allowed.
+        """
+        status = board.status(self.player_type)
+        if self.capturing and not status.has_capture:
+            return []
+        return status.moves_from(location)
+
+    def legal_single_move(self, board, origin, destination):
+        """The first step of a legal move of the piece on origin which ends on destination, if any"""
+        status = board.status(self.player_type)
+        if self.capturing and not status.has_capture:
+            return None
+        return status.sub_move(origin, destination)
 
     def highlight_moves(self, board, graphics, location):
-        legal_moves = board.legal_moves(
-            location, self.player_type, capturing=self.capturing
-        )
-        graphics.legal_moves = [
-            location for move in legal_moves for location in move.locations
-        ]
+        status = board.status(self.player_type)
+        if self.capturing and not status.has_capture:
+            graphics.legal_moves = []
+        else:
+            graphics.legal_moves = status.locations_from(location)
         graphics.selected_piece = location
 
     def reset(self):
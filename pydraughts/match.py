@@ -0,0 +1,295 @@
+"""
+Headless matches between bots, without graphics. Run for example:
+python -m pydraughts.match random alphabeta --games 1000 --workers 4 --output results.jsonl
+"""
+
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pydraughts import WHITE_PLAYER, BLACK_PLAYER
+from pydraughts.board import Board
+from pydraughts.bots import RandomWalker, AlphaBetaBot, MCTSBot
+from pydraughts.book import OpeningBook
+
+PLAYER1 = "player1"
+PLAYER2 = "player2"
+DRAW = "draw"
+
+result_fields = [
+    "game",
+    "seed",
+    "white",
+    "black",
+    "winner",
+    "reason",
+    "plies",
+    "white_time_mean",
+    "white_time_max",
+    "black_time_mean",
+    "black_time_max",
+]
+
+
+def play_game(white, black, seed, max_plies=300, max_quiet_plies=50, board=None):
+    """
+    Play a single game between two bots, returns the winning color (None for a draw), the reason the game
+    ended, the number of plies and the duration of every move per color. The game is a draw after
+    max_plies, or after max_quiet_plies without a capture or a move by a man.
+    """
+    board = Board() if (board is None) else board
+    players = {WHITE_PLAYER: white, BLACK_PLAYER: black}
+
+    # bots with an rng draw from a generator of the game, such that a game only depends on its seed
+    rng = random.Random(seed)
+    for player in players.values():
+        if hasattr(player, "rng"):
+            player.rng = rng
+
+    white.player_type = WHITE_PLAYER
+    black.player_type = BLACK_PLAYER
+    move_times = {WHITE_PLAYER: [], BLACK_PLAYER: []}
+
+    turn = WHITE_PLAYER
+    quiet_plies = 0
+    for ply in range(max_plies):
+        legal_moves = board.all_legal_moves(turn)
+        if not legal_moves:
+            return not turn, "no moves", ply, move_times
+
+        player = players[turn]
+        start = time.perf_counter()
+        player.take_action(board.copy(), None)
+        move_times[turn].append(time.perf_counter() - start)
+
+        move = player.move
+        player.reset()
+        if move is None or move not in legal_moves:
+            return not turn, "illegal move", ply, move_times
+
+        if move.is_capture_move() or not board.get_piece_is_king(move.locations[0]):
+            quiet_plies = 0
+        else:
+            quiet_plies += 1
+
+        board.apply_move(move)
+        turn = not turn
+
+        if quiet_plies >= max_quiet_plies:
+            return None, "no progress", ply + 1, move_times
+
+    return None, "max plies", max_plies, move_times
+
+
+# the bots of the match in a worker process, set once by init_match_worker
+match_players = None
+
+
+def init_match_worker(player1, player2):
+    global match_players
+    match_players = {PLAYER1: player1, PLAYER2: player2}
+
+
+def run_game(game, seed, player1_is_white, max_plies, max_quiet_plies):
+    """Play game number game of the match, returns the result as a dict with the result_fields"""
+    if player1_is_white:
+        white, black = PLAYER1, PLAYER2
+    else:
+        white, black = PLAYER2, PLAYER1
+
+    winner_color, reason, plies, move_times = play_game(
+        match_players[white],
+        match_players[black],
+        seed,
+        max_plies=max_plies,
+        max_quiet_plies=max_quiet_plies,
+    )
+
+    if winner_color is None:
+        winner = DRAW
+    elif winner_color == WHITE_PLAYER:
+        winner = white
+    else:
+        winner = black
+
+    result = {
+        "game": game,
+        "seed": seed,
+        "white": white,
+        "black": black,
+        "winner": winner,
+        "reason": reason,
+        "plies": plies,
+    }
+    for color, name in [(WHITE_PLAYER, "white"), (BLACK_PLAYER, "black")]:
+        times = move_times[color]
+        result[name + "_time_mean"] = sum(times) / len(times) if times else 0.0
+        result[name + "_time_max"] = max(times) if times else 0.0
+
+    return result
+
+
+class ResultWriter(object):
+    """Writes results to a JSONL or CSV file as they come in"""
+
+    def __init__(self, file, output_format="jsonl"):
+        if output_format not in ("jsonl", "csv"):
+            raise Exception("Unknown output format %s" % output_format)
+
+        self.file = file
+        self.output_format = output_format
+        self.csv_writer = None
+        if output_format == "csv":
+            self.csv_writer = csv.DictWriter(file, fieldnames=result_fields)
+            self.csv_writer.writeheader()
+
+    def write(self, result):
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(result)
+        else:
+            self.file.write(json.dumps(result) + "\n")
+        self.file.flush()
+
+
+class MatchRunner(object):
+    """
+    Plays a match of many games between two bots with the take_action/reset interface, without graphics.
+    The players switch colors every game, every game has its own seed, and games can be played in parallel
+    in worker processes. The results are streamed to a writer while the match runs.
+    """
+
+    def __init__(
+        self,
+        player1,
+        player2,
+        games=100,
+        seed=0,
+        workers=1,
+        max_plies=300,
+        max_quiet_plies=50,
+    ):
+        self.player1 = player1
+        self.player2 = player2
+        self.games = games
+        self.seed = seed
+        self.workers = workers
+        self.max_plies = max_plies
+        self.max_quiet_plies = max_quiet_plies
+
+        self.score = {PLAYER1: 0, PLAYER2: 0, DRAW: 0}
+
+    def game_arguments(self):
+        for game in range(self.games):
+            yield (
+                game,
+                self.seed + game,
+                game % 2 == 0,
+                self.max_plies,
+                self.max_quiet_plies,
+            )
+
+    def results(self):
+        """generator for the results of the games, in the order in which they finish"""
+        if self.workers <= 1:
+            init_match_worker(self.player1, self.player2)
+            for arguments in self.game_arguments():
+                yield run_game(*arguments)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_match_worker,
+            initargs=(self.player1, self.player2),
+        ) as pool:
+            futures = [
+                pool.submit(run_game, *arguments) for arguments in self.game_arguments()
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def run(self, writer=None):
+        """Play the match, returns the number of wins per player and the number of draws"""
+        self.score = {PLAYER1: 0, PLAYER2: 0, DRAW: 0}
+        for result in self.results():
+            self.score[result["winner"]] += 1
+            if writer is not None:
+                writer.write(result)
+
+        return self.score
+
+
+bot_types = {
+    "random": RandomWalker,
+    "alphabeta": AlphaBetaBot,
+    "mcts": MCTSBot,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pydraughts headless bot matches")
+    parser.add_argument("player1", choices=list(bot_types))
+    parser.add_argument("player2", choices=list(bot_types))
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-plies", type=int, default=300)
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=0.1,
+        help="seconds per move of searching bots",
+    )
+    parser.add_argument(
+        "--output", default=None, help="a .jsonl or .csv file, default stdout"
+    )
+    parser.add_argument(
+        "--book", default=None, help="opening book file for searching bots"
+    )
+    args = parser.parse_args()
+
+    book = None if args.book is None else OpeningBook(args.book)
+
+    players = []
+    for name in [args.player1, args.player2]:
+        if name == "alphabeta":
+            players.append(
+                AlphaBetaBot(
+                    name=name, time_limit=args.time_limit, book=book, verbose=False
+                )
+            )
+        elif name == "mcts":
+            players.append(
+                MCTSBot(name=name, time_limit=args.time_limit, verbose=False)
+            )
+        else:
+            players.append(bot_types[name](name=name))
+
+    runner = MatchRunner(
+        players[0],
+        players[1],
+        games=args.games,
+        seed=args.seed,
+        workers=args.workers,
+        max_plies=args.max_plies,
+    )
+
+    output_format = "csv" if (args.output or "").endswith(".csv") else "jsonl"
+    if args.output is None:
+        score = runner.run(ResultWriter(sys.stdout, output_format))
+    else:
+        with open(args.output, "w", newline="") as file:
+            score = runner.run(ResultWriter(file, output_format))
+
+    print(
+        "%s: %d, %s: %d, draws: %d"
+        % (args.player1, score[PLAYER1], args.player2, score[PLAYER2], score[DRAW]),
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,45 @@
 class Move(object):
+    """
+    An immutable move: the visited locations, the direction of every step and the captured pieces, stored
+    as tuples of small ints. Moves are hashable, such that legal moves can be looked up in sets.
+    """
+
+    __slots__ = ("locations", "directions", "captures", "hash")
+
     def __init__(self, locations=None, directions=None, captures=None):
         if locations is None:
-            locations = []
+            locations = ()
 
         if captures is None:
-            captures = []
+            captures = ()
 
         if directions is None:
-            directions = []
+            directions = ()
 
-        if isinstance(directions, str):
-            directions = [directions]
+        if isinstance(directions, (str, int)):
+            directions = (directions,)
 
         if isinstance(captures, int):
-            captures = [captures]
+            captures = (captures,)
+
+        object.__setattr__(self, "locations", tuple(locations))
+        object.__setattr__(self, "directions", tuple(directions))
+        object.__setattr__(self, "captures", tuple(captures))
+        object.__setattr__(self, "hash", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Move is immutable, cannot set %s" % name)
 
-        self.locations = locations
-        self.directions = directions
-        self.captures = captures
+    def __reduce__(self):
+        return Move, (self.locations, self.directions, self.captures)
 
     def is_capture_move(self):
         return len(self.captures) > 0
 
     def append(self, other_move):
+        """Returns a new move: this move followed by other_move"""
         if len(self.locations) == 0:
-            self.locations.extend(other_move.locations)
-            self.directions.extend(other_move.directions)
-            self.captures.extend(other_move.captures)
-            return
+            return other_move.copy()
 
         if self.locations[-1] != other_move.locations[0]:
             raise Exception(
@@ -35,9 +47,11 @@ class Move(object):
                 % (self.locations[-1], other_move.locations[0])
             )
 
-        self.locations.extend(other_move.locations[1:])
-        self.directions.extend(other_move.directions)
-        self.captures.extend(other_move.captures)
+        return Move(
+            self.locations + other_move.locations[1:],
+            self.directions + other_move.directions,
+            self.captures + other_move.captures,
+        )
 
     def split(self):
         """split a move into a list of sub moves"""
@@ -45,10 +59,10 @@ class Move(object):
         for i, (loc_start, loc_end) in enumerate(
             zip(self.locations, self.locations[1:])
         ):
-            captures = [self.captures[i]] if self.captures else None
-            directions = [self.directions[i]] if self.directions else None
+            captures = (self.captures[i],) if self.captures else None
+            directions = (self.directions[i],) if self.directions else None
 
-            move = Move([loc_start, loc_end], directions, captures)
+            move = Move((loc_start, loc_end), directions, captures)
             moves.append(move)
         return moves
 
@@ -56,31 +70,87 @@ class Move(object):
         return len(self.locations) == 0
 
     def copy(self):
-        return Move(self.locations.copy(), self.directions.copy(), self.captures.copy())
+        # moves are immutable, so a copy can share the tuples
+        return Move(self.locations, self.directions, self.captures)
+
+    def encode(self):
+        """
+        Encode the move as a single integer: the number of steps (5 bits), a capture flag and the origin (6
+        bits), followed by 14 bits per step for the location, direction and captured location.
+        """
+        code = max(len(self.locations) - 1, 0) | (self.is_capture_move() << 5)
+        code |= (self.locations[0] if self.locations else 0) << 6
+        shift = 12
+        for i, location in enumerate(self.locations[1:]):
+            direction = self.directions[i] if self.directions else 0
+            capture = self.captures[i] if self.captures else 0
+            code |= (location | (direction << 6) | (capture << 8)) << shift
+            shift += 14
+        return code
+
+    @classmethod
+    def decode(cls, code):
+        """Create a move from the integer returned by encode"""
+        n_steps = code & 31
+        is_capture_move = (code >> 5) & 1
+        locations = [(code >> 6) & 63]
+        directions = []
+        captures = []
+        code >>= 12
+        for _ in range(n_steps):
+            locations.append(code & 63)
+            directions.append((code >> 6) & 3)
+            captures.append((code >> 8) & 63)
+            code >>= 14
+
+        return cls(locations, directions, captures if is_capture_move else None)
 
     def get_notation(self):
-        my_string = ""
         sep = "-" if (not self.is_capture_move()) else "x"
-        for i, location in enumerate(self.locations):
-            if i < (len(self.locations) - 1):
-                my_string += "%d%s" % (location, sep)
-            else:
-                my_string += "%d" % (location)
-        return my_string
+        return sep.join("%d" % location for location in self.locations)
 
     def __str__(self):
         # for debugging:
         return "move: locations %s, directions: %s, captures: %s" % (
-            self.locations,
-            self.directions,
-            self.captures,
+            list(self.locations),
+            list(self.directions),
+            list(self.captures),
         )
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return (
+                self.locations == other.locations
+                and self.captures == other.captures
+                and self.directions == other.directions
+            )
         else:
             return False
 
     def __ne__(self, other):
         return not self.__eq__(other)
+
+    def __hash__(self):
+        if self.hash is None:
+            object.__setattr__(
+                self, "hash", hash((self.locations, self.directions, self.captures))
+            )
+        return self.hash
+
+
+class MoveList(list):
+    """
+    A list of moves which answers membership tests with a set, built on the first test. The list should not
+    be modified after that.
+    """
+
+    __slots__ = ("move_set",)
+
+    def __init__(self, moves=()):
+        super().__init__(moves)
+        self.move_set = None
+
+    def __contains__(self, move):
+        if self.move_set is None:
+            self.move_set = frozenset(self)
+        return move in self.move_set
@@ -0,0 +1,907 @@
+"""
+Reading and writing games in Portable Draughts Notation. Games are streamed: the reader is a generator which
+parses one game at a time from a file or a memory-mapped buffer, and large files can be parsed by several
+processes, each taking a part of the file which starts and ends at a game boundary. For example:
+python -m pydraughts.pdn games.pdn --workers 4
+
+Squares are numbered 1 to 50 as in PDN, which are the board indexes plus one. Moves are checked against the
+legal moves while a game is read, unless validate is False.
+"""
+
+import argparse
+import mmap
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pydraughts import WHITE_PLAYER, BLACK_PLAYER
+from pydraughts import COLS
+from pydraughts.board import Board, all_directions, all_rays, parse_fen
+from pydraughts.bitboard import BOARD_SIZE, MAN_DIRECTIONS, PROMOTION_MASK
+from pydraughts.bitboard import iterate_bits
+from pydraughts.utils import opposite_direction
+from pydraughts.move import Move
+
+WHITE_WINS = "2-0"
+BLACK_WINS = "0-2"
+DRAW = "1-1"
+UNKNOWN = "*"
+
+# results as written by other programs, and the results they stand for
+results = {
+    WHITE_WINS: WHITE_WINS,
+    BLACK_WINS: BLACK_WINS,
+    DRAW: DRAW,
+    UNKNOWN: UNKNOWN,
+    "1-0": WHITE_WINS,
+    "0-1": BLACK_WINS,
+    "1/2-1/2": DRAW,
+    "0-0": UNKNOWN,
+}
+
+# the tags every game starts with, in this order
+seven_tag_roster = ["Event", "Site", "Date", "Round", "White", "Black", "Result"]
+
+tag_pattern = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+token_pattern = re.compile(
+    r"\{[^}]*\}"  # comment
+    r"|\d+\.(?:\.\.)?"  # move number
+    r"|(1/2-1/2|2-0|0-2|1-1|1-0|0-1|0-0|\*)(?![\d\-x])"  # result
+    r"|(\d+(?:[\-x]\d+)+)"  # move
+    r"|\$\d+"  # numeric annotation
+)
+move_pattern = re.compile(r"\d+(?:[\-x]\d+)+")
+square_separator = re.compile(r"[\-x]")
+
+# the squares of the notations parse_notation has seen, most moves of a game database are in here. The cache
+# is emptied when it holds NOTATION_CACHE_SIZE notations.
+notation_locations = {}
+NOTATION_CACHE_SIZE = 100000
+
+# the Move of every capture sequence the validator has seen, emptied as the notation cache
+capture_moves = {}
+
+# the parts of a file which the workers of the parallel reader parse are about this many bytes
+CHUNK_SIZE = 4 * 2**20
+
+
+# The validator keeps its position in a padded layout of the bits: a gap bit follows every 10 squares, such
+# that a step in a direction is a shift by the same number of bits on every square, and a step off the board
+# lands on a gap bit or outside the board. See Validator.
+ROW_PAIR = 2 * COLS
+
+
+def padded_bit(index):
+    return index + index // ROW_PAIR
+
+
+padded_bits = [padded_bit(i) for i in range(BOARD_SIZE)]
+PADDED_MASK = sum(1 << bit for bit in padded_bits)
+padded_indexes = {bit: i for i, bit in enumerate(padded_bits)}
+
+
+def init_padded_shifts():
+    """[direction]: the bit offset of a step in direction, which is the same for every square"""
+    shifts = {}
+    for direction, neighbours in all_directions.items():
+        offsets = {
+            padded_bits[j] - padded_bits[i]
+            for i, j in enumerate(neighbours)
+            if j is not None
+        }
+        if len(offsets) != 1:
+            raise Exception("The padded layout does not fit direction %s" % direction)
+        shifts[direction] = offsets.pop()
+    return shifts
+
+
+padded_shifts = init_padded_shifts()
+SHORT_SHIFT, LONG_SHIFT = sorted({abs(shift) for shift in padded_shifts.values()})
+SHORT_JUMP, LONG_JUMP = 2 * SHORT_SHIFT, 2 * LONG_SHIFT
+
+# [direction][bit]: the neighbouring bit in direction, or None, and the bits of the ray in direction
+padded_neighbours = {
+    direction: {
+        padded_bits[i]: (None if j is None else padded_bits[j])
+        for i, j in enumerate(neighbours)
+    }
+    for direction, neighbours in all_directions.items()
+}
+padded_rays = {
+    direction: {
+        padded_bits[i]: [padded_bits[j] for j in ray] for i, ray in enumerate(rays)
+    }
+    for direction, rays in all_rays.items()
+}
+# [direction][bit]: the mask of the ray, the first piece on it is its lowest or highest bit
+padded_ray_masks = {
+    direction: {
+        bit: sum(1 << next_bit for next_bit in ray) for bit, ray in rays.items()
+    }
+    for direction, rays in padded_rays.items()
+}
+# [bit]: the (direction, captured bit, landing bit, captured mask, landing mask) of every jump of a man, and
+# the (direction, ray) of a king
+man_jumps = {
+    bit: [
+        (
+            direction,
+            neighbours[bit],
+            neighbours[neighbours[bit]],
+            1 << neighbours[bit],
+            1 << neighbours[neighbours[bit]],
+        )
+        for direction, neighbours in padded_neighbours.items()
+        if neighbours[bit] is not None and neighbours[neighbours[bit]] is not None
+    ]
+    for bit in padded_bits
+}
+king_rays = {
+    bit: [(direction, rays[bit]) for direction, rays in padded_rays.items()]
+    for bit in padded_bits
+}
+padded_promotion = {
+    player_type: sum(1 << padded_bits[i] for i in iterate_bits(mask))
+    for player_type, mask in PROMOTION_MASK.items()
+}
+
+
+def init_quiet_steps():
+    """
+    [(origin, destination)]: (padded mask of the origin, of the destination, of the squares up to and
+    including the destination, [player type]: whether a man may make the move, shared Move) for every move
+    without a capture, the squares are board indexes. Moves are immutable, so games can share them.
+    """
+    quiet_steps = {}
+    for direction, rays in all_rays.items():
+        for origin, ray in enumerate(rays):
+            for k, destination in enumerate(ray):
+                path = sum(1 << padded_bits[i] for i in ray[: k + 1])
+                is_man_step = [
+                    k == 0 and direction in MAN_DIRECTIONS[player_type]
+                    for player_type in (WHITE_PLAYER, BLACK_PLAYER)
+                ]
+                move = Move((origin, destination), (direction,))
+                quiet_steps[origin, destination] = (
+                    1 << padded_bits[origin],
+                    1 << padded_bits[destination],
+                    path,
+                    is_man_step,
+                    move,
+                )
+    return quiet_steps
+
+
+quiet_steps = init_quiet_steps()
+
+
+def padded_masks(pieces):
+    """The [player type] masks of the men and of the kings of pieces, in the padded layout"""
+    men = [0, 0]
+    kings = [0, 0]
+    for color, player_pieces in pieces.items():
+        for i, is_king in player_pieces.items():
+            if is_king:
+                kings[color] |= 1 << padded_bits[i]
+            else:
+                men[color] |= 1 << padded_bits[i]
+    return men, kings
+
+
+start_men, start_kings = padded_masks(Board().pieces)
+
+
+class PDNGame(object):
+    """
+    A game: its tags, the notation of every move as written in the move text, the result, and the moves as
+    Move objects when the game was checked against the legal moves.
+    """
+
+    def __init__(self, tags=None, notation=None, result=UNKNOWN, moves=None):
+        self.tags = {} if (tags is None) else tags
+        self.notation = [] if (notation is None) else notation
+        self.result = result
+        self.moves = moves
+
+    @classmethod
+    def from_moves(
+        cls,
+        moves,
+        result=UNKNOWN,
+        tags=None,
+        board=None,
+        player_type=WHITE_PLAYER,
+        full_captures=False,
+    ):
+        """A game of Move objects, played from board, or the start position"""
+        tags = {} if (tags is None) else dict(tags)
+        pieces = None
+        if board is not None:
+            tags["FEN"] = board.to_fen(player_type)
+            pieces = board.pieces
+        notation = format_moves(moves, pieces, player_type, full_captures)
+        return cls(tags, notation, result, list(moves))
+
+    def locations(self):
+        """The board indexes of the squares in the notation of every move"""
+        return [parse_notation(notation) for notation in self.notation]
+
+    def start(self):
+        """The start position as a (Board, player type) pair, from the FEN tag if there is one"""
+        if "FEN" not in self.tags:
+            return Board(), WHITE_PLAYER
+
+        return Board.from_fen(self.tags["FEN"])
+
+    def replay(self):
+        """Yields (board, player type, move) for every move, the board is the position before the move"""
+        if self.moves is None:
+            raise Exception("The game was read without validation, it has no moves")
+
+        board, player_type = self.start()
+        for move in self.moves:
+            yield board, player_type, move
+            board.apply_move(move)
+            player_type = not player_type
+
+    def __len__(self):
+        return len(self.notation)
+
+
+class Validator(object):
+    """
+    Replays a game to turn the squares of the move text into legal Move objects. The position is kept as
+    masks of men and kings in the padded layout, where the men which can capture are found with a few
+    shifts. A move without captures is checked on its squares, a capture is looked up among the longest
+    capture sequences, which are walked as in BitBoard.
+    """
+
+    def __init__(self, pieces, player_type):
+        if pieces is None:
+            self.men, self.kings = list(start_men), list(start_kings)
+        else:
+            self.men, self.kings = padded_masks(pieces)
+        self.player_type = player_type
+
+    def move(self, locations):
+        """The legal Move with locations for the player to move, applied to the board. None if illegal."""
+        player_type = self.player_type
+        all_men = self.men
+        all_kings = self.kings
+        men = all_men[player_type]
+        kings = all_kings[player_type]
+        opponent = all_men[not player_type] | all_kings[not player_type]
+        empty = PADDED_MASK & ~(men | kings | opponent)
+
+        capturing = self.capturing(men, kings, empty, opponent)
+        if capturing:
+            move = self.capture_move(locations, capturing, empty, opponent)
+            if move is not None:
+                self.player_type = not player_type
+            return move
+
+        step = quiet_steps.get(locations)
+        if step is None:
+            return None
+
+        origin_bit, destination_bit, path, is_man_step, move = step
+        if path & ~empty:
+            return None
+
+        if kings & origin_bit:
+            all_kings[player_type] ^= origin_bit | destination_bit
+        elif men & origin_bit and is_man_step[player_type]:
+            all_men[player_type] ^= origin_bit
+            if destination_bit & padded_promotion[player_type]:
+                all_kings[player_type] |= destination_bit
+            else:
+                all_men[player_type] |= destination_bit
+        else:
+            return None
+
+        self.player_type = not player_type
+        return move
+
+    def capturing(self, men, kings, empty, opponent):
+        """The mask of the pieces which can capture"""
+        # a man can capture when a neighbour holds an opponent, and the square behind it is empty
+        capturing = men & (
+            (opponent >> SHORT_SHIFT & empty >> SHORT_JUMP)
+            | (opponent >> LONG_SHIFT & empty >> LONG_JUMP)
+            | (opponent << SHORT_SHIFT & empty << SHORT_JUMP)
+            | (opponent << LONG_SHIFT & empty << LONG_JUMP)
+        )
+        if kings:
+            capturing |= self.capturing_kings(kings, empty, opponent)
+        return capturing
+
+    def capturing_kings(self, kings, empty, opponent):
+        """The mask of the kings which can capture"""
+        # a king can capture when the first piece on a ray is an opponent, and the square behind it is empty
+        occupied = PADDED_MASK & ~empty
+        king_bits = list(iterate_bits(kings))
+        capturing = 0
+        for direction, shift in padded_shifts.items():
+            jumpable = opponent & (empty >> shift if shift > 0 else empty << -shift)
+            if not jumpable:
+                continue
+            ray_masks = padded_ray_masks[direction]
+            for bit in king_bits:
+                blockers = occupied & ray_masks[bit]
+                if not blockers:
+                    continue
+                if shift > 0:
+                    blockers &= -blockers
+                if jumpable >> (blockers.bit_length() - 1) & 1:
+                    capturing |= 1 << bit
+        return capturing
+
+    def capture_move(self, locations, origins, empty, opponent):
+        # a quiet move with a square off the board is not in quiet_steps, a capture is checked here
+        if min(locations) < 0 or max(locations) >= BOARD_SIZE:
+            return None
+
+        start = padded_bits[locations[0]]
+        end = padded_bits[locations[-1]]
+        if not origins >> start & 1:
+            return None
+
+        walks = self.longest_walks(origins, empty, opponent)
+        for walk in walks:
+            walk_bits = walk[0]
+            if walk_bits[0] != start or walk_bits[-1] != end:
+                continue
+            if len(locations) == 2 or walk_bits == tuple(
+                padded_bits[i] for i in locations
+            ):
+                return self.apply_capture(walk)
+
+        return None
+
+    def longest_walks(self, origins, empty, opponent):
+        """The longest capture sequences of the pieces in origins, as in BitBoard.all_legal_capture_moves"""
+        kings = self.kings[self.player_type]
+        walks = []
+        for origin in iterate_bits(origins):
+            walk_empty = empty | (1 << origin)
+            if kings >> origin & 1:
+                self.king_walk(walks, (origin,), (), (), 0, walk_empty, opponent)
+                continue
+
+            jumps = man_jumps[origin]
+            for direction, capture, landing, capture_mask, landing_mask in jumps:
+                if opponent & capture_mask and walk_empty & landing_mask:
+                    self.man_walk(
+                        walks,
+                        (origin, landing),
+                        (direction,),
+                        (capture,),
+                        capture_mask,
+                        walk_empty,
+                        opponent,
+                    )
+        return walks
+
+    def is_ambiguous(self, move):
+        """Whether another legal capture has the origin and destination of move, for the player to move"""
+        player_type = self.player_type
+        men = self.men[player_type]
+        kings = self.kings[player_type]
+        opponent = self.men[not player_type] | self.kings[not player_type]
+        empty = PADDED_MASK & ~(men | kings | opponent)
+        origins = self.capturing(men, kings, empty, opponent)
+
+        start = padded_bits[move.locations[0]]
+        end = padded_bits[move.locations[-1]]
+        walks = self.longest_walks(origins, empty, opponent)
+        return sum(walk[0][0] == start and walk[0][-1] == end for walk in walks) > 1
+
+    def man_walk(self, walks, bits, directions, captures, captured, empty, opponent):
+        """The capture sequences of a man, as BitBoard._capture_walk on padded bits"""
+        # jumping back is not possible, since the captured piece stays on the board during the capture
+        capturable = opponent & ~captured
+        is_leaf = True
+        jumps = man_jumps[bits[-1]]
+        for direction, capture, landing, capture_mask, landing_mask in jumps:
+            if capturable & capture_mask and empty & landing_mask:
+                is_leaf = False
+                self.man_walk(
+                    walks,
+                    bits + (landing,),
+                    directions + (direction,),
+                    captures + (capture,),
+                    captured | capture_mask,
+                    empty,
+                    opponent,
+                )
+
+        if is_leaf:
+            self.add_walk(walks, bits, directions, captures, captured)
+
+    def king_walk(self, walks, bits, directions, captures, captured, empty, opponent):
+        """The capture sequences of a king, as BitBoard._capture_walk on padded bits"""
+        backward = opposite_direction[directions[-1]] if directions else None
+        is_leaf = True
+        for direction, ray in king_rays[bits[-1]]:
+            if direction == backward:
+                continue
+
+            capture = None
+            landings = []
+            for next_bit in ray:
+                if capture is None:
+                    if empty >> next_bit & 1:
+                        continue
+                    if opponent >> next_bit & 1 and not captured >> next_bit & 1:
+                        capture = next_bit
+                        continue
+                    break
+
+                if not empty >> next_bit & 1:
+                    break
+                landings.append(next_bit)
+
+            for next_bit in landings:
+                is_leaf = False
+                self.king_walk(
+                    walks,
+                    bits + (next_bit,),
+                    directions + (direction,),
+                    captures + (capture,),
+                    captured | (1 << capture),
+                    empty,
+                    opponent,
+                )
+
+        if is_leaf and captures:
+            self.add_walk(walks, bits, directions, captures, captured)
+
+    def add_walk(self, walks, bits, directions, captures, captured):
+        """Keep only the longest walks, as (bits, directions, captured bits, mask of the captured bits)"""
+        if walks and len(captures) < len(walks[0][2]):
+            return
+        if walks and len(captures) > len(walks[0][2]):
+            del walks[:]
+        walks.append((bits, directions, captures, captured))
+
+    def apply_capture(self, walk):
+        """Apply a capture sequence of capture_move, returns it as a Move"""
+        bits, directions, captures, captured = walk
+        player_type = self.player_type
+        opponent_type = not player_type
+        men = self.men
+        kings = self.kings
+        men[opponent_type] &= ~captured
+        kings[opponent_type] &= ~captured
+
+        origin_bit = 1 << bits[0]
+        destination_bit = 1 << bits[-1]
+        if kings[player_type] & origin_bit:
+            kings[player_type] ^= origin_bit ^ destination_bit
+        else:
+            men[player_type] ^= origin_bit
+            if destination_bit & padded_promotion[player_type]:
+                kings[player_type] |= destination_bit
+            else:
+                men[player_type] |= destination_bit
+
+        # the same captures recur in many games, and moves are immutable
+        move = capture_moves.get(walk)
+        if move is None:
+            move = Move(
+                tuple(padded_indexes[bit] for bit in bits),
+                directions,
+                tuple(padded_indexes[bit] for bit in captures),
+            )
+            if len(capture_moves) >= NOTATION_CACHE_SIZE:
+                capture_moves.clear()
+            capture_moves[walk] = move
+        return move
+
+
+def parse_game(text, validate=True, skip_invalid=False):
+    """Parse the text of a single game. Returns a PDNGame, or None for an invalid game with skip_invalid."""
+    tags = {}
+    position = 0
+    for match in tag_pattern.finditer(text):
+        if text[position : match.start()].strip():
+            break
+        tags[match.group(1)] = match.group(2).replace('\\"', '"')
+        position = match.end()
+
+    movetext = text[position:]
+    if "(" in movetext:
+        movetext = remove_variations(movetext)
+
+    notation, result = read_movetext(movetext)
+    game = PDNGame(tags, notation, result)
+    if not validate:
+        return game
+
+    if "FEN" in tags:
+        pieces, player_type = parse_fen(tags["FEN"])
+    else:
+        pieces, player_type = None, WHITE_PLAYER
+
+    validator = Validator(pieces, player_type)
+    game.moves = []
+    for ply, move_notation in enumerate(notation):
+        locations = notation_locations.get(move_notation)
+        if locations is None:
+            locations = parse_notation(move_notation)
+        move = validator.move(locations)
+        if move is None:
+            if skip_invalid:
+                return None
+            raise Exception(
+                "Illegal move %s at ply %d of game %s"
+                % (move_notation, ply + 1, describe(tags))
+            )
+        game.moves.append(move)
+    return game
+
+
+def read_movetext(movetext):
+    """The notation of the moves in movetext, and the result"""
+    # most move texts are only move numbers, moves and a result between spaces, which split reads faster than
+    # the token pattern. Other move texts, such as those with comments, are read with the token pattern.
+    notation = []
+    result = UNKNOWN
+    for token in movetext.split():
+        if token in results:
+            result = results[token]
+        elif token in notation_locations:
+            notation.append(token)
+        elif token[-1] == "." and token.rstrip(".").isdecimal():
+            continue
+        elif move_pattern.fullmatch(token):
+            parse_notation(token)
+            notation.append(token)
+        else:
+            break
+    else:
+        return notation, result
+
+    # findall gives the (result, move) groups of every token, empty strings for groups which did not match
+    notation = []
+    result = UNKNOWN
+    for token_result, token_move in token_pattern.findall(movetext):
+        if token_move:
+            notation.append(token_move)
+        elif token_result:
+            result = results[token_result]
+    return notation, result
+
+
+def parse_notation(notation):
+    """The board indexes of the squares of a move in PDN notation, such as 32-28 or 28x17x8"""
+    locations = tuple(int(square) - 1 for square in square_separator.split(notation))
+    if len(notation_locations) >= NOTATION_CACHE_SIZE:
+        notation_locations.clear()
+    notation_locations[notation] = locations
+    return locations
+
+
+def remove_variations(movetext):
+    """The move text without the (possibly nested) variations in parentheses"""
+    parts = []
+    depth = 0
+    start = 0
+    for i, character in enumerate(movetext):
+        if character == "(":
+            if depth == 0:
+                parts.append(movetext[start:i])
+            depth += 1
+        elif character == ")" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                start = i + 1
+    if depth == 0:
+        parts.append(movetext[start:])
+    return " ".join(parts)
+
+
+def describe(tags):
+    return " - ".join(tags[key] for key in ("White", "Black") if key in tags) or "?"
+
+
+def iterate_game_texts(lines):
+    """
+    Groups lines into the texts of games. A game starts at a tag line which follows a line which is not a
+    tag line, and at the first line.
+    """
+    game_lines = []
+    previous_is_tag = False
+    for line in lines:
+        is_tag = line.startswith("[")
+        if is_tag and not previous_is_tag and game_lines:
+            text = "".join(game_lines)
+            if text.strip():
+                yield text
+            game_lines = []
+
+        game_lines.append(line)
+        if line.strip():
+            previous_is_tag = is_tag
+        elif not is_tag:
+            previous_is_tag = False
+
+    text = "".join(game_lines)
+    if text.strip():
+        yield text
+
+
+def iterate_buffer_lines(buffer, start=0, end=None, encoding="utf-8"):
+    """The lines of a bytes-like buffer, such as an mmap, between start and end, without copying all of it"""
+    end = len(buffer) if (end is None) else end
+    position = start
+    while position < end:
+        newline = buffer.find(b"\n", position, end)
+        line_end = end if (newline < 0) else newline + 1
+        yield buffer[position:line_end].decode(encoding, errors="replace")
+        position = line_end
+
+
+def read_games(source, validate=True, skip_invalid=False, encoding="utf-8"):
+    """
+    Yields the games of source one by one: a path, a text or binary file object, or a bytes-like buffer
+    such as an mmap. With validate the moves are checked against the legal moves and the games have Move
+    objects, an illegal move raises an Exception, or skips the game with skip_invalid.
+    """
+    if isinstance(source, str):
+        with open(source, encoding=encoding, errors="replace") as file:
+            yield from read_games(file, validate, skip_invalid, encoding)
+        return
+
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        lines = iterate_buffer_lines(source, encoding=encoding)
+    elif "b" in getattr(source, "mode", ""):
+        lines = (line.decode(encoding, errors="replace") for line in source)
+    else:
+        lines = source
+
+    for text in iterate_game_texts(lines):
+        game = parse_game(text, validate, skip_invalid)
+        if game is not None:
+            yield game
+
+
+def game_start(buffer, position):
+    """The offset of the first game which starts at or after position, the length of the buffer if none"""
+    size = len(buffer)
+    if position <= 0:
+        return 0
+
+    while True:
+        newline = buffer.find(b"\n[", position - 1)
+        if newline < 0:
+            return size
+
+        previous_start = buffer.rfind(b"\n", 0, newline) + 1
+        previous_line = buffer[previous_start:newline].strip()
+        if not previous_line.startswith(b"["):
+            return newline + 1
+        position = newline + 2
+
+
+def split_buffer(buffer, chunk_size=CHUNK_SIZE):
+    """(start, end) offsets of parts of about chunk_size bytes, every part starts at a game"""
+    size = len(buffer)
+    offsets = [0]
+    while offsets[-1] < size:
+        offsets.append(
+            max(game_start(buffer, offsets[-1] + chunk_size), offsets[-1] + 1)
+        )
+    offsets[-1] = size
+    return list(zip(offsets[:-1], offsets[1:]))
+
+
+def read_part(path, start, end, validate, skip_invalid, encoding):
+    """The games of a part of a file, in a worker process"""
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            lines = iterate_buffer_lines(buffer, start, end, encoding)
+            return [
+                game
+                for game in (
+                    parse_game(text, validate, skip_invalid)
+                    for text in iterate_game_texts(lines)
+                )
+                if game is not None
+            ]
+
+
+def read_games_parallel(
+    path,
+    workers=2,
+    validate=True,
+    skip_invalid=False,
+    encoding="utf-8",
+    chunk_size=CHUNK_SIZE,
+):
+    """
+    Yields the games of the file at path in order, as read_games, parsed by worker processes. The file is
+    split at game boundaries into parts of about chunk_size bytes, at most two parts per worker are parsed
+    ahead of the games which are yielded.
+    """
+    with open(path, "rb") as file:
+        if file.seek(0, 2) == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            parts = split_buffer(buffer, chunk_size)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for start, end in parts:
+            futures.append(
+                pool.submit(
+                    read_part, path, start, end, validate, skip_invalid, encoding
+                )
+            )
+            if len(futures) >= 2 * workers:
+                yield from futures.pop(0).result()
+
+        for future in futures:
+            yield from future.result()
+
+
+def format_move(move, full_captures=False):
+    """
+    PDN notation of a move: 32-28, or 28x19 for a capture. With full_captures every square a capture lands
+    on is written, 28x17x8, which tells captures with the same origin and destination apart.
+    """
+    if not move.captures:
+        return "%d-%d" % (move.locations[0] + 1, move.locations[-1] + 1)
+
+    locations = move.locations
+    if not full_captures:
+        locations = (locations[0], locations[-1])
+    return "x".join("%d" % (i + 1) for i in locations)
+
+
+def format_moves(moves, pieces=None, player_type=WHITE_PLAYER, full_captures=False):
+    """
+    PDN notation of the moves of a game played from pieces, or the start position. A capture which has the
+    origin and destination of another legal capture is written in full, also without full_captures.
+    """
+    if full_captures:
+        return [format_move(move, full_captures) for move in moves]
+
+    validator = Validator(pieces, player_type)
+    notation = []
+    for ply, move in enumerate(moves):
+        full = bool(move.captures) and validator.is_ambiguous(move)
+        notation.append(format_move(move, full))
+        if validator.move(move.locations) != move:
+            raise Exception("Illegal move %s at ply %d" % (notation[-1], ply + 1))
+    return notation
+
+
+def format_game(game, full_captures=False, line_length=80):
+    """The PDN text of a game, ending with an empty line"""
+    tags = dict(game.tags)
+    tags["Result"] = game.result
+    lines = [
+        '[%s "%s"]' % (key, str(tags[key]).replace('"', '\\"'))
+        for key in seven_tag_roster
+        if key in tags
+    ]
+    lines.extend(
+        '[%s "%s"]' % (key, str(value).replace('"', '\\"'))
+        for key, value in tags.items()
+        if key not in seven_tag_roster
+    )
+    lines.append("")
+
+    ply_offset = 0
+    if "FEN" in tags and parse_fen(tags["FEN"])[1] == BLACK_PLAYER:
+        ply_offset = 1
+
+    if full_captures and game.moves is not None:
+        notations = [format_move(move, full_captures) for move in game.moves]
+    else:
+        notations = game.notation
+
+    tokens = []
+    for ply, notation in enumerate(notations):
+        ply += ply_offset
+        if ply % 2 == 0:
+            tokens.append("%d." % (ply // 2 + 1))
+        elif ply == ply_offset:
+            tokens.append("%d..." % (ply // 2 + 1))
+        tokens.append(notation)
+    tokens.append(game.result)
+
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > line_length:
+            lines.append(line)
+            line = token
+        else:
+            line = "%s %s" % (line, token) if line else token
+    lines.append(line)
+    lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+class PDNWriter(object):
+    """
+    Writes games to a text file, the formatted games are collected and written in batches of batch_size
+    games. Use as a context manager, or call close to write the last batch.
+    """
+
+    def __init__(self, file, full_captures=False, batch_size=1000):
+        self.file = file
+        self.full_captures = full_captures
+        self.batch_size = batch_size
+        self.batch = []
+        self.games = 0
+
+    def write(self, game):
+        self.batch.append(format_game(game, self.full_captures))
+        self.games += 1
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def write_games(self, games):
+        for game in games:
+            self.write(game)
+
+    def flush(self):
+        self.file.write("\n".join(self.batch) + ("\n" if self.batch else ""))
+        self.batch = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def write_games(path, games, full_captures=False):
+    """Write games to a new file at path, returns the number of games"""
+    with open(path, "w", encoding="utf-8") as file:
+        with PDNWriter(file, full_captures) as writer:
+            writer.write_games(games)
+    return writer.games
+
+
+def main():
+    parser = argparse.ArgumentParser(description="read and check a PDN file")
+    parser.add_argument("path", help="PDN file to read")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--no-validate", action="store_true", help="do not check the moves"
+    )
+    parser.add_argument(
+        "--skip-invalid", action="store_true", help="skip games with illegal moves"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    validate = not args.no_validate
+    if args.workers > 1:
+        games = read_games_parallel(
+            args.path, args.workers, validate, args.skip_invalid
+        )
+    else:
+        games = read_games(args.path, validate, args.skip_invalid)
+
+    n_games = 0
+    n_plies = 0
+    for game in games:
+        n_games += 1
+        n_plies += len(game)
+
+    duration = time.perf_counter() - start
+    print(
+        "%d games, %d plies in %.1f s, %.0f games/minute"
+        % (n_games, n_plies, duration, 60 * n_games / max(duration, 1e-9))
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Perft: count the leaf nodes of the move tree to a fixed depth, to verify the move generator against known
+node counts and to measure its throughput. Run the reference suite with: python -m pydraughts.perft --suite
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pydraughts import WHITE_PLAYER, BLACK_PLAYER
+from pydraughts.board import Board
+from pydraughts.cache import get_default_move_cache
+from pydraughts.bitboard import BitBoard
+
+# reference positions as (board key, player to move, {depth: nodes}). The start position counts equal the
+# published numbers for international draughts, the others were recorded with Board and BitBoard agreeing.
+reference_positions = {
+    "start": (
+        Board().key(),
+        WHITE_PLAYER,
+        {1: 9, 2: 81, 3: 658, 4: 4265, 5: 27117, 6: 167140},
+    ),
+    "middlegame": (
+        "ppppp..ppp.p.pppppp....PpP....P.P.PPPP..PP.PPPPPPP",
+        WHITE_PLAYER,
+        {1: 1, 2: 1, 3: 12, 4: 111, 5: 1278, 6: 13223, 7: 155052},
+    ),
+    "multi captures": (
+        "......PP..pppp...p..pppp.......P....P.............",
+        WHITE_PLAYER,
+        {1: 6, 2: 7, 3: 27, 4: 207, 5: 865, 6: 5154, 7: 18366, 8: 95322},
+    ),
+    "king endgame": (
+        "K...k....K.pp..........K...k.........PP..........k",
+        WHITE_PLAYER,
+        {1: 1, 2: 3, 3: 48, 4: 399, 5: 5059, 6: 81197},
+    ),
+    "king circular capture": (
+        "...p...K........p.p.................p.p...k..P....",
+        WHITE_PLAYER,
+        {1: 3, 2: 31, 3: 223, 4: 2040, 5: 16174, 6: 160207},
+    ),
+}
+
+
+def perft(board, player_type, depth):
+    """The number of move sequences of length depth, 1 for a depth of 0 or less"""
+    if depth <= 0:
+        return 1
+
+    moves = board.all_legal_moves(player_type)
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        undo = board.apply_move(move)
+        nodes += perft(board, not player_type, depth - 1)
+        board.undo_move(undo)
+
+    return nodes
+
+
+def divide(board, player_type, depth):
+    """The perft node count below every legal move, as a list of (move, nodes) pairs"""
+    if depth < 1:
+        raise Exception("The depth of divide should be at least 1, not %d" % depth)
+
+    result = []
+    for move in board.all_legal_moves(player_type):
+        undo = board.apply_move(move)
+        result.append((move, perft(board, not player_type, depth - 1)))
+        board.undo_move(undo)
+
+    return result
+
+
+def perft_move(key, player_type, move, depth, use_bitboard=False):
+    """perft below a single move of the position with key, for use in a worker process"""
+    board = make_board(key, use_bitboard)
+    board.apply_move(move)
+    return perft(board, not player_type, depth - 1)
+
+
+def parallel_divide(board, player_type, depth, workers, use_bitboard=False):
+    """divide, with the subtrees of the moves searched in worker processes"""
+    moves = board.all_legal_moves(player_type)
+    key = board.key()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(perft_move, key, player_type, move, depth, use_bitboard)
+            for move in moves
+        ]
+        return [(move, future.result()) for move, future in zip(moves, futures)]
+
+
+def make_board(key, use_bitboard=False):
+    board = Board.from_key(key)
+    if use_bitboard:
+        return BitBoard(board.pieces)
+    return board
+
+
+def run(board, player_type, depth, workers=1, use_bitboard=False):
+    """Returns the divide result and the duration [s], starting with an empty move cache"""
+    get_default_move_cache().clear()
+
+    start = time.perf_counter()
+    if workers > 1 and depth > 1:
+        result = parallel_divide(
+            board, player_type, depth, workers, use_bitboard=use_bitboard
+        )
+    else:
+        result = divide(board, player_type, depth)
+    return result, time.perf_counter() - start
+
+
+def run_suite(max_depth=None, workers=1, use_bitboard=False):
+    """Run the reference positions, returns True if all node counts are as expected"""
+    all_correct = True
+    for name, (key, player_type, expected_nodes) in reference_positions.items():
+        for depth, expected in expected_nodes.items():
+            if max_depth is not None and depth > max_depth:
+                continue
+
+            board = make_board(key, use_bitboard)
+            result, duration = run(
+                board, player_type, depth, workers=workers, use_bitboard=use_bitboard
+            )
+            nodes = sum(move_nodes for _, move_nodes in result)
+            correct = nodes == expected
+            all_correct = all_correct and correct
+            print(
+                "%-22s depth %d: %10d nodes %s %8.3f s %10.0f nodes/s"
+                % (
+                    name,
+                    depth,
+                    nodes,
+                    "ok  " if correct else "FAIL (expected %d)" % expected,
+                    duration,
+                    nodes / max(duration, 1e-9),
+                )
+            )
+
+    return all_correct
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pydraughts perft")
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=None,
+        help="search depth, default 5, or the maximum depth of the suite",
+    )
+    parser.add_argument(
+        "--key", default=None, help="board key of the position, default the start"
+    )
+    parser.add_argument(
+        "--black", action="store_true", help="black to move instead of white"
+    )
+    parser.add_argument(
+        "--divide", action="store_true", help="print the nodes below every move"
+    )
+    parser.add_argument(
+        "--suite", action="store_true", help="run the reference positions"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--bitboard", action="store_true", help="use BitBoard instead of Board"
+    )
+    args = parser.parse_args()
+
+    if args.depth is not None and args.depth < 1:
+        parser.error("the depth should be at least 1")
+
+    if args.suite:
+        if not run_suite(args.depth, args.workers, args.bitboard):
+            raise SystemExit(1)
+        return
+
+    depth = 5 if args.depth is None else args.depth
+    key = Board().key() if args.key is None else args.key
+    player_type = BLACK_PLAYER if args.black else WHITE_PLAYER
+    board = make_board(key, args.bitboard)
+    result, duration = run(board, player_type, depth, args.workers, args.bitboard)
+
+    if args.divide:
+        for move, nodes in result:
+            print("%-20s %d" % (move.get_notation(), nodes))
+
+    nodes = sum(move_nodes for _, move_nodes in result)
+    print(
+        "depth %d: %d nodes in %.3f s, %.0f nodes/s"
+        % (depth, nodes, duration, nodes / max(duration, 1e-9))
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+Endgame tablebases: the win/draw/loss value and distance to the end of every position with up to a given
+number of pieces, computed by retrograde analysis. Generate them with, for example:
+python -m pydraughts.tablebase tables --pieces 3 --workers 4
+"""
+
+import argparse
+import itertools
+import mmap
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from math import comb
+
+from pydraughts import WHITE_PLAYER, BLACK_PLAYER
+from pydraughts import ROWS, COLS
+from pydraughts.board import Board
+from pydraughts.cache import MoveCache
+
+BOARD_SIZE = 2 * ROWS * COLS
+
+# results of a probe, for the player to move
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+# the squares every kind of piece can stand on, in the order of a material signature: white men, white
+# kings, black men and black kings. Men never stand on a square where they are crowned, see Board.king.
+group_squares = (
+    tuple(i for i in range(BOARD_SIZE) if not i < COLS),
+    tuple(range(BOARD_SIZE)),
+    tuple(i for i in range(BOARD_SIZE) if not i > BOARD_SIZE - COLS),
+    tuple(range(BOARD_SIZE)),
+)
+square_ranks = tuple(
+    {square: rank for rank, square in enumerate(squares)} for squares in group_squares
+)
+
+
+def encode_value(result, plies):
+    """
+    Values are stored as 16 bit integers: a win in plies as plies + 1, a loss in plies as -(plies + 1), such
+    that 0 is left for draws
+    """
+    if result == WIN:
+        return plies + 1
+    if result == LOSS:
+        return -plies - 1
+    return 0
+
+
+def decode_value(value):
+    """Returns the (result, plies) stored in a value, plies is 0 for draws"""
+    if value > 0:
+        return WIN, value - 1
+    if value < 0:
+        return LOSS, -value - 1
+    return DRAW, 0
+
+
+def signature_of(board):
+    """The material signature of the board: the number of white men, white kings, black men, black kings"""
+    white_kings = sum(board.pieces[WHITE_PLAYER].values())
+    black_kings = sum(board.pieces[BLACK_PLAYER].values())
+    return (
+        len(board.pieces[WHITE_PLAYER]) - white_kings,
+        white_kings,
+        len(board.pieces[BLACK_PLAYER]) - black_kings,
+        black_kings,
+    )
+
+
+def all_signatures(max_pieces):
+    """All signatures with at least one piece per player, and at most max_pieces pieces in total"""
+    signatures = []
+    for signature in itertools.product(range(max_pieces), repeat=4):
+        white = signature[0] + signature[1]
+        black = signature[2] + signature[3]
+        if white >= 1 and black >= 1 and white + black <= max_pieces:
+            signatures.append(signature)
+    return signatures
+
+
+def generation_levels(max_pieces):
+    """
+    The signatures grouped such that every group only depends on the groups before it: a capture lowers the
+    number of pieces and a promotion the number of men, so groups are ordered by pieces and then by men
+    """
+    levels = {}
+    for signature in all_signatures(max_pieces):
+        level = (sum(signature), signature[0] + signature[2])
+        levels.setdefault(level, []).append(signature)
+    return [levels[level] for level in sorted(levels)]
+
+
+def signature_name(signature):
+    return "%d_%d_%d_%d.tb" % signature
+
+
+class Material(object):
+    """
+    The positions of a material signature. Every position has an index: the ranks of the combinations of
+    squares of the four groups of pieces combined as a mixed radix number. Indexes of positions on which
+    pieces of different groups share a square are not used.
+    """
+
+    def __init__(self, signature):
+        self.signature = signature
+        self.radices = [
+            comb(len(squares), count)
+            for squares, count in zip(group_squares, signature)
+        ]
+        self.size = 1
+        for radix in self.radices:
+            self.size *= radix
+
+    def index(self, board):
+        """The index of the position on the board, which should have this signature"""
+        groups = ([], [], [], [])
+        for player_type, offset in [(WHITE_PLAYER, 0), (BLACK_PLAYER, 2)]:
+            for i, is_king in board.pieces[player_type].items():
+                groups[offset + is_king].append(square_ranks[offset + is_king][i])
+
+        index = 0
+        for group, radix in zip(groups, self.radices):
+            group.sort()
+            rank = 0
+            for k, square_rank in enumerate(group):
+                rank += comb(square_rank, k + 1)
+            index = index * radix + rank
+        return index
+
+    def positions(self):
+        """generator for (index, white men, white kings, black men, black kings) of all legal positions"""
+        combinations = [
+            itertools.combinations(range(len(squares)), count)
+            for squares, count in zip(group_squares, self.signature)
+        ]
+        for ranks in itertools.product(*[list(c) for c in combinations]):
+            groups = [[group_squares[g][rank] for rank in ranks[g]] for g in range(4)]
+            occupied = [square for group in groups for square in group]
+            if len(set(occupied)) != len(occupied):
+                continue
+
+            index = 0
+            for group_ranks, radix in zip(ranks, self.radices):
+                rank = 0
+                for k, square_rank in enumerate(group_ranks):
+                    rank += comb(square_rank, k + 1)
+                index = index * radix + rank
+            yield index, groups[0], groups[1], groups[2], groups[3]
+
+
+class Tablebase(object):
+    """
+    Probes the tables in a directory. Every signature has a file with the values for white to move followed
+    by those for black to move, the files are memory mapped when they are first needed.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.tables = {}
+        self.max_pieces = 0
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(".tb"):
+                    signature = tuple(int(count) for count in name[:-3].split("_"))
+                    self.max_pieces = max(self.max_pieces, sum(signature))
+
+    def table(self, signature):
+        """The memory mapped table of a signature, None if it is not generated"""
+        if signature in self.tables:
+            return self.tables[signature]
+
+        table = None
+        path = os.path.join(self.directory, signature_name(signature))
+        if os.path.isfile(path):
+            with open(path, "rb") as file:
+                table = (
+                    Material(signature),
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ),
+                )
+
+        self.tables[signature] = table
+        return table
+
+    def probe_value(self, board, player_type):
+        """The stored value of the position, None if it is not in the tables"""
+        signature = signature_of(board)
+        if signature[0] + signature[1] == 0 or signature[2] + signature[3] == 0:
+            # the side without pieces has no moves
+            has_pieces = (
+                signature[0] + signature[1]
+                if player_type == WHITE_PLAYER
+                else signature[2] + signature[3]
+            )
+            return encode_value(WIN, 0) if has_pieces else encode_value(LOSS, 0)
+
+        table = self.table(signature)
+        if table is None:
+            return None
+
+        material, data = table
+        offset = 2 * (player_type * material.size + material.index(board))
+        return int.from_bytes(data[offset : offset + 2], "little", signed=True)
+
+    def probe(self, board, player_type):
+        """The (result, plies) of the position for the player to move, None if it is not in the tables"""
+        value = self.probe_value(board, player_type)
+        if value is None:
+            return None
+        return decode_value(value)
+
+    def __getstate__(self):
+        # memory maps cannot be pickled, worker processes open the tables again
+        return {"directory": self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"])
+
+    def close(self):
+        for table in self.tables.values():
+            if table is not None:
+                table[1].close()
+        self.tables = {}
+
+
+def generate_material(directory, signature):
+    """
+    Compute and write the table of one signature, the tables of the signatures it depends on should exist.
+    The successors of every position are generated with the forward move generator, and reversed into
+    predecessor lists. Starting from the positions without moves, values are then propagated backwards in
+    order of distance: a position is won if a successor is lost for the opponent, and lost once all its
+    successors are won for the opponent. Positions which are never reached this way are draws.
+    """
+    tablebase = Tablebase(directory)
+    material = Material(signature)
+    size = material.size
+    board = Board(move_cache=MoveCache(enabled=False))
+
+    # per position code, side * size + index
+    remaining = array("i", [0]) * (2 * size)  # successors in this table without a value
+    longest_win = array("h", [-1]) * (
+        2 * size
+    )  # longest opponent win among the successors
+    cannot_lose = bytearray(
+        2 * size
+    )  # a successor outside this table is not won by the opponent
+    buckets = {}  # distance: [(code, result)]
+
+    sources = array("i")
+    destinations = array("i")
+    for index, white_men, white_kings, black_men, black_kings in material.positions():
+        board.set_positions(white_men, black_men, white_kings, black_kings)
+        for player_type in (WHITE_PLAYER, BLACK_PLAYER):
+            code = player_type * size + index
+            moves = board.all_legal_moves(player_type)
+            if not moves:
+                buckets.setdefault(0, []).append((code, LOSS))
+                continue
+
+            successors = set()
+            shortest_win = None
+            for move in moves:
+                undo = board.apply_move(move)
+                if signature_of(board) == signature:
+                    successors.add((not player_type) * size + material.index(board))
+                else:
+                    entry = tablebase.probe(board, not player_type)
+                    if entry is None:
+                        raise Exception(
+                            "Missing table %s in %s"
+                            % (signature_name(signature_of(board)), directory)
+                        )
+
+                    result, plies = entry
+                    if result == LOSS:
+                        if shortest_win is None or plies + 1 < shortest_win:
+                            shortest_win = plies + 1
+                    elif result == WIN:
+                        longest_win[code] = max(longest_win[code], plies)
+                    else:
+                        cannot_lose[code] = 1
+                board.undo_move(undo)
+
+            if shortest_win is not None:
+                cannot_lose[code] = 1
+                buckets.setdefault(shortest_win, []).append((code, WIN))
+
+            remaining[code] = len(successors)
+            for successor in successors:
+                sources.append(code)
+                destinations.append(successor)
+
+            if not successors and not cannot_lose[code]:
+                buckets.setdefault(longest_win[code] + 1, []).append((code, LOSS))
+
+    # predecessor lists in compressed form: the predecessors of code are in the range offsets[code: code + 2]
+    offsets = array("i", [0]) * (2 * size + 1)
+    for destination in destinations:
+        offsets[destination + 1] += 1
+    for code in range(2 * size):
+        offsets[code + 1] += offsets[code]
+    predecessors = array("i", [0]) * len(destinations)
+    fill = offsets[:-1]
+    for source, destination in zip(sources, destinations):
+        predecessors[fill[destination]] = source
+        fill[destination] += 1
+    del sources, destinations, fill
+
+    values = array("h", [0]) * (2 * size)
+    is_done = bytearray(2 * size)
+    distance = 0
+    while buckets:
+        for code, result in buckets.pop(distance, []):
+            if is_done[code]:
+                continue
+
+            is_done[code] = 1
+            values[code] = encode_value(result, distance)
+            for predecessor in predecessors[offsets[code] : offsets[code + 1]]:
+                if is_done[predecessor]:
+                    continue
+
+                if result == LOSS:
+                    buckets.setdefault(distance + 1, []).append((predecessor, WIN))
+                    continue
+
+                remaining[predecessor] -= 1
+                longest_win[predecessor] = max(longest_win[predecessor], distance)
+                if remaining[predecessor] == 0 and not cannot_lose[predecessor]:
+                    buckets.setdefault(longest_win[predecessor] + 1, []).append(
+                        (predecessor, LOSS)
+                    )
+        distance += 1
+
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    path = os.path.join(directory, signature_name(signature))
+    with open(path + ".tmp", "wb") as file:
+        values.tofile(file)
+    os.replace(path + ".tmp", path)
+
+    tablebase.close()
+    return signature, size
+
+
+def generate(directory, max_pieces=3, workers=1, overwrite=False):
+    """Generate all tables with up to max_pieces pieces, the signatures of a level in parallel"""
+    os.makedirs(directory, exist_ok=True)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        for signatures in generation_levels(max_pieces):
+            if not overwrite:
+                signatures = [
+                    signature
+                    for signature in signatures
+                    if not os.path.isfile(
+                        os.path.join(directory, signature_name(signature))
+                    )
+                ]
+
+            if pool is None:
+                results = [
+                    generate_material(directory, signature) for signature in signatures
+                ]
+            else:
+                results = pool.map(
+                    generate_material, [directory] * len(signatures), signatures
+                )
+
+            for signature, size in results:
+                print("generated %s, %d positions" % (signature_name(signature), size))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="pydraughts endgame tablebase generator"
+    )
+    parser.add_argument("directory", help="directory for the tables")
+    parser.add_argument(
+        "--pieces", type=int, default=3, help="maximum number of pieces"
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--overwrite", action="store_true", help="regenerate existing tables"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generate(args.directory, args.pieces, args.workers, args.overwrite)
+    print("done in %.1f s" % (time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import random
+from array import array
+
+from pydraughts import WHITE_PLAYER, BLACK_PLAYER
+
+# bound types of a stored score
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# replacement policies
+DEPTH_PREFERRED = "depth"
+ALWAYS_REPLACE = "always"
+
+NO_MOVE = -1
+
+# the board hash does not depend on the player to move, the table does
+side_keys = {WHITE_PLAYER: 0, BLACK_PLAYER: random.Random(1).getrandbits(64)}
+
+
+def position_key(board, player_type):
+    """Key of the position with player type to move"""
+    return board.hash ^ side_keys[player_type]
+
+
+def encode_move(move):
+    """Encode a move as an integer from its origin and destination"""
+    return move.locations[0] | (move.locations[-1] << 6)
+
+
+def decode_move(code, moves):
+    """Find the move with the encoded origin and destination in a list of moves, None if there is none"""
+    if code == NO_MOVE:
+        return None
+
+    origin = code & 63
+    destination = code >> 6
+    for move in moves:
+        if move.locations[0] == origin and move.locations[-1] == destination:
+            return move
+
+    return None
+
+
+class TranspositionTable(object):
+    """
+    Fixed size hash table for search results. The entries are stored in parallel arrays indexed by the lower
+    bits of the key, which are all allocated up front, such that the memory use does not grow during a game.
+    An entry holds the full key to verify a hit, the search depth, the score, the bound type and the
+    encoded best move.
+    """
+
+    entry_size = 8 + 1 + 2 + 1 + 4  # [bytes] key, depth, score, bound, move
+
+    def __init__(self, size_mb=16, replacement=DEPTH_PREFERRED):
+        if replacement not in (DEPTH_PREFERRED, ALWAYS_REPLACE):
+            raise Exception("Unknown replacement policy %s" % replacement)
+
+        # the number of entries is the largest power of two within the memory budget
+        max_entries = max(1, int(size_mb * 2**20) // self.entry_size)
+        self.size = 1 << (max_entries.bit_length() - 1)
+        self.mask = self.size - 1
+        self.replacement = replacement
+
+        self.keys = array("Q", [0]) * self.size
+        self.depths = array("b", [-1]) * self.size
+        self.scores = array("h", [0]) * self.size
+        self.bounds = array("B", [0]) * self.size
+        self.moves = array("i", [NO_MOVE]) * self.size
+
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.overwrites = 0
+        self.stores = 0
+
+    def probe(self, key):
+        """Returns the (depth, score, bound, move) entry stored for key, or None"""
+        index = key & self.mask
+        depth = self.depths[index]
+        if depth >= 0 and self.keys[index] == key:
+            self.hits += 1
+            return depth, self.scores[index], self.bounds[index], self.moves[index]
+
+        # a slot which is in use by another position
+        if depth >= 0:
+            self.collisions += 1
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, bound, move=NO_MOVE):
+        index = key & self.mask
+        stored_depth = self.depths[index]
+        is_other_position = stored_depth >= 0 and self.keys[index] != key
+
+        if (
+            self.replacement == DEPTH_PREFERRED
+            and is_other_position
+            and depth < stored_depth
+        ):
+            return
+
+        if is_other_position:
+            self.overwrites += 1
+
+        # keep the best move of an earlier search of this position if this search did not find one
+        if move == NO_MOVE and not is_other_position and stored_depth >= 0:
+            move = self.moves[index]
+
+        self.keys[index] = key
+        self.depths[index] = min(depth, 127)
+        self.scores[index] = score
+        self.bounds[index] = bound
+        self.moves[index] = move
+        self.stores += 1
+
+    def clear(self):
+        """Empty the table, the counters are reset as well"""
+        self.depths = array("b", [-1]) * self.size
+        self.moves = array("i", [NO_MOVE]) * self.size
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.overwrites = 0
+        self.stores = 0
+
+    def size_bytes(self):
+        return self.size * self.entry_size
+
+    def usage(self):
+        """fraction of the slots in use"""
+        return (self.size - self.depths.count(-1)) / self.size
+
+    def __str__(self):
+        return (
+            "transposition table: %d entries (%.1f MB), %d hits, %d misses, %d collisions, %d overwrites"
+            % (
+                self.size,
+                self.size_bytes() / 2**20,
+                self.hits,
+                self.misses,
+                self.collisions,
+                self.overwrites,
+            )
+        )
@@ -1,38 +1,348 @@
+import multiprocessing
+import queue
+import random
 import pygame
 from threading import Thread
 
+from pydraughts.board import Board
+
+# how a player computes its moves
+INLINE = "inline"  # in the game loop, which blocks while the player thinks
+THREAD = "thread"  # in a new thread for every move
+WORKER_THREAD = "worker_thread"  # in a thread which lives as long as the game
+PROCESS = "process"  # in a process which lives as long as the game
+
+executions = [INLINE, THREAD, WORKER_THREAD, PROCESS]
+
+# requests to a worker process
+MOVE = "move"
+PONDER = "ponder"
+STOP_PONDER = "stop_ponder"
+
+
+def fallback_move(board, player_type, rng):
+    """The move which is played when a player exceeds its deadline: a random legal move, drawn from rng"""
+    return rng.choice(board.status(player_type).moves)
+
+
+def run_worker_process(player, connection):
+    """
+    The loop of a worker process. It receives (MOVE, request id, position) requests, with the position and
+    the player to move packed by Board.to_bytes, and sends back (request id, move), until it receives None or
+    the game closes the connection. A (PONDER, position) request starts pondering, which stops at the next
+    request, such as (STOP_PONDER,).
+    """
+    can_ponder = hasattr(player, "start_ponder")
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+
+        if can_ponder:
+            player.stop_ponder()
+
+        if request is None:
+            return
+
+        if request[0] == STOP_PONDER:
+            continue
+
+        if request[0] == PONDER:
+            board, player_type = Board.from_bytes(request[1])
+            player.player_type = player_type
+            player.start_ponder(board)
+            continue
+
+        _, request_id, position = request
+        board, player_type = Board.from_bytes(position)
+        player.player_type = player_type
+        player.take_action(board, None)
+        move = player.move
+        player.reset()
+        connection.send((request_id, move))
+
+
+class WorkerProcess(object):
+    """
+    Runs a player in a separate process, started once and reused for every move. The player is copied to
+    the process, so its state does not have to be shared with the game, and the process does not compete
+    with the game loop for the GIL. Positions and moves are send over a pipe. A move which takes too long
+    is cancelled by killing the process, a new process is started for the next move.
+    """
+
+    def __init__(self, player):
+        self.player = player
+        self.process = None
+        self.connection = None
+        self.request_id = 0
+        self.is_pondering = False
+
+    def open(self):
+        if self.process is not None:
+            return
+
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=run_worker_process,
+            args=(self.player, worker_connection),
+            daemon=True,
+        )
+        self.process.start()
+        worker_connection.close()
+
+    def request(self, board, graphics, player_type):
+        self.open()
+        self.request_id += 1
+        self.is_pondering = False
+        self.connection.send((MOVE, self.request_id, board.to_bytes(player_type)))
+
+    def start_ponder(self, board, player_type):
+        self.open()
+        self.is_pondering = True
+        self.connection.send((PONDER, board.to_bytes(player_type)))
+
+    def stop_ponder(self):
+        """Ask the worker to stop pondering, it stops when it receives the request"""
+        if not self.is_pondering or self.process is None:
+            return
+
+        self.is_pondering = False
+        self.connection.send((STOP_PONDER,))
+
+    def poll(self):
+        """Returns (True, move) when the move of the last request has arrived, otherwise (False, None)"""
+        while self.connection.poll():
+            try:
+                request_id, move = self.connection.recv()
+            except EOFError:
+                raise Exception("The worker process of %s stopped" % self.player.name)
+
+            if request_id == self.request_id:
+                return True, move
+
+        return False, None
+
+    def cancel(self):
+        """
+        Stop the current request, the process can not be interrupted so it is killed. SIGTERM is not used,
+        since a process forked after pygame.init inherits the signal handlers of SDL, which ignore it.
+        """
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+        self.process = None
+        self.connection = None
+        self.is_pondering = False
+
+    def close(self):
+        self.is_pondering = False
+        if self.process is None:
+            return
+
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+        self.process = None
+        self.connection = None
+
+
+class WorkerThread(object):
+    """
+    Runs a player in a separate thread, started once and reused for every move. This suits light players,
+    and players which need the graphics, such as the human player. A thread can not be stopped: a cancelled
+    request runs to the end and its move is ignored.
+    """
+
+    def __init__(self, player):
+        self.player = player
+        self.thread = None
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.request_id = 0
+
+    def open(self):
+        if self.thread is not None:
+            return
+
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+
+            request_id, board, graphics, player_type = request
+            self.player.player_type = player_type
+            self.player.take_action(board, graphics)
+            move = self.player.move
+            self.player.reset()
+            self.results.put((request_id, move))
+
+    def request(self, board, graphics, player_type):
+        self.open()
+        self.request_id += 1
+        self.requests.put((self.request_id, board, graphics, player_type))
+
+    def start_ponder(self, board, player_type):
+        self.player.start_ponder(board)
+
+    def stop_ponder(self):
+        self.player.stop_ponder()
+
+    def poll(self):
+        """Returns (True, move) when the move of the last request has arrived, otherwise (False, None)"""
+        while True:
+            try:
+                request_id, move = self.results.get_nowait()
+            except queue.Empty:
+                return False, None
+
+            if request_id == self.request_id:
+                return True, move
+
+    def cancel(self):
+        """Ignore the move of the current request"""
+        self.request_id += 1
+
+    def close(self):
+        if self.thread is None:
+            return
+
+        self.requests.put(None)
+        self.thread = None
+
 
 class Turn(object):
     """
-    This class interacts with the player to obtain a move, this is done in a separate thread, such that the main game
-    will not be blocked.
+    This class interacts with the player to obtain a move. By default this is done in a separate thread, such
+    that the main game will not be blocked, see executions for the alternatives. With a worker thread or a
+    worker process a move is cancelled at its deadline: the time left on the clock of the player, or the
+    move time limit when that comes first. The fallback move is played instead, fallback is called with the
+    board, the player type and rng. By default rng is the random generator of the player when it has one,
+    such that a seeded player also plays reproducible fallback moves.
+
+    With ponder, players with start_ponder and stop_ponder methods think during the turn of the opponent: the
+    game calls start_ponder after the move of the player, and the pondering stops when the next turn of the
+    player starts. Pondering only adds thinking time when it does not share the GIL with the opponent, so
+    when the player or the opponent runs in a worker process.
     """
 
-    def __init__(self, player, in_separate_thread=True):
+    def __init__(
+        self,
+        player,
+        in_separate_thread=True,
+        execution=None,
+        move_time_limit=None,
+        fallback=fallback_move,
+        ponder=False,
+        rng=None,
+    ):
+        if execution is None:
+            execution = THREAD if in_separate_thread else INLINE
+
+        if execution not in executions:
+            raise Exception(
+                "Unknown execution %s, choose from %s" % (execution, executions)
+            )
+
         self.player = player
-        self.in_separate_thread = in_separate_thread
+        self.execution = execution
+        self.in_separate_thread = execution != INLINE
+        self.move_time_limit = move_time_limit  # [s]
+        self.fallback = fallback
+        if rng is None:
+            rng = getattr(player, "rng", None)
+        self.rng = random.Random() if (rng is None) else rng
+        self.ponder = ponder and hasattr(player, "start_ponder")
+
+        if execution == PROCESS:
+            self.worker = WorkerProcess(player)
+        elif execution == WORKER_THREAD:
+            self.worker = WorkerThread(player)
+        else:
+            self.worker = None
 
         self.start_time = None
         self.duration = None
+        self.deadline = None
         self.thread = None
         self.move = None
 
-    def take(self, board, graphics, player_type):
+    def open(self):
+        """Start the worker, once per game"""
+        if self.worker is not None:
+            self.worker.open()
+
+    def close(self):
+        self.stop_ponder()
+        if self.worker is not None:
+            self.worker.close()
+
+    def start_ponder(self, board, player_type):
+        """Let the player think during the turn of the opponent, board is the position after its move"""
+        if not self.ponder:
+            return
+
+        if self.worker is not None:
+            self.worker.start_ponder(board.copy(), player_type)
+        else:
+            self.player.start_ponder(board.copy())
+
+    def stop_ponder(self):
+        if not self.ponder:
+            return
+
+        if self.worker is not None:
+            self.worker.stop_ponder()
+        else:
+            self.player.stop_ponder()
+
+    def take(self, board, graphics, player_type, time_left=None):
         """"""
-        if self.thread is None:
-            self.start(board, graphics)
+        is_started = (
+            (self.start_time is not None)
+            if (self.worker is not None)
+            else (self.thread is not None)
+        )
+        if not is_started:
+            self.start(board, graphics, player_type, time_left)
 
         current_time = pygame.time.get_ticks()  # [ms]
         self.duration = (current_time - self.start_time) / 1000
 
-        if not self.is_busy():
+        if self.worker is not None:
+            self.poll_worker(board, player_type)
+        elif not self.is_busy():
             self.end(board, player_type)
 
-    def start(self, board, graphics):
+    def start(self, board, graphics, player_type=None, time_left=None):
         """Start a player turn on a separate thread"""
         self.start_time = pygame.time.get_ticks()  # [ms]
 
-        if self.in_separate_thread:
+        self.deadline = time_left
+        if self.move_time_limit is not None:
+            self.deadline = (
+                self.move_time_limit
+                if (self.deadline is None)
+                else min(self.deadline, self.move_time_limit)
+            )
+
+        self.stop_ponder()
+
+        # the player gets its own copy, since the game keeps drawing the board while the player thinks. A
+        # searching player explores lines on that copy with Board.apply_move and Board.undo_move.
+        if self.worker is not None:
+            self.worker.request(board.copy(), graphics, player_type)
+        elif self.in_separate_thread:
             self.thread = Thread(
                 target=self.player.take_action, args=(board.copy(), graphics)
             )
@@ -40,6 +350,26 @@ class Turn(object):
         else:
             self.thread = self.player.take_action(board.copy(), graphics)
 
+    def poll_worker(self, board, player_type):
+        """Take the move of the worker when it arrived, or the fallback move when the deadline passed"""
+        if self.move is not None:
+            return
+
+        is_done, move = self.worker.poll()
+        if is_done:
+            self.player.move = move
+        elif (self.deadline is not None) and (self.duration >= self.deadline):
+            print(
+                "%s exceeded its deadline of %.2f s, playing a fallback move"
+                % (self.player.name, self.deadline)
+            )
+            self.worker.cancel()
+            self.player.move = self.fallback(board, player_type, self.rng)
+        else:
+            return
+
+        self.end(board, player_type)
+
     def end(self, board, player_type):
         move = self.player.move
 
@@ -47,13 +377,11 @@ class Turn(object):
             return
 
         # only legal moves are accepted
-        if not board.is_legal_move(move, player_type):
+        status = board.status(player_type)
+        if move not in status.moves:
             print("Player suggested in illegal move %s" % move)
             print("Legal moves are: ")
-            [
-                print(" - %s" % legal_move)
-                for legal_move in board.all_legal_moves(player_type)
-            ]
+            [print(" - %s" % legal_move) for legal_move in status.moves]
             return
 
         self.move = move
@@ -63,6 +391,7 @@ class Turn(object):
         self.player.reset()
         self.start_time = None
         self.duration = None
+        self.deadline = None
         self.thread = None
         self.move = None
 
@@ -1,5 +1,7 @@
+import random
+
 from pydraughts import NORTHEAST, SOUTHEAST, SOUTHWEST, NORTHWEST
-from pydraughts.graphics import Graphics
+from pydraughts import WHITE_PLAYER, BLACK_PLAYER
 from multiprocessing import Value, Lock
 
 
@@ -72,6 +74,34 @@ def init_north_west_moves(board_width, board_height):
     return north_west_moves
 
 
+def init_rays(directions):
+    """
+    For every direction and square, a tuple with all squares along the diagonal from that square up to the
+    edge of the board, nearest first
+    """
+    rays = {}
+    for direction, move_model in directions.items():
+        rays[direction] = [
+            tuple(diagonal(i, move_model)) for i in range(len(move_model))
+        ]
+    return rays
+
+
+def init_zobrist(board_size, seed=0):
+    """
+    Random 64 bit keys for every (player, is_king, square) combination, the hash of a position is the xor of
+    the keys of its pieces. A fixed seed keeps hashes equal between processes and runs.
+    """
+    rng = random.Random(seed)
+    return {
+        player_type: {
+            is_king: [rng.getrandbits(64) for _ in range(board_size)]
+            for is_king in (False, True)
+        }
+        for player_type in (WHITE_PLAYER, BLACK_PLAYER)
+    }
+
+
 opposite_direction = {
     NORTHEAST: SOUTHWEST,
     SOUTHWEST: NORTHEAST,
@@ -94,12 +124,17 @@ def diagonal(index, direction):
 
 
 def show(board):
+    # imported here such that the board does not depend on pygame
+    from pydraughts.graphics import Graphics
+
+    import pygame
+
     graphics = Graphics()
     graphics.setup_window()
     graphics.update_display(board)
 
-    # TODO: continue is we close window
-    while True:
+    # sleep until the window is closed
+    while pygame.event.wait().type != pygame.QUIT:
         pass
 
 
@@ -1,10 +1,41 @@
 import unittest
-from pydraughts.board import Board
-from pydraughts.move import Move
-from pydraughts.graphics import Graphics
+import io
+import mmap
+import os
+import json
+import multiprocessing
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from threading import Thread
+from pydraughts.board import Board, all_directions, all_rays
+from pydraughts.bitboard import BitBoard, PROMOTION_MASK
+from pydraughts.move import Move, MoveList
+from pydraughts.bots import AlphaBetaBot, RandomWalker, MCTSBot, root_moves
+from pydraughts.match import MatchRunner, ResultWriter, play_game
+from pydraughts.match import PLAYER1, PLAYER2, result_fields
+from pydraughts.cache import MoveCache, LRU, CLOCK, TWO_Q
+from pydraughts.perft import perft, divide, reference_positions
+from pydraughts.transposition import TranspositionTable, position_key
+from pydraughts.transposition import encode_move, decode_move
+from pydraughts.transposition import DEPTH_PREFERRED, ALWAYS_REPLACE
+from pydraughts.transposition import EXACT, LOWER_BOUND
+from pydraughts.tablebase import Tablebase, Material, generate, all_signatures
+from pydraughts.tablebase import WIN, DRAW, LOSS
+from pydraughts.book import BookBuilder, OpeningBook, play_book_game
+from pydraughts import batch
+from pydraughts.evaluation import Evaluator, new_table, MAN_VALUE, KING_VALUE
+from pydraughts.graphics import Graphics, pixel_coords, list_to_matrix_coords
+from pydraughts.human_player import HumanPlayer
+from pydraughts.turn import Turn, PROCESS, WORKER_THREAD, fallback_move
+from pydraughts import pdn
+import pygame
 from pydraughts import WHITE_PLAYER, BLACK_PLAYER
 from pydraughts import NORTHEAST, NORTHWEST, SOUTHEAST, SOUTHWEST
-from pydraughts.utils import show
+from pydraughts.utils import show, diagonal
 
 
 class TestBoardMethods(unittest.TestCase):
@@ -14,6 +45,142 @@ class TestBoardMethods(unittest.TestCase):
         self.assertEqual(board.pieces[WHITE_PLAYER], {})
         self.assertEqual(board.pieces[BLACK_PLAYER], {})
 
+    def test_from_key(self):
+        board = Board()
+        board.set_positions(positions_white=[6, 30], kings_black=[44])
+        self.assertEqual(board, Board.from_key(board.key()))
+
+    def test_to_bytes(self):
+        board = Board()
+        board.set_positions(positions_white=[6, 30], kings_black=[0, 44, 49])
+        for player_type in [WHITE_PLAYER, BLACK_PLAYER]:
+            data = board.to_bytes(player_type)
+            self.assertEqual(len(data), 26)
+            self.assertEqual(Board.from_bytes(data), (board, player_type))
+
+            bitboard, bitboard_player_type = BitBoard.from_bytes(data)
+            self.assertEqual(bitboard.pieces, board.pieces)
+            self.assertEqual(bitboard_player_type, player_type)
+            self.assertEqual(bitboard.to_bytes(player_type), data)
+
+        self.assertNotEqual(board.to_bytes(WHITE_PLAYER), Board().to_bytes())
+        with self.assertRaises(Exception):
+            Board.from_bytes(data[:-1])
+
+    def test_fen(self):
+        board = Board()
+        self.assertEqual(Board.from_fen(board.to_fen()), (board, WHITE_PLAYER))
+        self.assertEqual(Board.from_fen("W:W31-50:B1-20"), (board, WHITE_PLAYER))
+
+        board.set_positions(positions_white=[30, 31, 32], kings_black=[4])
+        self.assertEqual(board.to_fen(BLACK_PLAYER), "B:W31,32,33:BK5")
+        self.assertEqual(Board.from_fen('"B:W31-33:BK5."'), (board, BLACK_PLAYER))
+        with self.assertRaises(Exception):
+            Board.from_fen("W:W51:B1")
+
+    def test_status(self):
+        board = Board()
+        board.set_positions(positions_white=[6, 7, 30], positions_black=[12, 22, 1])
+        status = board.status(WHITE_PLAYER)
+        self.assertIs(status, board.status(WHITE_PLAYER))
+        self.assertTrue(status.has_capture)
+        self.assertFalse(status.terminal)
+        self.assertEqual(list(status.moves), list(board.all_legal_moves(WHITE_PLAYER)))
+        for i in board.pieces[WHITE_PLAYER]:
+            self.assertEqual(status.moves_from(i), board.legal_moves(i, WHITE_PLAYER))
+
+        # callers get a copy, modifying it does not change the status
+        i = status.moves[0].locations[0]
+        board.legal_moves(i, WHITE_PLAYER).clear()
+        board.legal_capture_moves(i, WHITE_PLAYER).clear()
+        self.assertTrue(status.moves_from(i))
+        self.assertEqual(status.moves_from(i), board.legal_moves(i, WHITE_PLAYER))
+
+        # a new position, or the other player, has its own status
+        self.assertIsNot(board.status(BLACK_PLAYER), status)
+        board.apply_move(status.moves[0])
+        self.assertFalse(board.status(WHITE_PLAYER).has_capture)
+
+        board.set_positions(positions_black=[40])
+        self.assertTrue(board.status(WHITE_PLAYER).terminal)
+        self.assertEqual(board.status(WHITE_PLAYER).moves_from(45), [])
+
+    def test_move_index(self):
+        """the sub move index gives the first steps of the legal moves of a piece"""
+        rng = random.Random(3)
+        board = Board()
+        player_type = WHITE_PLAYER
+        for _ in range(80):
+            status = board.status(player_type)
+            if status.terminal:
+                break
+
+            for origin in board.pieces[player_type]:
+                moves = status.moves_from(origin)
+                self.assertEqual(
+                    status.locations_from(origin),
+                    [location for move in moves for location in move.locations],
+                )
+                for next_index in range(board.size):
+                    expected = None
+                    for move in moves:
+                        if move.locations[1] == next_index:
+                            expected = move.split()[0]
+                            break
+                    self.assertEqual(status.sub_move(origin, next_index), expected)
+                    self.assertEqual(
+                        board.legal_single_move(origin, next_index, player_type),
+                        expected,
+                    )
+
+            board.apply_move(rng.choice(status.moves))
+            player_type = not player_type
+
+
+class TestMove(unittest.TestCase):
+    def test_hash_and_equality(self):
+        move = Move([7, 18, 27], [SOUTHEAST, SOUTHWEST], [12, 22])
+        same = Move((7, 18, 27), (SOUTHEAST, SOUTHWEST), (12, 22))
+        self.assertEqual(move, same)
+        self.assertEqual(hash(move), hash(same))
+        self.assertEqual(len({move, same, Move([7, 18], [SOUTHEAST], [12])}), 2)
+
+    def test_immutable(self):
+        move = Move([7, 18], [SOUTHEAST], [12])
+        with self.assertRaises(AttributeError):
+            move.locations = (7, 13)
+
+    def test_append_and_split(self):
+        move = Move([7, 18, 27], [SOUTHEAST, SOUTHWEST], [12, 22])
+        first, second = move.split()
+        self.assertEqual(first, Move([7, 18], [SOUTHEAST], [12]))
+        self.assertEqual(first.append(second), move)
+        self.assertEqual(Move().append(first), first)
+        self.assertEqual(first, Move([7, 18], [SOUTHEAST], [12]))
+        self.assertEqual(move.get_notation(), "7x18x27")
+
+    def test_encode(self):
+        for move in [
+            Move(
+                [7, 18, 27, 16, 7],
+                [SOUTHEAST, SOUTHWEST, NORTHWEST, NORTHEAST],
+                [12, 22, 21, 11],
+            ),
+            Move([0, 49], [SOUTHEAST], [33]),
+            Move([31, 26], [NORTHWEST]),
+        ]:
+            self.assertEqual(move, Move.decode(move.encode()))
+
+    def test_pickle(self):
+        move = Move([7, 18], [SOUTHEAST], [12])
+        self.assertEqual(move, pickle.loads(pickle.dumps(move)))
+
+    def test_move_list(self):
+        moves = Board().all_legal_moves(WHITE_PLAYER)
+        self.assertIsInstance(moves, MoveList)
+        self.assertIn(Move([31, 26], [NORTHWEST]), moves)
+        self.assertNotIn(Move([31, 25], [NORTHWEST]), moves)
+
 
 class TestLegalCaptureMovesMethods(unittest.TestCase):
     def test_single_capture(self):
@@ -122,6 +289,19 @@ class TestLegalCaptureMovesMethods(unittest.TestCase):
         ]
         self.assertEqual(move_result, board.legal_moves(6, WHITE_PLAYER))
 
+    def test_same_as_blind_capture_moves(self):
+        """the longest captures should equal the longest of all blind capture moves, in the same order"""
+        board = Board()
+        board.set_positions(
+            positions_white=[6, 7], positions_black=[10, 20, 11, 21, 12, 22, 13, 23]
+        )
+        blind_moves = board.all_blind_capture_moves(WHITE_PLAYER)
+        maximum_length = max(len(move.captures) for move in blind_moves)
+        self.assertEqual(
+            [move for move in blind_moves if len(move.captures) == maximum_length],
+            board.all_legal_capture_moves(WHITE_PLAYER),
+        )
+
 
 class TestKinging(unittest.TestCase):
     """unit tests for kinging"""
@@ -205,5 +385,1167 @@ class TestKingLegalCaptureMovesMethods(unittest.TestCase):
         self.assertEqual(move_result, moves)
 
 
+class TestRays(unittest.TestCase):
+    def test_rays(self):
+        self.assertEqual(all_rays[SOUTHEAST][7], (12, 18, 23, 29, 34))
+        self.assertEqual(all_rays[NORTHWEST][7], (1,))
+        self.assertEqual(all_rays[NORTHEAST][4], ())
+
+    def test_rays_follow_directions(self):
+        for direction, rays in all_rays.items():
+            for i, ray in enumerate(rays):
+                self.assertEqual(ray, tuple(diagonal(i, all_directions[direction])))
+
+
+class TestZobristHash(unittest.TestCase):
+    """The incrementally updated hash should equal the hash computed from scratch"""
+
+    def test_incremental_hash(self):
+        positions = []
+        random_game(1, 200, positions)
+        for board, _ in positions:
+            self.assertEqual(board.hash, board.compute_hash())
+
+    def test_equal_positions(self):
+        board = Board()
+        board.set_positions(positions_white=[43], kings_black=[8])
+        other = Board()
+        other.set_positions(positions_white=[43], kings_black=[2])
+        self.assertNotEqual(board, other)
+        other.apply_move(Move([2, 8], [SOUTHEAST]))
+        self.assertEqual(board, other)
+        self.assertEqual(hash(board), hash(other))
+        self.assertNotEqual(hash(board), hash(Board()))
+
+
+class TestUndoMove(unittest.TestCase):
+    """undo_move should restore the position from before apply_move exactly"""
+
+    def assert_undo_restores(self, board, move):
+        before = board.copy()
+        undo = board.apply_move(move)
+        self.assertNotEqual(before.key(), board.key())
+        board.undo_move(undo)
+        self.assertEqual(before, board)
+        self.assertEqual(before.hash, board.hash)
+        self.assertEqual(board.hash, board.compute_hash())
+
+    def test_undo_promotion(self):
+        board = Board()
+        board.set_positions(positions_white=[6], positions_black=[40])
+        move = Move([6, 0], [NORTHWEST])
+        undo = board.apply_move(move)
+        self.assertTrue(undo.promoted)
+        board.undo_move(undo)
+        self.assertEqual(board.get_piece(6), (WHITE_PLAYER, False))
+
+    def test_undo_king_capture(self):
+        board = Board()
+        board.set_positions(
+            kings_white=[7], positions_black=[18, 38, 36], kings_black=[16]
+        )
+        self.assert_undo_restores(board, board.all_legal_moves(WHITE_PLAYER)[0])
+
+    def test_random_games(self):
+        positions = []
+        random_game(2, 150, positions)
+        for position, player_type in positions:
+            for board in [position, BitBoard(position.pieces)]:
+                for move in board.all_legal_moves(player_type):
+                    key = board.key()
+                    undo = board.apply_move(move)
+                    board.undo_move(undo)
+                    self.assertEqual(key, board.key())
+
+
+class TestEvaluation(unittest.TestCase):
+    def assert_scores(self, board):
+        self.assertEqual((board.material, board.scores), board.compute_scores())
+
+    def test_incremental_scores(self):
+        rng = random.Random(5)
+        board = Board()
+        player_type = WHITE_PLAYER
+        self.assert_scores(board)
+        for _ in range(200):
+            moves = board.all_legal_moves(player_type)
+            if not moves:
+                break
+
+            undo = board.apply_move(rng.choice(moves))
+            self.assert_scores(board)
+            if rng.random() < 0.3:
+                board.undo_move(undo)
+                self.assert_scores(board)
+            else:
+                player_type = not player_type
+
+        for i in list(board.pieces[WHITE_PLAYER])[:2]:
+            board.remove_piece(i)
+        board.set_piece(22, BLACK_PLAYER, True)
+        self.assert_scores(board)
+        self.assert_scores(board.copy())
+
+    def test_get_score(self):
+        board = Board()
+        board.set_positions(positions_white=[30, 31], kings_white=[2], kings_black=[44])
+        self.assertEqual(board.get_score(WHITE_PLAYER), 4)
+        self.assertEqual(board.get_score(BLACK_PLAYER, king_multiply=3), 3)
+        self.assertEqual(
+            board.evaluate(WHITE_PLAYER),
+            board.scores[WHITE_PLAYER] - board.scores[BLACK_PLAYER],
+        )
+
+    def test_custom_term(self):
+        evaluator = Evaluator(advancement=False, centre=False)
+        table = new_table()
+        table[WHITE_PLAYER][False][30] = 7
+        evaluator.add_term("square 30", table, weight=2)
+
+        board = Board()
+        board.set_positions(positions_white=[30, 31], positions_black=[10])
+        expected = MAN_VALUE + 14
+        self.assertEqual(evaluator(board, WHITE_PLAYER), expected)
+        board.set_evaluator(evaluator)
+        self.assertEqual(evaluator(board, WHITE_PLAYER), expected)
+
+        board.set_piece(10, BLACK_PLAYER, True)
+        self.assertEqual(
+            evaluator(board, WHITE_PLAYER), 2 * MAN_VALUE + 14 - KING_VALUE
+        )
+
+    def test_bot(self):
+        board = Board()
+        board.set_positions(positions_white=[27], positions_black=[16])
+        bot = AlphaBetaBot(
+            time_limit=0.2, max_depth=4, evaluate=Evaluator(), verbose=False
+        )
+        bot.player_type = WHITE_PLAYER
+        bot.take_action(board.copy(), None)
+        self.assertEqual(bot.move, Move([27, 22], [NORTHEAST]))
+
+
+class TestAlphaBetaBot(unittest.TestCase):
+    def test_avoids_losing_piece(self):
+        board = Board()
+        board.set_positions(positions_white=[27], positions_black=[16])
+        bot = AlphaBetaBot(time_limit=0.2, max_depth=4)
+        bot.player_type = WHITE_PLAYER
+        bot.take_action(board.copy(), None)
+        self.assertEqual(bot.move, Move([27, 22], [NORTHEAST]))
+        self.assertEqual(bot.depth, 4)
+
+    def test_parallel_search(self):
+        board = Board()
+        board.set_positions(positions_white=[27], positions_black=[16])
+        bot = AlphaBetaBot(time_limit=10.0, max_depth=4, workers=2)
+        bot.player_type = WHITE_PLAYER
+        bot.take_action(board.copy(), None)
+        bot.close()
+        self.assertEqual(bot.move, Move([27, 22], [NORTHEAST]))
+        self.assertEqual(bot.depth, 4)
+
+        # the workers refer to root moves by index, in an order which does not depend on the board
+        board = Board()
+        board.apply_move(Move([31, 26], [NORTHWEST]))
+        unpacked, player_type = Board.from_bytes(board.to_bytes(BLACK_PLAYER))
+        self.assertEqual(
+            root_moves(unpacked, player_type), root_moves(board, BLACK_PLAYER)
+        )
+
+    def test_evaluation_out_of_table_range(self):
+        def evaluate(board, player_type):
+            # floats, and scores beyond both DECIDED_SCORE and the 16 bit table scores
+            return 40000.5 * (
+                len(board.pieces[player_type]) - len(board.pieces[not player_type])
+            )
+
+        board = Board()
+        board.set_positions(positions_white=[27], positions_black=[16])
+        bot = AlphaBetaBot(time_limit=10.0, max_depth=4, evaluate=evaluate)
+        bot.player_type = WHITE_PLAYER
+        bot.take_action(board.copy(), None)
+        self.assertEqual(bot.move, Move([27, 22], [NORTHEAST]))
+        self.assertEqual(bot.depth, 4)
+
+    def test_search_restores_board(self):
+        board = Board()
+        bot = AlphaBetaBot(time_limit=0.2)
+        bot.player_type = BLACK_PLAYER
+        before = board.copy()
+        bot.take_action(board, None)
+        self.assertEqual(before, board)
+        self.assertTrue(board.is_legal_move(bot.move, BLACK_PLAYER))
+
+    def test_ponder(self):
+        board = Board()
+        bot = AlphaBetaBot(time_limit=0.2, max_depth=6, verbose=False)
+        bot.player_type = WHITE_PLAYER
+        bot.take_action(board.copy(), None)
+        board.apply_move(bot.move)
+        bot.reset()
+
+        # the search which pondered the predicted reply to the last iteration is continued
+        before = board.copy()
+        bot.start_ponder(board)
+        bot.ponder_thread.join(timeout=10.0)
+        bot.stop_ponder()
+        self.assertEqual(before, board)
+        self.assertTrue(bot.ponder_result[3])
+
+        reply = bot.predict_reply(board, board.all_legal_moves(BLACK_PLAYER))
+        board.apply_move(reply)
+        pondered_move = bot.ponder_result[1]
+        bot.take_action(board.copy(), None)
+        self.assertEqual(bot.ponder_hits, 1)
+        self.assertEqual(bot.depth, 6)
+        self.assertEqual(bot.move, pondered_move)
+        self.assertTrue(board.is_legal_move(bot.move, WHITE_PLAYER))
+
+        # without a prediction all replies are pondered, until the ponder is stopped
+        bot.table = TranspositionTable(1)
+        board.apply_move(bot.move)
+        bot.start_ponder(board)
+        time.sleep(0.1)
+        bot.stop_ponder()
+        self.assertIsNone(bot.ponder_thread)
+        self.assertIsNone(bot.ponder_result)
+
+
+class TestMCTSBot(unittest.TestCase):
+    def test_avoids_losing_piece(self):
+        board = Board()
+        board.set_positions(positions_white=[27], positions_black=[16])
+        bot = MCTSBot(time_limit=10.0, max_iterations=500, seed=0, verbose=False)
+        bot.player_type = WHITE_PLAYER
+        bot.take_action(board.copy(), None)
+        self.assertEqual(bot.move, Move([27, 22], [NORTHEAST]))
+        self.assertEqual(bot.playouts, 500)
+
+    def test_tree(self):
+        board = Board()
+        bot = MCTSBot(time_limit=10.0, max_iterations=300, seed=1, verbose=False)
+        bot.player_type = BLACK_PLAYER
+        before = board.copy()
+        bot.take_action(board, None)
+        self.assertEqual(before, board)
+        self.assertTrue(board.is_legal_move(bot.move, BLACK_PLAYER))
+
+        # every playout passes the root, and one of its children
+        self.assertEqual(bot.visits[0], 300)
+        self.assertEqual(sum(visits for visits, _ in bot.root_statistics()), 300)
+        for node in range(1, len(bot.visits)):
+            self.assertLessEqual(bot.visits[node], bot.visits[bot.parents[node]])
+
+    def test_parallel_search(self):
+        board = Board()
+        bot = MCTSBot(time_limit=0.5, workers=2, verbose=False)
+        bot.player_type = WHITE_PLAYER
+        bot.take_action(board, None)
+        bot.close()
+        self.assertTrue(board.is_legal_move(bot.move, WHITE_PLAYER))
+        self.assertGreater(bot.playouts, 0)
+
+        # the workers unpack the position on a BitBoard and refer to root moves by index
+        board, player_type = Board.from_fen("W:W27,28,K45:B22,23,K3")
+        unpacked, _ = BitBoard.from_bytes(board.to_bytes(player_type))
+        self.assertEqual(
+            root_moves(unpacked, player_type), root_moves(board, player_type)
+        )
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_size_within_budget(self):
+        table = TranspositionTable(size_mb=1)
+        self.assertLessEqual(table.size_bytes(), 2**20)
+        self.assertEqual(table.size & table.mask, 0)
+
+    def test_store_and_probe(self):
+        table = TranspositionTable(size_mb=1)
+        key = position_key(Board(), WHITE_PLAYER)
+        self.assertIsNone(table.probe(key))
+        table.store(key, 3, -12, LOWER_BOUND, 7)
+        self.assertEqual(table.probe(key), (3, -12, LOWER_BOUND, 7))
+        self.assertIsNone(table.probe(position_key(Board(), BLACK_PLAYER)))
+        self.assertEqual((table.hits, table.misses), (1, 2))
+
+    def test_replacement(self):
+        colliding_key = (1 << 40) + 5
+        table = TranspositionTable(size_mb=1, replacement=DEPTH_PREFERRED)
+        table.store(5, 4, 1, EXACT)
+        table.store(colliding_key, 2, 1, EXACT)
+        self.assertIsNotNone(table.probe(5))
+        self.assertIsNone(table.probe(colliding_key))
+        self.assertEqual(table.collisions, 1)
+
+        table = TranspositionTable(size_mb=1, replacement=ALWAYS_REPLACE)
+        table.store(5, 4, 1, EXACT)
+        table.store(colliding_key, 2, 1, EXACT)
+        self.assertIsNone(table.probe(5))
+        self.assertIsNotNone(table.probe(colliding_key))
+        self.assertEqual(table.overwrites, 1)
+
+
+class TestPerft(unittest.TestCase):
+    def test_reference_positions(self):
+        for name, (key, player_type, expected_nodes) in reference_positions.items():
+            for depth in [1, 2, 3, 4]:
+                board = Board.from_key(key)
+                self.assertEqual(
+                    expected_nodes[depth], perft(board, player_type, depth), name
+                )
+                self.assertEqual(Board.from_key(key), board)
+
+    def test_bitboard_reference_positions(self):
+        for name, (key, player_type, expected_nodes) in reference_positions.items():
+            board = BitBoard(Board.from_key(key).pieces)
+            self.assertEqual(expected_nodes[4], perft(board, player_type, 4), name)
+
+    def test_divide(self):
+        result = divide(Board(), WHITE_PLAYER, 3)
+        self.assertEqual(len(result), 9)
+        self.assertEqual(sum(nodes for _, nodes in result), 658)
+
+        self.assertEqual(
+            divide(Board(), WHITE_PLAYER, 1), [(move, 1) for move, _ in result]
+        )
+        self.assertEqual(perft(Board(), WHITE_PLAYER, -1), 1)
+        for depth in (0, -1):
+            with self.assertRaisesRegex(Exception, "at least 1"):
+                divide(Board(), WHITE_PLAYER, depth)
+
+
+class TestMatchRunner(unittest.TestCase):
+    def test_match(self):
+        runner = MatchRunner(RandomWalker(), RandomWalker(), games=4, seed=3)
+        output = io.StringIO()
+        score = runner.run(ResultWriter(output))
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(sum(score.values()), 4)
+        self.assertEqual(
+            [result["white"] for result in results[:2]], [PLAYER1, PLAYER2]
+        )
+        self.assertEqual(set(results[0]), set(result_fields))
+
+    def test_seeded_games_repeat(self):
+        runner = MatchRunner(RandomWalker(), RandomWalker(), games=2, seed=5)
+        first = [result["plies"] for result in runner.results()]
+        second = [result["plies"] for result in runner.results()]
+        self.assertEqual(first, second)
+
+    def test_max_plies(self):
+        winner, reason, plies, move_times = play_game(
+            RandomWalker(), RandomWalker(), seed=0, max_plies=10
+        )
+        self.assertEqual((winner, reason, plies), (None, "max plies", 10))
+        self.assertEqual(len(move_times[WHITE_PLAYER]), 5)
+
+    def test_global_random_untouched(self):
+        state = random.getstate()
+        play_game(RandomWalker(), RandomWalker(), seed=0, max_plies=10)
+        self.assertEqual(random.getstate(), state)
+
+    def test_no_pygame(self):
+        # this process has imported pygame already, so the import is checked in a new one
+        code = "import sys, pydraughts.match; print('pygame' in sys.modules)"
+        output = subprocess.check_output([sys.executable, "-c", code], text=True)
+        self.assertEqual(output.strip(), "False")
+
+    def test_csv(self):
+        output = io.StringIO()
+        runner = MatchRunner(RandomWalker(), RandomWalker(), games=2, max_plies=20)
+        runner.run(ResultWriter(output, "csv"))
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], ",".join(result_fields))
+        self.assertEqual(len(lines), 3)
+
+
+class TestMoveCache(unittest.TestCase):
+    def fill(self, cache, n_games=5):
+        for seed in range(n_games):
+            random_game(seed, 100, board=Board(move_cache=cache))
+
+    def test_policies_stay_within_budget(self):
+        for policy in [LRU, CLOCK, TWO_Q]:
+            cache = MoveCache(max_bytes=50000, policy=policy)
+            self.fill(cache)
+            stats = cache.stats()
+            self.assertLessEqual(stats["resident_bytes"], 50000, policy)
+            self.assertGreater(stats["evictions"], 0, policy)
+            self.assertGreater(stats["entries"], 0, policy)
+
+    def test_hits_and_misses(self):
+        cache = MoveCache()
+        board = Board(move_cache=cache)
+        moves = board.all_legal_moves(WHITE_PLAYER)
+        self.assertIs(moves, board.copy().all_legal_moves(WHITE_PLAYER))
+        board.all_legal_moves(BLACK_PLAYER)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_put_does_not_use_entry(self):
+        moves = Board().all_legal_moves(WHITE_PLAYER)
+        for policy in [LRU, CLOCK, TWO_Q]:
+            cache = MoveCache(policy=policy)
+            cache.put(1, WHITE_PLAYER, moves)
+            cache.put(2, WHITE_PLAYER, moves)
+
+            # storing a cached position again leaves it the first to be evicted
+            cache.put(1, WHITE_PLAYER, moves)
+            self.assertEqual(len(cache.entries), 2, policy)
+            cache.entries.evict()
+            self.assertNotIn(1 << 1, cache.entries, policy)
+            self.assertIn(2 << 1, cache.entries, policy)
+
+    def test_disable_and_resize(self):
+        cache = MoveCache()
+        self.fill(cache, n_games=1)
+        cache.resize(10000)
+        self.assertLessEqual(cache.resident_bytes, 10000)
+
+        cache.disable()
+        self.assertEqual(len(cache.entries), 0)
+        board = Board(move_cache=cache)
+        board.all_legal_moves(WHITE_PLAYER)
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_threads(self):
+        cache = MoveCache(max_bytes=100000, policy=CLOCK)
+        threads = [Thread(target=self.fill, args=(cache, 2)) for _ in range(4)]
+        [thread.start() for thread in threads]
+        [thread.join() for thread in threads]
+        self.assertLessEqual(cache.resident_bytes, 100000)
+
+
+class TestTablebase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        generate(cls.directory.name, max_pieces=2)
+        cls.tablebase = Tablebase(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebase.close()
+        cls.directory.cleanup()
+
+    def test_signatures(self):
+        self.assertEqual(len(all_signatures(2)), 4)
+        self.assertEqual(self.tablebase.max_pieces, 2)
+
+    def test_index(self):
+        material = Material((1, 0, 0, 1))
+        board = Board()
+        indexes = set()
+        for (
+            index,
+            white_men,
+            white_kings,
+            black_men,
+            black_kings,
+        ) in material.positions():
+            board.set_positions(white_men, black_men, white_kings, black_kings)
+            self.assertEqual(material.index(board), index)
+            indexes.add(index)
+        self.assertEqual(len(indexes), 45 * 50 - 45)
+
+    def test_consistent_with_successors(self):
+        """a win needs a successor lost for the opponent, a loss only has successors won by the opponent"""
+        material = Material((0, 1, 1, 0))
+        board = Board(move_cache=MoveCache(enabled=False))
+        for _, white_men, white_kings, black_men, black_kings in material.positions():
+            board.set_positions(white_men, black_men, white_kings, black_kings)
+            for player_type in [WHITE_PLAYER, BLACK_PLAYER]:
+                successors = []
+                for move in board.all_legal_moves(player_type):
+                    undo = board.apply_move(move)
+                    successors.append(self.tablebase.probe(board, not player_type))
+                    board.undo_move(undo)
+
+                losses = [plies for result, plies in successors if result == LOSS]
+                if not successors:
+                    expected = (LOSS, 0)
+                elif losses:
+                    expected = (WIN, min(losses) + 1)
+                elif all(result == WIN for result, _ in successors):
+                    expected = (LOSS, max(plies for _, plies in successors) + 1)
+                else:
+                    expected = (DRAW, 0)
+                self.assertEqual(self.tablebase.probe(board, player_type), expected)
+
+    def test_not_in_tables(self):
+        self.assertIsNone(self.tablebase.probe(Board(), WHITE_PLAYER))
+
+    def test_lone_side(self):
+        # the opponent has no pieces left, the game is won before any move
+        board = Board()
+        board.set_positions(positions_white=[30])
+        self.assertEqual(self.tablebase.probe(board, WHITE_PLAYER), (WIN, 0))
+        self.assertEqual(self.tablebase.probe(board, BLACK_PLAYER), (LOSS, 0))
+
+    def test_bot(self):
+        board = Board()
+        board.set_positions(kings_white=[27], positions_black=[16])
+        result, plies = self.tablebase.probe(board, WHITE_PLAYER)
+        self.assertEqual(result, WIN)
+
+        bot = AlphaBetaBot(
+            time_limit=10.0, tablebase=pickle.loads(pickle.dumps(self.tablebase))
+        )
+        bot.player_type = WHITE_PLAYER
+        bot.take_action(board.copy(), None)
+        self.assertEqual(bot.depth, 1)
+
+        board.apply_move(bot.move)
+        self.assertEqual(self.tablebase.probe(board, BLACK_PLAYER), (LOSS, plies - 1))
+
+
+class TestOpeningBook(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name + "/book.bin"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def build(self, games):
+        builder = BookBuilder(RandomWalker(), book_plies=4, max_plies=40)
+        builder.play_games(games)
+        builder.write(self.path)
+        return builder, OpeningBook(self.path)
+
+    def test_entries_match_builder(self):
+        builder, book = self.build(10)
+        self.assertEqual(len(book), len(builder.stats))
+
+        rng = random.Random(0)
+        for seed in range(3):
+            played, _ = play_book_game(RandomWalker(), seed, book_plies=4, max_plies=40)
+            board = Board()
+            player_type = WHITE_PLAYER
+            for key, code in played:
+                entries = book.entries(board, player_type)
+                for move, games, score in entries:
+                    self.assertEqual(
+                        [games, score], builder.stats[(key, encode_move(move))]
+                    )
+                move = decode_move(code, board.all_legal_moves(player_type))
+                self.assertIn(move, [move for move, _, _ in entries])
+                self.assertIn(
+                    book.lookup(board, player_type, rng),
+                    board.all_legal_moves(player_type),
+                )
+                board.apply_move(move)
+                player_type = not player_type
+        book.close()
+
+    def test_most_played_move(self):
+        builder = BookBuilder(RandomWalker())
+        board = Board()
+        moves = board.all_legal_moves(WHITE_PLAYER)
+        key = position_key(board, WHITE_PLAYER)
+        builder.add_game([(key, encode_move(moves[0]))], BLACK_PLAYER)
+        builder.add_game([(key, encode_move(moves[1]))], WHITE_PLAYER)
+        builder.add_game([(key, encode_move(moves[1]))], None)
+        builder.write(self.path)
+
+        book = OpeningBook(self.path)
+        self.assertEqual(book.lookup(board, WHITE_PLAYER), moves[1])
+        self.assertEqual(
+            sorted(
+                games_score for _, *games_score in book.entries(board, WHITE_PLAYER)
+            ),
+            [[1, 0], [2, 3]],
+        )
+        self.assertIsNone(book.lookup(board, BLACK_PLAYER))
+
+        bot = AlphaBetaBot(book=pickle.loads(pickle.dumps(book)), verbose=False)
+        bot.player_type = WHITE_PLAYER
+        bot.take_action(board.copy(), None)
+        self.assertEqual(bot.move, moves[1])
+        self.assertEqual(bot.nodes, 0)
+        book.close()
+        bot.book.close()
+
+
+class TestBatch(unittest.TestCase):
+    def random_positions(self, n_games=5):
+        positions = []
+        for seed in range(n_games):
+            random_game(seed, 150, positions)
+        boards, player_types = zip(*positions)
+        return list(boards), list(player_types)
+
+    def test_same_as_board(self):
+        boards, player_types = self.random_positions()
+        analysis = batch.analyze(batch.to_array(boards), player_types)
+        all_moves = analysis.legal_moves()
+        for n, (board, player_type) in enumerate(zip(boards, player_types)):
+            moves = board.all_legal_moves(player_type)
+            self.assertEqual(sorted_moves(all_moves[n]), sorted_moves(moves))
+            self.assertEqual(
+                analysis.has_capture[n], bool(board.has_capture_moves(player_type))
+            )
+            if not analysis.has_capture[n]:
+                self.assertEqual(analysis.steps[n].sum(), len(moves))
+
+    def test_piece_counts(self):
+        board = Board()
+        board.set_positions(
+            positions_white=[30, 31],
+            kings_white=[2],
+            positions_black=[10],
+            kings_black=[44],
+        )
+        analysis = batch.analyze([board, Board()], BLACK_PLAYER)
+        self.assertEqual(analysis.piece_counts.tolist(), [[2, 1, 1, 1], [20, 0, 20, 0]])
+        self.assertEqual(batch.to_pieces(batch.to_array([board])[0]), board.pieces)
+
+    def test_records(self):
+        boards, player_types = self.random_positions(n_games=2)
+        records = batch.to_records(boards, player_types)
+        data = batch.records_to_bytes(records)
+        self.assertEqual(
+            data,
+            b"".join(
+                board.to_bytes(player_type)
+                for board, player_type in zip(boards, player_types)
+            ),
+        )
+        self.assertTrue((batch.records_from_bytes(data) == records).all())
+        self.assertEqual(batch.from_records(records), list(zip(boards, player_types)))
+
+        positions, records_player_types = batch.records_to_array(records)
+        self.assertTrue((positions == batch.to_array(boards)).all())
+        self.assertEqual(records_player_types.tolist(), player_types)
+        array_records = batch.array_to_records(positions, player_types)
+        self.assertTrue((array_records == records).all())
+
+
+class SlowWalker(RandomWalker):
+    """A random walker which thinks for delay seconds"""
+
+    def __init__(self, delay):
+        super().__init__(name="slow_walker")
+        self.delay = delay
+
+    def take_action(self, board, graphics, capturing=False):
+        time.sleep(self.delay)
+        super().take_action(board, graphics)
+
+
+class PonderingWalker(RandomWalker):
+    """A random walker which sets an event, shared with its worker process, while it ponders"""
+
+    def __init__(self):
+        super().__init__(name="pondering_walker")
+        self.pondering = multiprocessing.Event()
+
+    def start_ponder(self, board):
+        self.pondering.set()
+
+    def stop_ponder(self):
+        self.pondering.clear()
+
+
+class TestTurn(unittest.TestCase):
+    def test_stop_ponder_in_process(self):
+        player = PonderingWalker()
+        turn = Turn(player, execution=PROCESS, ponder=True)
+        try:
+            turn.open()
+            turn.start_ponder(Board(), WHITE_PLAYER)
+            self.assertTrue(player.pondering.wait(5.0))
+
+            # the worker stops pondering without a new move request
+            turn.stop_ponder()
+            deadline = time.perf_counter() + 5.0
+            while player.pondering.is_set() and time.perf_counter() < deadline:
+                time.sleep(0.01)
+            self.assertFalse(player.pondering.is_set())
+        finally:
+            turn.close()
+
+    def setUp(self):
+        pygame.init()
+
+    def take_move(self, turn, board, player_type, time_left=None):
+        while turn.move is None:
+            turn.take(board, None, player_type, time_left)
+            time.sleep(0.005)
+        move = turn.move
+        turn.clean()
+        return move
+
+    def test_fallback_rng(self):
+        # the fallback move is drawn from the random generator of the player
+        player = RandomWalker(seed=3)
+        self.assertIs(Turn(player).rng, player.rng)
+        rng = random.Random(5)
+        self.assertIs(Turn(player, rng=rng).rng, rng)
+
+        board = Board()
+        moves = [fallback_move(board, WHITE_PLAYER, random.Random(5)) for _ in range(2)]
+        self.assertEqual(moves[0], moves[1])
+        self.assertIn(moves[0], board.all_legal_moves(WHITE_PLAYER))
+
+    def test_worker_process_is_reused(self):
+        turn = Turn(RandomWalker(), execution=PROCESS)
+        turn.open()
+        try:
+            pid = turn.worker.process.pid
+            board = Board()
+            player_type = WHITE_PLAYER
+            for _ in range(6):
+                move = self.take_move(turn, board, player_type)
+                self.assertIn(move, board.all_legal_moves(player_type))
+                board.apply_move(move)
+                player_type = not player_type
+            self.assertEqual(turn.worker.process.pid, pid)
+        finally:
+            turn.close()
+        self.assertIsNone(turn.worker.process)
+
+    def test_deadline(self):
+        for execution in (PROCESS, WORKER_THREAD):
+            turn = Turn(SlowWalker(delay=2.0), execution=execution, move_time_limit=5.0)
+            try:
+                board = Board()
+                start = time.perf_counter()
+                move = self.take_move(turn, board, WHITE_PLAYER, time_left=0.2)
+                self.assertLess(time.perf_counter() - start, 1.5)
+                self.assertIn(move, board.all_legal_moves(WHITE_PLAYER))
+            finally:
+                turn.close()
+
+        # a bot in a worker process ponders between its moves
+        turn = Turn(
+            AlphaBetaBot(time_limit=0.1, verbose=False), execution=PROCESS, ponder=True
+        )
+        try:
+            board = Board()
+            move = self.take_move(turn, board, WHITE_PLAYER)
+            board.apply_move(move)
+            turn.start_ponder(board, WHITE_PLAYER)
+            time.sleep(0.1)
+            board.apply_move(board.all_legal_moves(BLACK_PLAYER)[0])
+            move = self.take_move(turn, board, WHITE_PLAYER)
+            self.assertIn(move, board.all_legal_moves(WHITE_PLAYER))
+        finally:
+            turn.close()
+
+        # a cancelled worker process is started again for the next move
+        turn = Turn(SlowWalker(delay=0.05), execution=PROCESS, move_time_limit=0.01)
+        try:
+            board = Board()
+            self.take_move(turn, board, WHITE_PLAYER)
+            self.assertIsNone(turn.worker.process)
+            turn.move_time_limit = None
+            move = self.take_move(turn, board, WHITE_PLAYER)
+            self.assertIn(move, board.all_legal_moves(WHITE_PLAYER))
+            self.assertIsNotNone(turn.worker.process)
+        finally:
+            turn.close()
+
+
+class CountingHumanPlayer(HumanPlayer):
+    """A human player which counts how often the highlights are computed"""
+
+    highlights = 0
+
+    def highlight_moves(self, board, graphics, location):
+        self.highlights += 1
+        super().highlight_moves(board, graphics, location)
+
+
+class TestHumanPlayer(unittest.TestCase):
+    def setUp(self):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        self.graphics = Graphics()
+        pygame.event.clear()
+
+    def post(self, event_type, i, **kwargs):
+        position = pixel_coords(list_to_matrix_coords(i))
+        pygame.event.post(pygame.event.Event(event_type, pos=position, **kwargs))
+
+    def test_move_from_events(self):
+        board = Board()
+        player = CountingHumanPlayer()
+        player.player_type = WHITE_PLAYER
+
+        # hovering within a square, or over a square without an own piece, does not compute highlights
+        for _ in range(5):
+            self.post(pygame.MOUSEMOTION, 31, rel=(1, 0), buttons=(0, 0, 0))
+        self.post(pygame.MOUSEMOTION, 25, rel=(1, 0), buttons=(0, 0, 0))
+        self.post(pygame.MOUSEBUTTONDOWN, 31, button=1)
+        self.post(pygame.MOUSEBUTTONDOWN, 26, button=1)
+        player.take_action(board.copy(), self.graphics)
+
+        self.assertEqual(player.move, Move([31, 26], [NORTHWEST]))
+        self.assertEqual(player.highlights, 2)
+        self.assertEqual(sorted(self.graphics.legal_moves), [26, 27, 31, 31])
+
+    def test_capture_from_events(self):
+        board = Board()
+        board.set_positions(positions_white=[6], positions_black=[11, 22])
+        player = HumanPlayer()
+        player.player_type = WHITE_PLAYER
+        for i in (6, 17, 28):
+            self.post(pygame.MOUSEBUTTONDOWN, i, button=1)
+        player.take_action(board.copy(), self.graphics)
+        self.assertEqual(
+            player.move, Move([6, 17, 28], [SOUTHEAST, SOUTHEAST], [11, 22])
+        )
+
+    def test_quit(self):
+        player = HumanPlayer(event_timeout=10)
+        player.player_type = WHITE_PLAYER
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+        player.take_action(Board(), self.graphics)
+        self.assertIsNone(player.move)
+
+
+class TestGraphics(unittest.TestCase):
+    def setUp(self):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        self.graphics = Graphics()
+        self.graphics.fps = 0
+
+    def screen_pixels(self):
+        return pygame.image.tostring(self.graphics.screen, "RGB")
+
+    def test_incremental_frames_match_full_redraw(self):
+        graphics = self.graphics
+        rng = random.Random(0)
+        board = Board()
+        moves = []
+        graphics.move_history = moves
+        graphics.time = {WHITE_PLAYER: 0.0, BLACK_PLAYER: 0.0}
+        player_type = WHITE_PLAYER
+        for ply in range(30):
+            legal_moves = board.all_legal_moves(player_type)
+            if not legal_moves:
+                break
+            move = rng.choice(legal_moves)
+            graphics.legal_moves = [move.locations[-1]] if ply % 3 == 0 else None
+            graphics.selected_piece = move.locations[0] if ply % 3 == 0 else None
+            graphics.time[player_type] += 1
+            graphics.update_display(board)
+
+            incremental = self.screen_pixels()
+            graphics.invalidate()
+            graphics.update_display(board)
+            self.assertEqual(incremental, self.screen_pixels())
+
+            board.apply_move(move)
+            moves.append(move)
+            player_type = not player_type
+
+    def test_only_changed_squares_are_updated(self):
+        graphics = self.graphics
+        board = Board()
+        graphics.update_display(board)
+        self.assertEqual(graphics.dirty_rects, [])
+
+        updates = []
+        update = pygame.display.update
+        pygame.display.update = updates.append
+        try:
+            graphics.update_display(board)
+            self.assertEqual(updates, [])
+
+            move = board.all_legal_moves(WHITE_PLAYER)[0]
+            board.apply_move(move)
+            graphics.move_history = [move]
+            graphics.update_display(board)
+        finally:
+            pygame.display.update = update
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(len(updates[0]), len(move.locations))
+
+    def test_text_cache_is_bounded(self):
+        graphics = self.graphics
+        board = Board()
+        graphics.time = {WHITE_PLAYER: 0.0, BLACK_PLAYER: 0.0}
+        for second in range(3 * graphics.text_cache_size):
+            graphics.time[WHITE_PLAYER] = float(second)
+            graphics.update_display(board)
+        self.assertEqual(len(graphics.text_cache), graphics.text_cache_size)
+
+
+def random_game(seed, max_plies=120, positions=None, board=None):
+    """
+    the moves of a random game, played on board or from the start position. Given a positions list, a copy
+    of the board and the player to move are appended to it before every move.
+    """
+    rng = random.Random(seed)
+    if board is None:
+        board = Board()
+    player_type = WHITE_PLAYER
+    moves = []
+    for _ in range(max_plies):
+        legal_moves = board.all_legal_moves(player_type)
+        if not legal_moves:
+            break
+        if positions is not None:
+            positions.append((board.copy(), player_type))
+        move = rng.choice(legal_moves)
+        board.apply_move(move)
+        moves.append(move)
+        player_type = not player_type
+    return moves
+
+
+def random_position(rng, max_pieces=20):
+    """a board with random men and kings of both colours, men are never on their promotion row"""
+    pieces = {WHITE_PLAYER: {}, BLACK_PLAYER: {}}
+    for i in rng.sample(range(50), rng.randint(2, max_pieces)):
+        color = rng.choice([WHITE_PLAYER, BLACK_PLAYER])
+        pieces[color][i] = rng.random() < 0.3 or bool(PROMOTION_MASK[color] >> i & 1)
+    return Board(pieces)
+
+
+class TestPDN(unittest.TestCase):
+    def setUp(self):
+        self.games = [
+            pdn.PDNGame.from_moves(random_game(seed), pdn.DRAW, {"Event": str(seed)})
+            for seed in range(8)
+        ]
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.pdn")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertSameGames(self, games, expected_games):
+        self.assertEqual(len(games), len(expected_games))
+        for game, expected_game in zip(games, expected_games):
+            self.assertEqual(game.tags["Event"], expected_game.tags["Event"])
+            self.assertEqual(game.result, expected_game.result)
+            self.assertEqual(game.notation, expected_game.notation)
+            if game.moves is not None:
+                self.assertEqual(game.moves, expected_game.moves)
+
+    def test_round_trip(self):
+        self.assertEqual(pdn.write_games(self.path, self.games), len(self.games))
+        self.assertSameGames(list(pdn.read_games(self.path)), self.games)
+
+        with open(self.path, "rb") as file:
+            self.assertSameGames(list(pdn.read_games(file)), self.games)
+
+    def test_read_buffer(self):
+        pdn.write_games(self.path, self.games)
+        with open(self.path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                games = list(pdn.read_games(buffer, validate=False))
+        self.assertSameGames(games, self.games)
+        self.assertTrue(all(game.moves is None for game in games))
+
+    def test_read_parallel(self):
+        pdn.write_games(self.path, self.games)
+        for chunk_size in [1, 500, 10**6]:
+            games = list(
+                pdn.read_games_parallel(self.path, workers=2, chunk_size=chunk_size)
+            )
+            self.assertSameGames(games, self.games)
+
+    def test_parse_movetext(self):
+        text = (
+            '[Event "test"]\n[Result "1-0"]\n\n'
+            "1. 32-28 {a comment (with parentheses)} 19-23 (1... 18-23 2. 28x19) "
+            "2. 28x19 14x23 $1 1-0\n"
+        )
+        game = pdn.parse_game(text)
+        self.assertEqual(game.tags, {"Event": "test", "Result": "1-0"})
+        self.assertEqual(game.notation, ["32-28", "19-23", "28x19", "14x23"])
+        self.assertEqual(game.result, pdn.WHITE_WINS)
+        self.assertEqual(list(game.moves[2].captures), [22])
+
+    def test_fen(self):
+        board = Board()
+        board.clear()
+        board.set_piece(46, WHITE_PLAYER, False)
+        board.set_piece(11, BLACK_PLAYER, False)
+        board.set_piece(4, BLACK_PLAYER, True)
+        fen = board.to_fen(BLACK_PLAYER)
+        self.assertEqual(fen, "B:W47:BK5,12")
+
+        # black moves first
+        game = pdn.parse_game('[FEN "%s"]\n1... 5-10 2. 47-42 *' % fen)
+        self.assertEqual(
+            [list(move.locations) for move in game.moves], [[4, 9], [46, 41]]
+        )
+
+        replay = [(board.key(), player_type) for board, player_type, _ in game.replay()]
+        self.assertEqual(replay[0], (Board(board.pieces).key(), BLACK_PLAYER))
+        self.assertEqual(replay[1][1], WHITE_PLAYER)
+        pdn.write_games(self.path, [game])
+        self.assertEqual(next(pdn.read_games(self.path)).tags["FEN"], fen)
+
+    def test_ambiguous_capture(self):
+        # the white king captures two pieces on 1x29x45 and on 1x34x45, 1x45 would not tell them apart
+        board, player_type = Board.from_fen("W:WK1:B15,20,23,K40")
+        moves = [move for move in board.all_legal_moves(player_type) if move.captures]
+        self.assertEqual(len(moves), 2)
+        for move in moves:
+            game = pdn.PDNGame.from_moves([move], board=board, player_type=player_type)
+            self.assertEqual(len(game.notation[0].split("x")), 3)
+            pdn.write_games(self.path, [game])
+            self.assertEqual(next(pdn.read_games(self.path)).moves, [move])
+
+    def test_validator_matches_board(self):
+        rng = random.Random(0)
+        for _ in range(100):
+            board = random_position(rng)
+            player_type = rng.choice([WHITE_PLAYER, BLACK_PLAYER])
+            legal_moves = board.all_legal_moves(player_type)
+
+            # every legal move is accepted, in full and in short notation
+            for move in legal_moves:
+                validator = pdn.Validator(board.pieces, player_type)
+                self.assertEqual(validator.move(move.locations), move)
+                validator = pdn.Validator(board.pieces, player_type)
+                short = (move.locations[0], move.locations[-1])
+                self.assertIn(validator.move(short), legal_moves)
+
+                # a full capture path with a landing square left out is not legal
+                if len(move.locations) > 3:
+                    locations = move.locations[:1] + move.locations[2:]
+                    if all(other.locations != locations for other in legal_moves):
+                        validator = pdn.Validator(board.pieces, player_type)
+                        self.assertIsNone(validator.move(locations))
+
+            # every other origin and destination is rejected, which leaves the validator unchanged
+            legal_ends = {
+                (move.locations[0], move.locations[-1]) for move in legal_moves
+            }
+            validator = pdn.Validator(board.pieces, player_type)
+            for origin in range(50):
+                for destination in range(50):
+                    if (origin, destination) not in legal_ends:
+                        self.assertIsNone(validator.move((origin, destination)))
+
+    def test_illegal_move(self):
+        # a man can not move backwards, and white has to capture
+        texts = [
+            '[Event "a"]\n1. 32-28 19-23 2. 28-32 *\n',
+            '[Event "b"]\n1. 32-28 19-23 2. 34-30 *\n',
+        ]
+        # squares off the board
+        texts += [
+            '[Event "a"]\n1. 32-28 19-23 2. 51x19 *\n',
+            '[Event "b"]\n1. 32-28 19-23 2. 0x19 *\n',
+            '[Event "b"]\n1. 0-46 19-23 2. 32-28 *\n',
+        ]
+        for text in texts:
+            with self.assertRaisesRegex(Exception, "Illegal move"):
+                pdn.parse_game(text)
+            self.assertIsNone(pdn.parse_game(text, skip_invalid=True))
+            self.assertEqual(len(pdn.parse_game(text, validate=False)), 3)
+
+        text = "\n".join(texts) + '[Event "c"]\n1. 32-28 *\n'
+        games = list(pdn.read_games(io.StringIO(text), skip_invalid=True))
+        self.assertEqual([game.tags["Event"] for game in games], ["c"])
+
+
+def sorted_moves(moves):
+    return sorted(str(move) for move in moves)
+
+
+class TestBitBoard(unittest.TestCase):
+    """The bitboard should generate the same moves as the board"""
+
+    def test_new_board(self):
+        board = Board()
+        bit_board = BitBoard()
+        self.assertEqual(board.key(), bit_board.key())
+        self.assertEqual(board.pieces, bit_board.pieces)
+        self.assertEqual(
+            sorted_moves(board.all_legal_moves(WHITE_PLAYER)),
+            sorted_moves(bit_board.all_legal_moves(WHITE_PLAYER)),
+        )
+
+    def test_play_random_move(self):
+        """random moves reach the positions of all legal moves, and nothing else"""
+        rng = random.Random(2)
+        for key, player_type, _ in reference_positions.values():
+            board = BitBoard(Board.from_key(key).pieces)
+            expected = set()
+            for move in board.all_legal_moves(player_type):
+                undo = board.apply_move(move)
+                expected.add(board.key())
+                board.undo_move(undo)
+
+            reached = set()
+            for _ in range(300):
+                copy = board.copy()
+                self.assertTrue(copy.play_random_move(player_type, rng))
+                self.assertEqual(copy.hash, copy.compute_hash())
+                reached.add(copy.key())
+            self.assertEqual(reached, expected)
+
+    def test_king_circular_capture(self):
+        board = Board()
+        board.set_positions(kings_white=[7], positions_black=[18, 38, 36, 16])
+        bit_board = BitBoard()
+        bit_board.set_positions(kings_white=[7], positions_black=[18, 38, 36, 16])
+        self.assertEqual(
+            sorted_moves(board.all_legal_moves(WHITE_PLAYER)),
+            sorted_moves(bit_board.all_legal_moves(WHITE_PLAYER)),
+        )
+
+        # two of the captures end on the square of the king, which has to stay on the board
+        for move in board.all_legal_moves(WHITE_PLAYER):
+            if move.locations[0] != move.locations[-1]:
+                continue
+            circular_board = board.copy()
+            circular_board.apply_move(move)
+            circular_bit_board = bit_board.copy()
+            circular_bit_board.apply_move(move)
+            self.assertEqual(circular_bit_board.key(), circular_board.key())
+            self.assertEqual(
+                circular_bit_board.pieces, {WHITE_PLAYER: {7: True}, BLACK_PLAYER: {}}
+            )
+
+    def test_random_games(self):
+        for seed in range(10):
+            positions = []
+            moves = random_game(seed, 150, positions)
+            bit_board = BitBoard()
+            for (board, player_type), move in zip(positions, moves):
+                self.assertEqual(board.key(), bit_board.key())
+                self.assertEqual(bit_board.hash, board.hash)
+                self.assertEqual(bit_board.hash, bit_board.compute_hash())
+                self.assertEqual(
+                    sorted_moves(board.all_legal_moves(player_type)),
+                    sorted_moves(bit_board.all_legal_moves(player_type)),
+                )
+                self.assertEqual(
+                    board.get_score(player_type), bit_board.get_score(player_type)
+                )
+
+                undo = bit_board.apply_move(move)
+                copy = bit_board.copy()
+                copy.undo_move(undo)
+                self.assertEqual(copy, BitBoard(board.pieces))
+                self.assertEqual(copy.hash, copy.compute_hash())
+
+    def test_hash(self):
+        board, player_type = Board.from_fen("W:W31,32,K45:B18,19,K3")
+        bit_board = BitBoard(board.pieces)
+        self.assertEqual(hash(bit_board), hash(board))
+        self.assertEqual(
+            position_key(bit_board, player_type), position_key(board, player_type)
+        )
+        self.assertIn(bit_board.copy(), {bit_board})
+        self.assertEqual(BitBoard.from_bytes(board.to_bytes())[0].hash, board.hash)
+
+        bot = AlphaBetaBot(time_limit=0.1, max_depth=3, verbose=False)
+        bot.player_type = player_type
+        bot.take_action(bit_board, None)
+        self.assertIn(bot.move, board.all_legal_moves(player_type))
+
+
 if __name__ == "__main__":
     unittest.main()